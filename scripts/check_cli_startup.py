@@ -0,0 +1,97 @@
+"""
+Startup-time budget check for the CLI.
+
+Runs `python -m apex_fin.main` with `--help` and with invalid arguments, and
+fails if any of them takes longer than the budget (best of several runs), or if
+importing the CLI module pulls in one of the heavy dependencies that should only
+be imported by the commands using them.
+
+Usage:
+    uv run python scripts/check_cli_startup.py [--budget 0.8] [--runs 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+
+# Modules that must not be imported to parse the command line
+HEAVY_MODULES = ("agno", "litellm", "yfinance", "pandas", "duckduckgo_search", "jinja2", "pydantic", "yaml")
+
+SCENARIOS = {
+    "--help": ["--help"],
+    "command --help": ["fullreport", "--help"],
+    "missing argument": ["analyze"],
+    "unknown option": ["compare", "--no-such-option"],
+}
+
+
+def _environment() -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_cli(args: list[str], runs: int) -> tuple[float, int]:
+    """Returns the best wall time of `runs` CLI invocations, and the exit code of the last one."""
+    best = float("inf")
+    returncode = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "apex_fin.main", *args],
+            env=_environment(),
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        best = min(best, time.perf_counter() - start)
+        returncode = completed.returncode
+    return best, returncode
+
+
+def heavy_modules_imported() -> list[str]:
+    """Returns the heavy modules loaded by importing the CLI module."""
+    code = (
+        "import sys, apex_fin.main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=_environment(), cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    return [name for name in output.split(",") if name]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=0.8, help="Maximum startup time in seconds.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario; the best time is kept.")
+    args = parser.parse_args()
+
+    failures = []
+    for name, cli_args in SCENARIOS.items():
+        elapsed, returncode = time_cli(cli_args, args.runs)
+        status = "ok" if elapsed <= args.budget else "TOO SLOW"
+        print(f"{name:<20} {elapsed * 1000:7.0f} ms  (exit {returncode})  {status}")
+        if elapsed > args.budget:
+            failures.append(name)
+
+    imported = heavy_modules_imported()
+    if imported:
+        print(f"Importing apex_fin.main loads heavy modules: {', '.join(imported)}")
+        failures.append("heavy imports")
+
+    if failures:
+        print(f"FAILED (budget {args.budget:.2f}s): {', '.join(failures)}")
+        return 1
+    print(f"All CLI startup scenarios within {args.budget:.2f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,7 @@ from apex_fin.agents.base import create_agent
 from apex_fin.prompts.analysis_instructions import AUTO_ANALYSIS_PROMPT
 from apex_fin.config import settings
 from apex_fin.utils.prompt_loader import load_prompt
-from apex_fin.utils.yf_fetcher import YFinanceFinancialAnalyzer
+from apex_fin.utils.yf_fetcher import fetch_financial_snapshot
 
 import logging
 
@@ -46,9 +46,7 @@ class FinancialDataFetcherTool:
             if data fetching fails.
         """
         try:
-            analyzer = YFinanceFinancialAnalyzer(ticker)
-            # Uses default num_news_stories and num_financial_periods from get_financial_snapshot_dict
-            data_dict = analyzer.get_financial_snapshot_dict()
+            data_dict = fetch_financial_snapshot(ticker)
             return json.dumps(data_dict)
         except Exception as e:
             return json.dumps({"error": f"Failed to fetch data for {ticker}: {str(e)}"})
@@ -105,8 +103,7 @@ def _get_financial_data_for_report(ticker: str) -> str:
     str
         A JSON string containing the financial data.
     """
-    analyzer = YFinanceFinancialAnalyzer(ticker)
-    return analyzer.get_financial_snapshot_dict()
+    return fetch_financial_snapshot(ticker)
 
 def build_auto_analysis_agent() -> Agent:
     """
@@ -142,6 +139,7 @@ def build_auto_analysis_agent() -> Agent:
         markdown=True,  # Output is a JSON object
         # response_model=AnalysisResponse,  # Enforce the new response structure
         show_tool_calls=True,
+        model_role="analysis",
     )
 
 def _setup_logging():
@@ -192,8 +190,7 @@ def _fetch_financial_data_for_agent(ticker: str, logger_instance: logging.Logger
     """
     logger_instance.info(f"Attempting to pre-fetch data for: {ticker}")
     try:
-        analyzer = YFinanceFinancialAnalyzer(ticker)
-        data_dict = analyzer.get_financial_snapshot_dict()
+        data_dict = fetch_financial_snapshot(ticker)
         logger_instance.info(f"Successfully pre-fetched data for {ticker}.")
         return json.dumps(data_dict)
     except Exception as e:
@@ -1,10 +1,130 @@
-from typing import Any, List, Optional
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel 
 from typing import Optional, Any
 from agno.agent import Agent
 from agno.models.litellm import LiteLLM
-from apex_fin.prompts.risk_instructions import RISK_PROMPT_TEMPLATE
+from agno.models.message import Message
+from apex_fin.prompts.risk_instructions import RISK_PROMPT_SOURCE, RISK_CONTEXT_TEMPLATE
 from apex_fin.config import settings
+from apex_fin.agents.mock_model import create_mock_model, is_mock_model
+from apex_fin.utils.deadline import current_deadline
+from apex_fin.utils.prompt_registry import get_prompt_registry
+from apex_fin.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefixCachingLiteLLM(LiteLLM):
+    """
+    LiteLLM model that marks the static system prompt prefix for provider-side caching.
+
+    The system message is split into its static prefix and the per-request
+    `uncached_suffix` (the agent's `additional_context`). The prefix is sent
+    as its own system message tagged with `cache_control`, which LiteLLM maps
+    to provider context caching (Gemini cached content is looked up by a hash
+    of the cached messages, so identical prefixes reuse the same cache entry).
+    Prefixes shorter than `min_prefix_tokens` are sent unchanged, since
+    providers reject caches below their minimum size.
+    """
+
+    uncached_suffix: Optional[str] = None
+    min_prefix_tokens: int = 1024
+
+    def _format_messages(self, messages: List[Message]) -> List[Dict[str, Any]]:
+        formatted_messages = super()._format_messages(messages)
+        if not formatted_messages or formatted_messages[0]["role"] != "system":
+            return formatted_messages
+
+        content = formatted_messages[0]["content"]
+        split_at = content.rfind(self.uncached_suffix) if self.uncached_suffix else -1
+        prefix, suffix = (content[:split_at], content[split_at:]) if split_at > 0 else (content, "")
+
+        if estimate_tokens(prefix) < self.min_prefix_tokens:
+            return formatted_messages
+
+        logger.debug(
+            f"Marking {len(prefix)}-char system prefix for context caching (sha256 {hashlib.sha256(prefix.encode()).hexdigest()[:12]})."
+        )
+        cached = [
+            {
+                "role": "system",
+                "content": [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}],
+            }
+        ]
+        if suffix.strip():
+            cached.append({"role": "system", "content": suffix})
+        return cached + formatted_messages[1:]
+
+
+def create_model(
+    role: Optional[str] = None,
+    name: str = "Gemini",
+    uncached_suffix: Optional[str] = None,
+) -> LiteLLM:
+    """
+    Create the LiteLLM model configured for a given agent role.
+
+    The model id and generation parameters are looked up in `llm.roles`
+    of `apex_fin.yaml`, falling back to the global `llm.model` when the
+    role is not configured. A `mock` or `mock/<profile>` model id builds
+    the local mock model (see `apex_fin.agents.mock_model`) instead. When
+    built under a deadline (see
+    `apex_fin.utils.deadline`), the request timeout is capped to the time
+    left, so a slow call cannot outlive its section budget.
+
+    Parameters
+    ----------
+    role : str, optional
+        The agent role (see `apex_fin.config.AGENT_ROLES`), e.g. "competitor"
+        or "team_leader". Defaults to None, which uses the global model.
+    name : str, optional
+        Display name of the model. Defaults to "Gemini".
+    uncached_suffix : str, optional
+        Per-request text appended after the static instructions (typically the
+        agent's `additional_context`). Only used when `llm.context_caching` is
+        enabled, to keep it out of the cached prefix. Defaults to None.
+
+    Returns
+    -------
+    LiteLLM
+        A LiteLLM model instance for the role.
+    """
+    role_config = settings.model_for_role(role)
+    generation_params = {
+        key: value
+        for key, value in {
+            "temperature": role_config.temperature,
+            "max_tokens": role_config.max_tokens,
+            "top_p": role_config.top_p,
+        }.items()
+        if value is not None
+    }
+    deadline = current_deadline()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is not None:
+        generation_params["request_params"] = {"timeout": max(remaining, 1.0)}
+    if is_mock_model(role_config.model):
+        return create_mock_model(role_config.model, role=role, name=name, **generation_params)
+    if settings.context_caching.enabled:
+        return PrefixCachingLiteLLM(
+            id=role_config.model,
+            api_key=settings.GEMINI_API_KEY,
+            name=name,
+            uncached_suffix=uncached_suffix,
+            min_prefix_tokens=settings.context_caching.min_prefix_tokens,
+            **generation_params,
+        )
+    return LiteLLM(
+        id=role_config.model,
+        api_key=settings.GEMINI_API_KEY,
+        name=name,
+        # api_base=settings.BASE_URL,
+        **generation_params,
+    )
 
 
 def create_agent(
@@ -15,13 +135,15 @@ def create_agent(
     markdown: bool = True,
     show_tool_calls: bool = True,
     response_model: type[BaseModel] | None = None,
+    model_role: Optional[str] = None,
+    additional_context: Optional[str] = None,
 ) -> Agent:
     """
     Create and configure a standardized `agno.agent.Agent` instance.
 
     This factory function simplifies the creation of agents by providing
-    a default LiteLLM model configuration (Gemini, using settings from
-    the `config` module) and common agent parameters.
+    a LiteLLM model configuration (Gemini, using settings from the `config`
+    module, routed per agent role) and common agent parameters.
 
     Parameters
     ----------
@@ -48,19 +170,22 @@ def create_agent(
         A Pydantic BaseModel class that defines the expected structure
         of the agent's response. If provided, the agent will attempt to
         format its output according to this schema. Defaults to None.
+    model_role : str, optional
+        The agent role used to pick the model and generation parameters
+        from `llm.roles` in `apex_fin.yaml`. Distinct from agno's
+        `Agent.role`. Defaults to None, which uses the global `llm.model`.
+    additional_context : str, optional
+        Per-request data (e.g. a company summary) appended to the system
+        message after the static instructions, so the instruction prefix
+        stays identical across requests. Defaults to None.
 
     Returns
     -------
     Agent
         An instance of `agno.agent.Agent` configured with the specified
-        parameters and a default LiteLLM (Gemini) model.
+        parameters and the LiteLLM (Gemini) model routed for its role.
     """
-    model = LiteLLM(
-        id=settings.LLM_MODEL,
-        api_key=settings.GEMINI_API_KEY,
-        name="Gemini",
-        # api_base=settings.BASE_URL,
-    )
+    model = create_model(model_role, uncached_suffix=additional_context)
 
     return Agent(
         name=name,
@@ -71,6 +196,7 @@ def create_agent(
         markdown=markdown,
         show_tool_calls=show_tool_calls,
         response_model=response_model,
+        additional_context=additional_context,
     )
 
 
@@ -88,12 +214,13 @@ def build_base_risk_agent(
     risk_name : str
         The risk type (e.g., "macroeconomic", "esg") to be assessed.
     context : str
-        Markdown-formatted financial summary. Used if instructions are not provided,
-        but providing pre-rendered instructions is preferred.
+        Markdown-formatted financial summary. It is appended after the
+        instructions as additional context, so the instructions themselves
+        are identical for every company.
     tools : Optional[list[Any]]
         Optional list of tools to provide to the agent.
     instructions : Optional[List[str]]
-        Pre-rendered instructions for the agent. If provided, these are used directly.
+        Pre-rendered static instructions for the agent. If provided, these are used directly.
 
     Returns
     -------
@@ -110,8 +237,8 @@ def build_base_risk_agent(
             raise ValueError(
                 f"Missing or empty guideline for risk '{risk_name}' in config.risk.guidelines and no pre-rendered instructions provided."
             )
-        prompt_content = RISK_PROMPT_TEMPLATE.render(
-            risk_name=risk_name, context=context, focus=guideline.strip()
+        prompt_content = get_prompt_registry().render(
+            RISK_PROMPT_SOURCE, risk_name=risk_name, focus=guideline.strip()
         )
         final_instructions = [prompt_content]
 
@@ -121,4 +248,6 @@ def build_base_risk_agent(
         instructions=final_instructions,
         tools=tools or [],
         markdown=True,
+        model_role="risk",
+        additional_context=RISK_CONTEXT_TEMPLATE.render(context=context),
     )
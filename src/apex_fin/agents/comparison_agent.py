@@ -1,18 +1,29 @@
 """
 Comparison Agent that takes a primary stock and compares it against
 its main competitors across valuation and financial health metrics.
+
+Small peer sets are compared from a full analysis summary of each company.
+Large ones are compared map-reduce style: each company is reduced to a
+fixed-schema metrics card computed from its snapshot (no LLM call), and the
+comparison runs over the cards; beyond `comparison.group_size` peers, groups
+of peers are first summarized in parallel and the comparison runs over the
+peer set statistics and the group summaries.
 """
+import contextvars
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Union, Dict
 from agno.agent import Agent, RunResponse
 from agno.tools.thinking import ThinkingTools
 from apex_fin.agents.analysis_agent import build_auto_analysis_agent
 from apex_fin.agents.base import create_agent
 from apex_fin.agents.competitor_agent import get_competitors
-from apex_fin.prompts.comparison_instructions import COMPARISON_PROMPT
+from apex_fin.prompts.comparison_instructions import COMPARISON_CARDS_PROMPT, COMPARISON_PROMPT, PEER_GROUP_PROMPT
 from apex_fin.config import settings
+from apex_fin.utils.metrics_card import MetricsCard, cards_table, metrics_card, peer_statistics
 from apex_fin.utils.prompt_loader import load_prompt
-from apex_fin.utils.yf_fetcher import YFinanceFinancialAnalyzer
+from apex_fin.utils.tokens import estimate_tokens
+from apex_fin.utils.yf_fetcher import fetch_financial_snapshot
 from apex_fin.agents.analysis_agent import AnalysisResponse
 
 import logging
@@ -34,13 +45,49 @@ def build_comparison_agent() -> Agent:
         show_tool_calls=False,
         instructions=instructions,
         markdown=True,
+        model_role="comparison",
+    )
+
+
+def build_card_comparison_agent() -> Agent:
+    """
+    Constructs the comparison agent working from metrics cards.
+
+    Returns
+    -------
+    Agent
+        Configured comparison agent for the map-reduce mode.
+    """
+    return create_agent(
+        show_tool_calls=False,
+        instructions=[COMPARISON_CARDS_PROMPT],
+        markdown=True,
+        model_role="comparison",
+    )
+
+
+def build_peer_group_agent() -> Agent:
+    """
+    Constructs the agent summarizing one group of a large peer set.
+
+    Returns
+    -------
+    Agent
+        Configured peer group agent.
+    """
+    return create_agent(
+        show_tool_calls=False,
+        instructions=[PEER_GROUP_PROMPT],
+        markdown=True,
+        model_role="comparison",
     )
 
 
 def _fetch_and_analyze_ticker_for_summary(
     ticker_to_analyze: str,
     analysis_agent_instance: Agent,
-    logger_instance: logging.Logger
+    logger_instance: logging.Logger,
+    snapshot: Optional[dict] = None,
 ) -> Optional[str]:
     """Fetches data, analyzes it, and returns a markdown summary.
 
@@ -57,6 +104,9 @@ def _fetch_and_analyze_ticker_for_summary(
         An instance of the analysis agent to perform the financial analysis.
     logger_instance : logging.Logger
         The logger instance for recording progress and errors.
+    snapshot : Optional[dict], optional
+        An already fetched financial snapshot of the ticker, analyzed
+        instead of fetching it again. Defaults to None.
 
     Returns
     -------
@@ -67,8 +117,7 @@ def _fetch_and_analyze_ticker_for_summary(
 
     input_json_for_agent: str
     try: 
-        analyzer = YFinanceFinancialAnalyzer(ticker_to_analyze)
-        data_dict = analyzer.get_financial_snapshot_dict()
+        data_dict = snapshot if snapshot is not None else fetch_financial_snapshot(ticker_to_analyze)
         input_json_for_agent = json.dumps(data_dict)
         logger_instance.info(f"Successfully pre-fetched data for {ticker_to_analyze}.")
     except Exception as e:
@@ -144,9 +193,118 @@ def _parse_ticker_input(
         return None, []
 
 
+def _comparison_mode(mode: Optional[str], company_count: int) -> str:
+    """Resolves `auto` to `cards` or `summaries` from the number of companies compared."""
+    mode = mode or settings.comparison.mode
+    if mode == "auto":
+        return "cards" if company_count >= settings.comparison.cards_min_companies else "summaries"
+    return mode
+
+
+def _metrics_card_for(ticker: str, snapshot: Optional[dict] = None) -> MetricsCard:
+    try:
+        card = metrics_card(snapshot if snapshot is not None else fetch_financial_snapshot(ticker))
+    except Exception as e:
+        logger.warning(f"No metrics card for {ticker}: {e}")
+        return MetricsCard(ticker=ticker, error=str(e))
+    return card if card.ticker else card.model_copy(update={"ticker": ticker})
+
+
+def _metrics_cards(tickers: List[str], snapshots: Optional[Dict[str, dict]] = None) -> List[MetricsCard]:
+    """Fetches the snapshots of `tickers` concurrently and computes their metrics cards (the map step).
+
+    Snapshots already fetched can be given in `snapshots`, by ticker.
+    """
+    snapshots = snapshots or {}
+    workers = max(min(len(tickers), settings.comparison.concurrency), 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apex-fin-cards") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _metrics_card_for, t, snapshots.get(t)) for t in tickers
+        ]
+        return [future.result() for future in futures]
+
+
+def _summarize_peer_group(primary: MetricsCard, group: List[MetricsCard]) -> str:
+    result: RunResponse = build_peer_group_agent().run(
+        f"Metrics Cards of {primary.ticker} (the Primary Company) and a group of its peers:\n\n"
+        + cards_table([primary, *group])
+    )
+    content = str(result.content).strip() if result.content else ""
+    return content or "No summary was returned for this group."
+
+
+def _reduce_peer_groups(primary: MetricsCard, groups: List[List[MetricsCard]]) -> List[str]:
+    """Summarizes each group of peers against the primary company, in parallel (the intermediate reduce step)."""
+    workers = max(min(len(groups), settings.comparison.concurrency), 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apex-fin-peer-groups") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _summarize_peer_group, primary, group) for group in groups
+        ]
+        return [future.result() for future in futures]
+
+
+def _compare_with_cards(
+    tickers: List[str], primary_summary: Optional[str] = None, primary_snapshot: Optional[dict] = None
+) -> str:
+    """Compares the first of `tickers` with the others from their metrics cards.
+
+    Parameters
+    ----------
+    tickers : List[str]
+        The primary company, then its peers, without duplicates.
+    primary_summary : Optional[str], optional
+        A markdown analysis summary of the primary company, added to the prompt.
+    primary_snapshot : Optional[dict], optional
+        An already fetched financial snapshot of the primary company.
+
+    Returns
+    -------
+    str
+        Markdown comparison report.
+
+    Raises
+    ------
+    ValueError
+        If no company's data could be fetched, or the agent returns nothing.
+    """
+    cards = _metrics_cards(tickers, {tickers[0]: primary_snapshot} if primary_snapshot is not None else None)
+    primary, peers = cards[0], [card for card in cards[1:] if not card.error]
+    if primary.error and not peers:
+        raise ValueError(f"Could not fetch data for {primary.ticker} or its competitors to perform a comparison.")
+
+    parts = [f"## Primary Company Summary ({primary.ticker})\n\n{primary_summary}"] if primary_summary else []
+    group_size = max(settings.comparison.group_size, 1)
+    if len(peers) > group_size:
+        groups = [peers[i : i + group_size] for i in range(0, len(peers), group_size)]
+        logger.info(f"Reducing {len(peers)} peers of {primary.ticker} in {len(groups)} groups.")
+        group_summaries = _reduce_peer_groups(primary, groups)
+        parts.append("## Metrics Cards\n\n" + cards_table([primary]))
+        parts.append(f"## Peer Set Statistics ({len(peers)} peers)\n\n" + peer_statistics(primary, peers))
+        parts += [
+            f"## Peer Group {i}: {', '.join(card.ticker for card in group)}\n\n{summary}"
+            for i, (group, summary) in enumerate(zip(groups, group_summaries), start=1)
+        ]
+    else:
+        parts.append("## Metrics Cards\n\n" + cards_table([primary, *peers]))
+    missing = [card.ticker for card in cards if card.error]
+    if missing:
+        parts.append(f"No data could be fetched for: {', '.join(missing)}.")
+
+    prompt = f"Compare {primary.ticker} (the Primary Company) with its peers:\n\n" + "\n\n".join(parts)
+    logger.info(
+        f"Comparing {primary.ticker} with {len(peers)} peers from metrics cards (~{estimate_tokens(prompt)} prompt tokens)."
+    )
+    final_result: RunResponse = build_card_comparison_agent().run(prompt)
+    if not final_result.content:
+        raise ValueError("Comparison agent returned no content.")
+    return str(final_result.content).strip()
+
+
 def compare_company(
     ticker_or_list_input: Union[str, List[str]],
     primary_company_analysis: Optional[AnalysisResponse] = None,
+    mode: Optional[str] = None,
+    primary_snapshot: Optional[dict] = None,
 ) -> str:
     """
     Compares a company to its top competitors.
@@ -162,11 +320,25 @@ def compare_company(
         Pre-computed AnalysisResponse object for the primary company.
         If provided, this avoids re-analyzing the primary company.
         Defaults to None.
+    mode : Optional[str], optional
+        `summaries` compares full analysis summaries (one analysis run per
+        company), `cards` compares metrics cards computed from the snapshots,
+        and `auto` picks `cards` from `comparison.cards_min_companies`
+        companies on. Defaults to `comparison.mode`.
+    primary_snapshot : Optional[dict], optional
+        An already fetched financial snapshot of the primary company, used
+        instead of fetching it again. Defaults to None.
 
     Returns
     -------
     str
-        Markdown comparison report, or an error message string if input is invalid.
+        Markdown comparison report.
+
+    Raises
+    ------
+    ValueError
+        If the input is invalid, no company could be analyzed, or the
+        comparison agent returns nothing.
     """
     primary_ticker_upper, competitor_list = _parse_ticker_input(ticker_or_list_input, logger)
 
@@ -174,8 +346,8 @@ def compare_company(
         # _parse_ticker_input already logged the specific error
         if not isinstance(ticker_or_list_input, (str, list)) or \
            (isinstance(ticker_or_list_input, list) and not ticker_or_list_input):
-            return "Error: An empty or invalid list of tickers was provided for comparison."
-        return "Error: Invalid input type for comparison. Provide a ticker string or a list of tickers."
+            raise ValueError("An empty or invalid list of tickers was provided for comparison.")
+        raise ValueError("Invalid input type for comparison. Provide a ticker string or a list of tickers.")
 
     logger.info(f"Starting comparison for primary ticker: {primary_ticker_upper}")
     if competitor_list:
@@ -183,6 +355,19 @@ def compare_company(
     else:
         logger.warning(f"No competitors found or provided for {primary_ticker_upper}. Comparison will be limited.")
 
+    companies = [primary_ticker_upper] + [
+        t for t in dict.fromkeys(c.upper() for c in competitor_list) if t != primary_ticker_upper
+    ]
+    if _comparison_mode(mode, len(companies)) == "cards":
+        primary_summary = None
+        if primary_company_analysis:
+            primary_summary = (
+                primary_company_analysis.markdown_summary
+                if isinstance(primary_company_analysis, AnalysisResponse)
+                else str(primary_company_analysis)
+            ).strip()
+        return _compare_with_cards(companies, primary_summary, primary_snapshot)
+
     analysis_agent_instance = build_auto_analysis_agent()
     summaries_map: Dict[str, Optional[str]] = {} # Value can be None if analysis fails
 
@@ -201,7 +386,7 @@ def compare_company(
     # Analyze primary company if its analysis wasn't provided in summaries_map
     if primary_ticker_upper not in summaries_map:
         summaries_map[primary_ticker_upper] = _fetch_and_analyze_ticker_for_summary(
-            primary_ticker_upper, analysis_agent_instance, logger
+            primary_ticker_upper, analysis_agent_instance, logger, snapshot=primary_snapshot
         )
         if summaries_map[primary_ticker_upper]:
             logger.info(f"Markdown summary for {primary_ticker_upper}:\n{summaries_map[primary_ticker_upper][:500]}...") # type: ignore
@@ -231,7 +416,7 @@ def compare_company(
     
     if not ordered_summaries:
         logger.error(f"No valid analysis summaries could be generated for {primary_ticker_upper} or its competitors.")
-        return f"Error: Could not generate analysis for {primary_ticker_upper} or its competitors to perform a comparison."
+        raise ValueError(f"Could not generate analysis for {primary_ticker_upper} or its competitors to perform a comparison.")
 
     comparison_agent = build_comparison_agent()
     # Ensure there's at least one summary to compare.
@@ -247,7 +432,9 @@ def compare_company(
     logger.debug(f"Comparison prompt being sent to LLM:\n{comparison_prompt_text}")
     final_result: RunResponse = comparison_agent.run(comparison_prompt_text)
 
-    return str(final_result.content).strip() if final_result.content else "Comparison agent returned no content."
+    if not final_result.content:
+        raise ValueError("Comparison agent returned no content.")
+    return str(final_result.content).strip()
 
 
 if __name__ == "__main__":
@@ -285,23 +472,13 @@ if __name__ == "__main__":
                 # The type: ignore is because Pylance/MyPy might struggle with the Union type in a loop
                 comparison_report = compare_company(input_val) # type: ignore 
 
-                if comparison_report:
-                    is_error_report = "Error:" in comparison_report or "Could not" in comparison_report
-                    if is_error_report:
-                         main_logger.error(
-                            f"Comparison for '{input_val}' returned an error/warning message: {comparison_report}"
-                        )
-                    else:
-                        main_logger.info(
-                            f"Comparison report for '{input_val}':\n{comparison_report[:1000]}..."
-                        )
-                    if test_case.get("expected_error") and not is_error_report:
-                        main_logger.warning(f"Test case '{test_case['name']}' expected an error but received a success-like report.")
-                else:
-                    main_logger.error(
-                        f"Failed to get comparison report for '{input_val}' (empty response)."
-                    )
-            except Exception as e_inner: # Catch exceptions from within compare_company if they are not handled
+                main_logger.info(f"Comparison report for '{input_val}':\n{comparison_report[:1000]}...")
+                if test_case.get("expected_error"):
+                    main_logger.warning(f"Test case '{test_case['name']}' expected an error but received a report.")
+            except ValueError as e_inner:  # compare_company raises ValueError when no comparison can be made
+                log = main_logger.info if test_case.get("expected_error") else main_logger.error
+                log(f"Comparison for '{input_val}' failed: {e_inner}")
+            except Exception as e_inner: # Catch unexpected exceptions from within compare_company
                  main_logger.error(f"Exception during test case '{test_case['name']}' with input '{input_val}': {e_inner}", exc_info=True)
             main_logger.info(f"--- Finished Test Case: {test_case['name']} ---\n")
 
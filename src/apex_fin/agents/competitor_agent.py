@@ -3,63 +3,212 @@ Competitor Agent that uses LLM + search tools to return 2–3 relevant competito
 for a given public company or ticker.
 """
 
-from typing import List
-import ast  # For safe literal evaluation
+import logging
+from typing import List, Optional, Set
 from agno.agent import Agent, RunResponse
-from agno.tools.duckduckgo import DuckDuckGoTools
+from pydantic import BaseModel, Field
 from apex_fin.agents.base import create_agent
+from apex_fin.utils.search_cache import CachedDuckDuckGoTools
+from apex_fin.utils.ticker_validation import validate_and_get_ticker
 
+logger = logging.getLogger(__name__)
 
-def build_competitor_agent() -> Agent:
+
+class Competitor(BaseModel):
+    """
+    A single public competitor identified by the competitor agent.
+
+    Attributes
+    ----------
+    ticker : str
+        The stock ticker as referenced on Yahoo Finance (e.g. "AMD", "005930.KS").
+    name : str
+        The company name.
+    exchange : str, optional
+        The exchange the ticker is listed on (e.g. "NASDAQ", "KRX").
+    confidence : float
+        The agent's confidence, between 0 and 1, that this is a direct
+        public competitor with a correct ticker.
+    """
+
+    ticker: str = Field(..., description="Official Yahoo Finance ticker symbol")
+    name: str = Field(..., description="Company name")
+    exchange: Optional[str] = Field(None, description="Listing exchange")
+    confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence between 0 and 1")
+
+
+class CompetitorList(BaseModel):
+    """
+    Structured response of the competitor agent.
+
+    Attributes
+    ----------
+    competitors : list[Competitor]
+        The direct public competitors, most relevant first.
+    """
+
+    competitors: list[Competitor] = Field(default_factory=list)
+
+
+def build_competitor_agent(use_search: bool = True) -> Agent:
     """
     Constructs an agent to find top public competitors for a given company.
 
+    Parameters
+    ----------
+    use_search : bool, optional
+        If True, the agent gets DuckDuckGo search tools. If False, the agent
+        answers in a single constrained call from its own knowledge, which
+        is enough for well-known companies. Defaults to True.
+
     Returns
     -------
     Agent
-        Configured LLM agent with web search capabilities.
+        Configured LLM agent returning a `CompetitorList`.
     """
+    instructions = [
+        "You are a financial analyst with access to a financial database and the internet."
+        if use_search
+        else "You are a financial analyst with broad knowledge of listed companies.",
+        "Given a stock ticker or company name, identify the top 2 direct public competitors.",
+        "Always return the corresponding official stock tickers as referenced on Yahoo Finance, with the listing exchange.",
+        "Set confidence close to 1 only when you are sure both the competitor and its ticker are correct.",
+        "Never include the queried company itself.",
+    ]
+    if not use_search:
+        instructions.append(
+            "If you do not know the company or its competitors well, return an empty list of competitors."
+        )
     return create_agent(
-        tools=[DuckDuckGoTools()],
-        instructions=[
-            "You are a financial analyst with access to a financial database and the internet.",
-            "Given a stock ticker or company name, identify the top 2 direct public competitors.",
-            "Only return a Python list of stock tickers or company names.",
-            "Always look for the corresponding official stock tickers as referenced on Yahoo Finance.",
-            "Format: list[str] such as ['AAPL', 'MSFT']. Do not explain or add commentary.",
-        ],
+        tools=[CachedDuckDuckGoTools()] if use_search else [],
+        instructions=instructions,
         markdown=False,
-        show_tool_calls=True,
+        show_tool_calls=use_search,
+        response_model=CompetitorList,
+        model_role="competitor",
+    )
+
+
+def _validate_competitors(
+    query: str, candidates: List[Competitor], min_confidence: float, excluded: Set[str]
+) -> List[str]:
+    """Keeps confident candidates whose ticker resolves on Yahoo Finance.
+
+    Parameters
+    ----------
+    query : str
+        The original stock ticker or company name, for logging.
+    candidates : List[Competitor]
+        The competitors returned by the agent.
+    min_confidence : float
+        Candidates below this confidence are dropped.
+    excluded : Set[str]
+        Upper-case tickers never returned, i.e. the company itself.
+
+    Returns
+    -------
+    List[str]
+        Resolved, de-duplicated competitor tickers in the agent's order.
+    """
+    validated: List[str] = []
+    for candidate in candidates:
+        if candidate.confidence < min_confidence:
+            logger.info(
+                f"Dropping competitor '{candidate.ticker}' for '{query}': confidence {candidate.confidence:.2f} < {min_confidence:.2f}."
+            )
+            continue
+        resolved = validate_and_get_ticker(candidate.ticker)
+        if not resolved:
+            logger.warning(f"Dropping competitor '{candidate.ticker}' for '{query}': ticker could not be resolved.")
+            continue
+        ticker = resolved[0].upper()
+        if ticker in excluded or ticker in validated:
+            continue
+        validated.append(ticker)
+    return validated
+
+
+def _run_competitor_agent(query: str, use_search: bool) -> List[Competitor]:
+    """Runs the competitor agent once and returns its structured candidates.
+
+    Parameters
+    ----------
+    query : str
+        Stock ticker or company name.
+    use_search : bool
+        Whether the agent may use DuckDuckGo search.
+
+    Returns
+    -------
+    List[Competitor]
+        The candidates, or an empty list if the agent did not return a
+        valid `CompetitorList`.
+    """
+    agent = build_competitor_agent(use_search=use_search)
+    try:
+        response: RunResponse = agent.run(query)
+    except Exception as e:
+        logger.error(f"Competitor agent failed for '{query}' (search={use_search}): {e}", exc_info=True)
+        return []
+    if isinstance(response.content, CompetitorList):
+        return response.content.competitors
+    logger.warning(
+        f"Competitor agent for '{query}' did not return a CompetitorList (got {type(response.content).__name__})."
     )
+    return []
 
 
-def get_competitors(query: str) -> List[str]:
+def get_competitors(
+    query: str,
+    allow_search: bool = True,
+    min_confidence: float = 0.6,
+    min_competitors: int = 2,
+) -> List[str]:
     """
     Queries the competitor agent to return related companies.
 
+    A single constrained call without search tools is tried first. The
+    search-enabled agent is only run when that call does not yield
+    `min_competitors` confident tickers that resolve on Yahoo Finance.
+
     Parameters
     ----------
     query : str
         Stock ticker or company name.
+    allow_search : bool, optional
+        If False, never fall back to the search-enabled agent. Defaults to True.
+    min_confidence : float, optional
+        Minimum confidence for a competitor to be kept. Defaults to 0.6.
+    min_competitors : int, optional
+        Number of validated competitors that makes the search fallback
+        unnecessary. Defaults to 2.
 
     Returns
     -------
     List[str]
-        List of competitor tickers or company names.
+        List of validated competitor tickers.
     """
-    agent = build_competitor_agent()
-    response: RunResponse = agent.run(query)
+    excluded = {query.strip().upper()}
+    # A company name is excluded through its ticker too ("Apple" -> "AAPL"); resolved once for both attempts.
+    resolved_query = validate_and_get_ticker(query)
+    if resolved_query:
+        excluded.add(resolved_query[0].upper())
+    competitors = _validate_competitors(
+        query, _run_competitor_agent(query, use_search=False), min_confidence, excluded
+    )
+    if len(competitors) >= min_competitors or not allow_search:
+        return competitors
 
-    try:
-        # Use ast.literal_eval for safety instead of eval()
-        evaluated_content = ast.literal_eval(response.content.strip())
-        return evaluated_content if isinstance(evaluated_content, list) else []
-    except (SyntaxError, ValueError, TypeError):
-        return []
+    logger.info(
+        f"Only {len(competitors)} validated competitor(s) for '{query}' without search. Retrying with search tools."
+    )
+    searched = _validate_competitors(
+        query, _run_competitor_agent(query, use_search=True), min_confidence, excluded
+    )
+    return searched + [ticker for ticker in competitors if ticker not in searched]
 
 
 if __name__ == "__main__":
-    import logging
     from apex_fin.config import settings
 
     if not logging.getLogger().hasHandlers():
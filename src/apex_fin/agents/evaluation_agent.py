@@ -1,10 +1,22 @@
-from agno.agent import Agent
+import logging
+from typing import Callable, Optional, Sequence, Union
+from agno.agent import Agent, RunResponse
 from agno.tools.thinking import ThinkingTools
 from pydantic import BaseModel, Field
-from apex_fin.prompts.evaluation_instructions import EVALUATION_PROMPT
+from apex_fin.prompts.evaluation_instructions import (
+    BATCH_EVALUATION_FORMAT,
+    BATCH_EVALUATION_PROMPT,
+    EVALUATION_PROMPT,
+)
 from apex_fin.agents.base import create_agent
 from apex_fin.config import settings
 from apex_fin.utils.prompt_loader import load_prompt
+from apex_fin.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Default token budget for the sections sent in a single batched evaluation call
+DEFAULT_BATCH_CONTEXT_TOKENS = 32_000
 
 
 class EvaluationFeedback(BaseModel):
@@ -40,6 +52,72 @@ class EvaluationFeedback(BaseModel):
     missing_elements: list[str]
 
 
+class FailedEvaluationFeedback(EvaluationFeedback):
+    """
+    Stands for the evaluation of a section that could not be evaluated.
+
+    Its score is the minimum and `needs_improvement` is False, so that it
+    neither passes nor triggers a revision; check for this type, or `error`,
+    before using the feedback.
+
+    Attributes
+    ----------
+    error : str
+        Why the section could not be evaluated.
+    """
+
+    score: int = Field(1, ge=1, le=5)
+    summary: str = "The section could not be evaluated."
+    needs_improvement: bool = False
+    missing_elements: list[str] = []
+    error: str
+
+
+class SectionToEvaluate(BaseModel):
+    """
+    A labelled piece of content submitted to a batched evaluation.
+
+    Attributes
+    ----------
+    label : str
+        What the content is, e.g. "company analysis" or "news".
+    content : str
+        The Markdown content to evaluate.
+    ticker : str, optional
+        The company the section covers, when evaluating several tickers at once.
+    """
+
+    label: str
+    content: str
+    ticker: Optional[str] = None
+
+
+class SectionEvaluationFeedback(EvaluationFeedback):
+    """
+    `EvaluationFeedback` tagged with the id of the section it evaluates.
+
+    Attributes
+    ----------
+    section_id : str
+        The id given to the section in the batched evaluation prompt.
+    """
+
+    section_id: str
+
+
+class BatchEvaluationFeedback(BaseModel):
+    """
+    Structured response of the batched evaluation agent.
+
+    Attributes
+    ----------
+    evaluations : list[SectionEvaluationFeedback]
+        One evaluation per submitted section.
+    """
+
+    evaluations: list[SectionEvaluationFeedback]
+
+
 def build_evaluation_agent() -> Agent:
     """
     Construct and configure an agent specialized in evaluating financial reports.
@@ -64,9 +142,188 @@ def build_evaluation_agent() -> Agent:
         response_model=EvaluationFeedback,
         markdown=False,
         show_tool_calls=True,
+        model_role="evaluation",
     )
 
 
+def build_batch_evaluation_agent() -> Agent:
+    """
+    Construct an agent that scores several labelled sections in one call.
+
+    Unlike `build_evaluation_agent`, this agent has no `ThinkingTools`, so a
+    batch is evaluated in a single structured model call. Its criteria are
+    the custom `prompts.evaluation` file when one is configured (otherwise
+    `BATCH_EVALUATION_PROMPT`), followed by `BATCH_EVALUATION_FORMAT`.
+
+    Returns
+    -------
+    Agent
+        An instance of `agno.agent.Agent` set to output a `BatchEvaluationFeedback`.
+    """
+    return create_agent(
+        description="Evaluates several investment report sections in one pass using a structured rubric.",
+        instructions=[load_prompt(settings.prompt_paths.evaluation, BATCH_EVALUATION_PROMPT), BATCH_EVALUATION_FORMAT],
+        response_model=BatchEvaluationFeedback,
+        markdown=False,
+        show_tool_calls=False,
+        model_role="evaluation",
+    )
+
+
+def _format_section(section_id: str, section: SectionToEvaluate) -> str:
+    """Renders one section with the header expected by `BATCH_EVALUATION_FORMAT`."""
+    ticker = f" ({section.ticker})" if section.ticker else ""
+    return f"### Section {section_id}: {section.label}{ticker}\n\n{section.content.strip()}"
+
+
+def _evaluate_single(
+    section: SectionToEvaluate, on_response: Optional[Callable[[RunResponse], None]] = None
+) -> EvaluationFeedback:
+    """Evaluates one section with the single-section evaluation agent.
+
+    Parameters
+    ----------
+    section : SectionToEvaluate
+        The section to evaluate.
+    on_response : Optional[Callable[[RunResponse], None]], optional
+        Called with the agent's response, e.g. to meter its tokens.
+
+    Returns
+    -------
+    EvaluationFeedback
+        The evaluation, or a `FailedEvaluationFeedback` if the agent fails or
+        does not return an `EvaluationFeedback`.
+    """
+    ticker = f" for {section.ticker}" if section.ticker else ""
+    prompt = f"""
+Evaluate the following {section.label}{ticker} for quality and completeness.
+
+### Content:
+{section.content}
+"""
+    try:
+        result = build_evaluation_agent().run(prompt)
+    except Exception as e:
+        logger.error(f"Evaluation of '{section.label}' failed: {e}", exc_info=True)
+        return FailedEvaluationFeedback(error=f"Evaluation failed: {e}")
+    if on_response is not None:
+        on_response(result)
+    if not isinstance(result.content, EvaluationFeedback):
+        logger.warning(f"Evaluation agent did not return EvaluationFeedback for '{section.label}'.")
+        return FailedEvaluationFeedback(error=f"Unexpected evaluation response: {type(result.content).__name__}.")
+    return result.content
+
+
+def _evaluate_batch(
+    batch: list[tuple[str, SectionToEvaluate]], on_response: Optional[Callable[[RunResponse], None]] = None
+) -> dict[str, EvaluationFeedback]:
+    """Evaluates a batch of sections with one structured call.
+
+    Parameters
+    ----------
+    batch : list[tuple[str, SectionToEvaluate]]
+        (section_id, section) pairs.
+    on_response : Optional[Callable[[RunResponse], None]], optional
+        Called with the agent's response, e.g. to meter its tokens.
+
+    Returns
+    -------
+    dict[str, EvaluationFeedback]
+        Evaluations by section id, with a `FailedEvaluationFeedback` for the
+        sections the agent skipped, or all of them if the call failed.
+    """
+    prompt = "Evaluate each of the following sections.\n\n" + "\n\n".join(
+        _format_section(section_id, section) for section_id, section in batch
+    )
+    try:
+        result = build_batch_evaluation_agent().run(prompt)
+    except Exception as e:
+        logger.error(f"Batched evaluation of {len(batch)} sections failed: {e}", exc_info=True)
+        return {section_id: FailedEvaluationFeedback(error=f"Batched evaluation failed: {e}") for section_id, _ in batch}
+    if on_response is not None:
+        on_response(result)
+    evaluations: dict[str, EvaluationFeedback] = {}
+    if isinstance(result.content, BatchEvaluationFeedback):
+        evaluations = {
+            evaluation.section_id.strip(): EvaluationFeedback(**evaluation.model_dump(exclude={"section_id"}))
+            for evaluation in result.content.evaluations
+        }
+    else:
+        logger.warning(
+            f"Batched evaluation did not return BatchEvaluationFeedback (got {type(result.content).__name__})."
+        )
+    for section_id, section in batch:
+        if section_id not in evaluations:
+            logger.warning(f"Section '{section.label}' ({section_id}) missing from the batched evaluation.")
+            evaluations[section_id] = FailedEvaluationFeedback(error="Missing from the batched evaluation response.")
+    return evaluations
+
+
+def evaluate_sections(
+    sections: Sequence[Union[SectionToEvaluate, tuple[str, str]]],
+    context_budget_tokens: int = DEFAULT_BATCH_CONTEXT_TOKENS,
+    on_response: Optional[Callable[[RunResponse], None]] = None,
+) -> list[EvaluationFeedback]:
+    """
+    Evaluate several labelled sections, possibly from several tickers, in as few calls as possible.
+
+    Sections are packed in order into batches whose estimated size fits
+    `context_budget_tokens`; each batch is scored with one structured call.
+    A section is evaluated on its own (with the single-section agent) only
+    when it does not fit in a batch by itself. Sections whose evaluation
+    fails, or that the batched response omits, get a
+    `FailedEvaluationFeedback`: one failure never discards the others'
+    evaluations.
+
+    Parameters
+    ----------
+    sections : Sequence[SectionToEvaluate | tuple[str, str]]
+        The sections to evaluate, as `SectionToEvaluate` objects or
+        (label, content) tuples.
+    context_budget_tokens : int, optional
+        Estimated token budget for the sections of one batched call.
+        Defaults to `DEFAULT_BATCH_CONTEXT_TOKENS`.
+    on_response : Optional[Callable[[RunResponse], None]], optional
+        Called with each agent response, e.g. to meter the tokens used.
+
+    Returns
+    -------
+    list[EvaluationFeedback]
+        One evaluation per section, in the input order.
+    """
+    indexed = [
+        (f"S{i}", s if isinstance(s, SectionToEvaluate) else SectionToEvaluate(label=s[0], content=s[1]))
+        for i, s in enumerate(sections, start=1)
+    ]
+
+    batches: list[list[tuple[str, SectionToEvaluate]]] = []
+    oversized: list[tuple[str, SectionToEvaluate]] = []
+    current: list[tuple[str, SectionToEvaluate]] = []
+    current_tokens = 0
+    for section_id, section in indexed:
+        section_tokens = estimate_tokens(_format_section(section_id, section))
+        if section_tokens > context_budget_tokens:
+            oversized.append((section_id, section))
+            continue
+        if current and current_tokens + section_tokens > context_budget_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((section_id, section))
+        current_tokens += section_tokens
+    if current:
+        batches.append(current)
+
+    feedback_by_id: dict[str, EvaluationFeedback] = {}
+    for batch in batches:
+        logger.info(f"Evaluating {len(batch)} section(s) in one batched call.")
+        feedback_by_id.update(_evaluate_batch(batch, on_response))
+    for section_id, section in oversized:
+        logger.info(f"Section '{section.label}' exceeds the batch context budget; evaluating it separately.")
+        feedback_by_id[section_id] = _evaluate_single(section, on_response)
+
+    return [feedback_by_id[section_id] for section_id, _ in indexed]
+
+
 if __name__ == "__main__":
     import logging
 
@@ -1,102 +1,468 @@
+import contextvars
+import json
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional
 from agno.agent import Agent
 from agno.team import Team
+from pydantic import BaseModel, Field
+from apex_fin.archive import fundamentals_hash, get_report_archive, section_fingerprint
 from apex_fin.config import settings
 from apex_fin.agents.analysis_agent import build_auto_analysis_agent, _fetch_financial_data_for_agent
 from apex_fin.agents.comparison_agent import compare_company
+from apex_fin.agents.competitor_agent import get_competitors
 from apex_fin.agents.thinking_agent import build_thinking_agent
 from apex_fin.agents.news_agent import get_financial_news
 from apex_fin.agents.base import create_agent
+from apex_fin.templates.renderer import render_report
+from apex_fin.utils.deadline import Deadline, DeadlineExceeded, SectionBudgets, run_with_deadline
+from apex_fin.utils.search_cache import evidence_pool
+from apex_fin.utils.singleflight import SingleFlight
 from apex_fin.utils.ticker_validation import validate_and_get_ticker
+from apex_fin.utils.yf_fetcher import fetch_financial_snapshot
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def build_full_report(ticker: str) -> str:
+def build_full_report(
+    ticker: str,
+    deadline_seconds: Optional[float] = None,
+    on_section: Optional[Callable[[str, str], None]] = None,
+    reuse_sections: Optional[bool] = None,
+    snapshot: Optional[dict[str, Any]] = None,
+    deadline: Optional[Deadline] = None,
+) -> str:
     """
     Generate a complete financial report using all relevant agents.
 
     Configuration from `settings` determines:
       - Whether to include contextual risk assessment
-      - Whether to polish the final report
+      - Whether to polish the final report, or to render it with the
+        Markdown template without any LLM call (`report.use_template`)
+      - The report deadline (`report.deadline_seconds`) and how it is split
+        between sections (`report.section_weights`)
+
+    All web searches made while building the report share one evidence
+    pool, so overlapping queries from the news, competitor and risk
+    agents hit the network at most once.
+
+    Sections whose inputs are unchanged since an earlier report are reused
+    from the report archive (`archive.sections`), so only the sections whose
+    fingerprint changed are generated and polished again.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker symbol or company name to report on.
+    deadline_seconds : Optional[float], optional
+        Overrides `report.deadline_seconds` for this report. None uses the
+        configured value; no deadline is applied if neither is set.
+    on_section : Optional[Callable[[str, str], None]], optional
+        Called with the name and content of each section as soon as it is
+        ready, e.g. to stream progress before the report is assembled.
+    reuse_sections : Optional[bool], optional
+        Overrides `archive.sections` for this report. False generates every
+        section, without reusing or storing any.
+    snapshot : Optional[dict[str, Any]], optional
+        An already fetched financial snapshot of the ticker, which the
+        analysis is fingerprinted and written from instead of fetching it
+        again. Defaults to None.
+    deadline : Optional[Deadline], optional
+        An already running report deadline, e.g. the one `snapshot` was
+        fetched under. Overrides `deadline_seconds`. Defaults to None.
 
     Returns
     -------
     str
-        The final Markdown-formatted investment report.
+        The final Markdown-formatted investment report. Sections that overran
+        their budget are replaced by the last version generated in this
+        process, or by a clearly marked placeholder.
     """
-    
-    ticker, company_name = validate_and_get_ticker(ticker)
-    
-    analysis_agent = build_auto_analysis_agent()
-    # The comparison_agent is built and used within the compare_company function
-    thinking_agent = build_thinking_agent(ticker)
-    polishing_agent = (
-        _build_polishing_agent() if settings.report_enable_polishing else None
-    )
+    if deadline is None:
+        deadline = Deadline(settings.report_deadline_seconds if deadline_seconds is None else deadline_seconds)
+    if reuse_sections is None:
+        reuse_sections = settings.archive.sections
+    with evidence_pool():
+        return _build_full_report(ticker, deadline, on_section, reuse_sections, snapshot)
+
+
+def report_budgets(deadline: Deadline) -> SectionBudgets:
+    """Splits a report deadline between the sections the configuration includes, by `report.section_weights`."""
+    planned_sections = ["analysis", "comparison"]
+    if settings.report_include_context:
+        planned_sections.append("context")
+    if settings.report_include_news:
+        planned_sections.append("news")
+    if settings.report_enable_polishing and not settings.report_use_template:
+        planned_sections.append("polishing")
+    weights = settings.report_section_weights
+    return SectionBudgets(deadline, {name: weights.get(name, 1.0) for name in planned_sections})
+
+
+def _build_full_report(
+    ticker: str,
+    deadline: Deadline,
+    on_section: Optional[Callable[[str, str], None]] = None,
+    reuse_sections: bool = False,
+    snapshot: Optional[dict[str, Any]] = None,
+) -> str:
+    """Builds the full report; see `build_full_report`."""
+    budgets = report_budgets(deadline)
+    # Resolving the ticker and fetching its snapshot are done for the analysis, within its share of the deadline.
+    ticker, company_name = run_with_deadline(budgets.share("analysis"), validate_and_get_ticker, ticker)
+    store = _SectionStore(ticker, reuse_sections)
+
+    def _section(
+        section: str,
+        inputs: Optional[dict[str, Any]],
+        generate: Callable[..., str],
+        *args: Any,
+        section_deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> tuple[str, bool]:
+        fingerprint = store.fingerprint(section, inputs) if inputs is not None else None
+        section_deadline = section_deadline or budgets.start(section)
+        content, complete = _run_section(
+            ticker, section, section_deadline, store, fingerprint, generate, *args, **kwargs
+        )
+        if on_section is not None:
+            on_section(section, content)
+        return content, complete
 
     try:
-        logger.info(f"Full Report: Fetching financial data for analysis section for {ticker}...")
-        input_json_for_analysis = _fetch_financial_data_for_agent(ticker, logger)
-
-        # Check if pre-fetch returned an error payload
-        if '"error":' in input_json_for_analysis and "Data pre-fetch failed" in input_json_for_analysis:
-            error_msg = f"Data pre-fetch failed for '{ticker}' during full report generation. Details: {input_json_for_analysis}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
-
-        logger.info(f"Full Report: Running analysis agent for {ticker} with pre-fetched data...")
-        analysis_run_response = analysis_agent.run(input_json_for_analysis)
-        
-        section_analysis: str
-        if hasattr(analysis_run_response, "content") and analysis_run_response.content:
-            section_analysis = str(analysis_run_response.content).strip()
+        if snapshot is None:
+            snapshot = _fetch_snapshot(ticker, budgets.share("analysis"))
+        if snapshot is not None:
+            # The snapshot fingerprinted is the one the analysis is written from, and the template's.
+            section_analysis, analysis_complete = _section(
+                "analysis", {"snapshot": fundamentals_hash(snapshot)}, _generate_analysis_section, ticker, snapshot
+            )
         else:
-            error_msg = f"Analysis agent returned no content or empty content for {ticker} in full report. Response: {analysis_run_response}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
-        
-        if not section_analysis or len(section_analysis) < 20: # Threshold for meaningful summary
-            error_msg = f"Analysis agent returned an empty or insufficient summary for {ticker} in full report. Summary: '{section_analysis[:100]}...'"
-            logger.warning(error_msg) # Log as warning, but raise to stop potentially poor report
-            raise ValueError(error_msg)
-        logger.info(f"Full Report: Successfully generated analysis section for {ticker}.")
-
-        section_comparison = compare_company(
-            ticker_or_list_input=ticker, 
-            primary_company_analysis=section_analysis # Pass the generated markdown summary
+            section_analysis, analysis_complete = _section("analysis", None, _generate_analysis_section, ticker)
+
+        # Without a finished analysis, the comparison and risk sections compute their own summary,
+        # from inputs that are not fingerprinted, so they are regenerated.
+        primary_analysis = section_analysis if analysis_complete else None
+        # The peer lookup is charged to the comparison's budget.
+        comparison_deadline = budgets.start("comparison")
+        peers = store.peers(comparison_deadline)
+        section_comparison, _ = _section(
+            "comparison",
+            {
+                "analysis": primary_analysis,
+                "peers": peers,
+                "settings": settings.comparison.model_dump(exclude={"concurrency"}),
+            }
+            if peers and primary_analysis
+            else None,
+            compare_company,
+            ticker_or_list_input=[ticker, *peers] if peers else ticker,
+            primary_company_analysis=primary_analysis,
+            section_deadline=comparison_deadline,
         )
 
         section_context = ""
         if settings.report_include_context:
-            section_context = _run_agent(
-                thinking_agent,
-                f"Generate a comprehensive risk assessment report for {ticker}.",
+            section_context, _ = _section(
+                "context",
+                {"ticker": ticker, "analysis": primary_analysis, "risk": settings.user.risk.model_dump()}
+                if primary_analysis
+                else None,
+                _generate_context_section,
+                ticker,
+                primary_analysis,
             )
-            
+
         section_news = ""
         if settings.report_include_news:
-             section_news = get_financial_news(ticker)
+            section_news, _ = _section("news", {"ticker": ticker}, get_financial_news, ticker)
 
-        raw_report = _assemble_raw_report(
+        sections = _report_sections(
             analysis=section_analysis,
             comparison=section_comparison,
             context=section_context,
             news=section_news,
         )
+        if settings.report_use_template:
+            return render_report(
+                ticker=ticker,
+                company_name=company_name,
+                analysis=section_analysis,
+                comparison=section_comparison,
+                context=section_context,
+                news=section_news,
+                snapshot=snapshot or {},
+            )
 
-        return (
-            _polish_report(polishing_agent, raw_report)
-            if polishing_agent
-            else raw_report
-        )
+        raw_report = _join_sections(sections)
+        if not settings.report_enable_polishing:
+            return raw_report
+        polishing_deadline = budgets.start("polishing")
+        try:
+            return run_with_deadline(polishing_deadline, _polish_report, sections, store)
+        except DeadlineExceeded:
+            logger.warning(f"Polishing of the report for {ticker} ran out of time; returning the raw report.")
+            return f"{_RAW_REPORT_HEADING}\n\n{raw_report}"
 
     except Exception as e:
         logger.error(f"Failed to generate report for {ticker}: {e}")
         raise
 
 
+# Headings and notices added to a report when a section failed or overran its budget, or the polishing did
+_RAW_REPORT_HEADING = "# Full Financial Report (Raw)"
+_CACHED_SECTION_NOTICE = "> **Note:** this section could not be regenerated"
+_UNAVAILABLE_SECTION_NOTICE = "> **Section unavailable:**"
+
+
+def report_is_complete(report: str) -> bool:
+    """Whether every section of a full report was generated, and polished, within its budget."""
+    return not any(
+        marker in report for marker in (_RAW_REPORT_HEADING, _CACHED_SECTION_NOTICE, _UNAVAILABLE_SECTION_NOTICE)
+    )
+
+
+# Last complete version of each (ticker, section), used when a later run fails or overruns its budget.
+# The least recently generated entries are dropped beyond _LAST_GOOD_SECTIONS_MAX.
+_LAST_GOOD_SECTIONS_MAX = 256
+_last_good_sections: OrderedDict[tuple[str, str], tuple[datetime, str]] = OrderedDict()
+_last_good_sections_lock = threading.Lock()
+
+# Reports built at the same time for the same ticker share each section's generation.
+_section_flights = SingleFlight("report sections")
+
+
+class _SectionStore:
+    """
+    Reuse of the report sections stored in the report archive, for one report.
+
+    Each section is stored under a fingerprint of its inputs (see
+    `apex_fin.archive.section_fingerprint`). Storage errors are logged and
+    the section is generated as if nothing was stored.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker the report is about.
+    enabled : bool
+        Whether sections are reused and stored. When False, every method
+        behaves as if nothing was stored.
+    """
+
+    def __init__(self, ticker: str, enabled: bool):
+        self.ticker = ticker
+        self.enabled = enabled
+
+    def fingerprint(self, section: str, inputs: dict[str, Any]) -> Optional[str]:
+        """Fingerprint of `section` with these inputs, or None if sections are not reused."""
+        if not self.enabled:
+            return None
+        try:
+            return section_fingerprint(section, inputs)
+        except Exception as e:
+            logger.warning(f"Could not fingerprint the {section} section for {self.ticker}, regenerating it: {e}")
+            return None
+
+    def reuse_or_generate(
+        self, section: str, fingerprint: Optional[str], generate: Callable[..., str], *args: Any, **kwargs: Any
+    ) -> str:
+        """Returns the stored section with this fingerprint, or generates and stores it.
+
+        Only sections generated successfully are stored: the exceptions of
+        `generate`, and error messages it returns, are raised to the caller.
+        """
+        if fingerprint is None:
+            return generate(*args, **kwargs)
+        try:
+            stored = get_report_archive().get_section(fingerprint)
+        except Exception as e:
+            logger.warning(f"Section store lookup failed for the {section} section of {self.ticker}: {e}")
+            stored = None
+        if stored is not None:
+            logger.info(f"Inputs of the {section} section for {self.ticker} are unchanged; reusing the stored version.")
+            return stored
+        content = generate(*args, **kwargs)
+        # Generators raise on failure; an error message returned instead must not be reused either.
+        if content.lstrip().startswith("Error:"):
+            raise ValueError(content.strip())
+        try:
+            get_report_archive().put_section(fingerprint, self.ticker, section, content)
+        except Exception as e:
+            logger.warning(f"Could not store the {section} section of {self.ticker}: {e}")
+        return content
+
+    def peers(self, deadline: Deadline) -> Optional[list[str]]:
+        """The competitors of the ticker, reused within the comparison's refresh period.
+
+        Returns None if sections are not reused, or if no competitor is found
+        before `deadline`; the comparison then looks them up itself.
+        """
+        fingerprint = self.fingerprint("peers", {"ticker": self.ticker})
+        if fingerprint is None:
+            return None
+        try:
+            peers = run_with_deadline(deadline, self.reuse_or_generate, "peers", fingerprint, _find_peers, self.ticker)
+        except Exception as e:
+            logger.warning(f"Could not resolve the peers of {self.ticker} before the comparison: {e}")
+            return None
+        return json.loads(peers)
+
+
+def _fetch_snapshot(ticker: str, deadline: Deadline) -> Optional[dict[str, Any]]:
+    """Fetches the financial snapshot a report's analysis is fingerprinted and written from, and its template shows.
+
+    Returns None if the fetch fails or does not finish before `deadline`;
+    the analysis section then fetches the data itself, as usual.
+    """
+    try:
+        return run_with_deadline(deadline, fetch_financial_snapshot, ticker)
+    except Exception as e:
+        logger.warning(f"Could not fetch the snapshot of {ticker} before its analysis: {e}")
+        return None
+
+
+def _find_peers(ticker: str) -> str:
+    """Looks up the competitors of `ticker`, as a JSON list. An empty result is an error, so that it is not stored."""
+    peers = get_competitors(ticker)
+    if not peers:
+        raise ValueError(f"no competitor found for {ticker}")
+    return json.dumps(peers)
+
+
+def _run_section(
+    ticker: str,
+    section: str,
+    section_deadline: Deadline,
+    store: _SectionStore,
+    fingerprint: Optional[str],
+    generate: Callable[..., str],
+    *args: Any,
+    **kwargs: Any,
+) -> tuple[str, bool]:
+    """Runs one report section under its share of the report deadline.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker the report is about.
+    section : str
+        The section name, as used in `report.section_weights`.
+    section_deadline : Deadline
+        The section's share of the report deadline (see `SectionBudgets.start`).
+    store : _SectionStore
+        The stored sections of the report.
+    fingerprint : Optional[str]
+        Fingerprint of the section's inputs. A stored section with the same
+        fingerprint is returned without calling `generate`. None always
+        generates the section.
+    generate : Callable[..., str]
+        The function producing the section's Markdown, raising on failure.
+        A failed section other than the analysis is replaced, like one that
+        overruns its budget.
+    *args, **kwargs
+        Arguments for `generate`.
+
+    Returns
+    -------
+    tuple[str, bool]
+        The section content, and whether it was generated or reused in this
+        run (False when a fallback version or a placeholder is returned).
+    """
+    # Sections with the same inputs are interchangeable: concurrent reports share one generation.
+    flight_key = (ticker, section, fingerprint or json.dumps([args, kwargs], sort_keys=True, default=str))
+    try:
+        content = run_with_deadline(
+            section_deadline,
+            _section_flights.do,
+            flight_key,
+            store.reuse_or_generate,
+            section,
+            fingerprint,
+            generate,
+            *args,
+            **kwargs,
+        )
+    except DeadlineExceeded:
+        return _fallback_section(ticker, section, f"over its {section_deadline.seconds:.0f}s time budget")
+    except Exception as e:
+        # Without an analysis, the report is not worth writing.
+        if section == "analysis":
+            raise
+        logger.error(f"Section '{section}' for {ticker} failed: {e}")
+        return _fallback_section(ticker, section, f"error: {e}")
+    with _last_good_sections_lock:
+        _last_good_sections[(ticker, section)] = (datetime.now(timezone.utc), content)
+        _last_good_sections.move_to_end((ticker, section))
+        while len(_last_good_sections) > _LAST_GOOD_SECTIONS_MAX:
+            _last_good_sections.popitem(last=False)
+    return content, True
+
+
+def _fallback_section(ticker: str, section: str, reason: str) -> tuple[str, bool]:
+    """The last good version of a section that could not be generated, or a placeholder, marked as such."""
+    with _last_good_sections_lock:
+        cached = _last_good_sections.get((ticker, section))
+    if cached is not None:
+        generated_at, cached_content = cached
+        logger.warning(
+            f"Section '{section}' for {ticker} could not be generated ({reason}); "
+            f"using the version from {generated_at:%Y-%m-%d %H:%M} UTC."
+        )
+        notice = (
+            f"{_CACHED_SECTION_NOTICE} ({reason}). "
+            f"It shows the version generated on {generated_at:%Y-%m-%d %H:%M} UTC."
+        )
+        return f"{notice}\n\n{cached_content}", False
+    logger.warning(f"Section '{section}' for {ticker} could not be generated ({reason}) and no earlier version is available.")
+    return f"{_UNAVAILABLE_SECTION_NOTICE} the {section} section could not be generated ({reason}).", False
+
+
+def _generate_analysis_section(ticker: str, snapshot: Optional[dict[str, Any]] = None) -> str:
+    """Writes the company analysis section of `ticker` from `snapshot`, fetching the financial data if it is None."""
+    if snapshot is not None:
+        input_json_for_analysis = json.dumps(snapshot)
+    else:
+        logger.info(f"Full Report: Fetching financial data for analysis section for {ticker}...")
+        input_json_for_analysis = _fetch_financial_data_for_agent(ticker, logger)
+
+    # Check if pre-fetch returned an error payload
+    if '"error":' in input_json_for_analysis and "Data pre-fetch failed" in input_json_for_analysis:
+        error_msg = f"Data pre-fetch failed for '{ticker}' during full report generation. Details: {input_json_for_analysis}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    logger.info(f"Full Report: Running analysis agent for {ticker} with pre-fetched data...")
+    analysis_run_response = build_auto_analysis_agent().run(input_json_for_analysis)
+
+    section_analysis: str
+    if hasattr(analysis_run_response, "content") and analysis_run_response.content:
+        section_analysis = str(analysis_run_response.content).strip()
+    else:
+        error_msg = f"Analysis agent returned no content or empty content for {ticker} in full report. Response: {analysis_run_response}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    if not section_analysis or len(section_analysis) < 20: # Threshold for meaningful summary
+        error_msg = f"Analysis agent returned an empty or insufficient summary for {ticker} in full report. Summary: '{section_analysis[:100]}...'"
+        logger.warning(error_msg) # Log as warning, but raise to stop potentially poor report
+        raise ValueError(error_msg)
+    logger.info(f"Full Report: Successfully generated analysis section for {ticker}.")
+    return section_analysis
+
+
+def _generate_context_section(ticker: str, financial_summary: Optional[str]) -> str:
+    """Runs the risk assessment team, reusing the analysis section as its financial summary."""
+    thinking_agent = build_thinking_agent(ticker, precomputed_financial_summary=financial_summary)
+    return _run_agent(
+        thinking_agent,
+        f"Generate a comprehensive risk assessment report for {ticker}.",
+    )
+
+
 def _run_agent(agent: Agent | Team, prompt: str) -> str:
     """Executes an agent or team with a given prompt and returns its content.
 
@@ -126,6 +492,21 @@ def _run_agent(agent: Agent | Team, prompt: str) -> str:
     return content
 
 
+def _report_sections(analysis: str, comparison: str, context: str = "", news: str = "") -> list[tuple[str, str]]:
+    """Returns the (title, Markdown body) pairs of the report, in display order, skipping empty sections."""
+    sections = [("Company Analysis", analysis), ("Competitor Comparison", comparison)]
+    if news:
+        sections.append(("Financial News", news))
+    if context:
+        sections.append(("Contextual Considerations", context))
+    return sections
+
+
+def _join_sections(sections: list[tuple[str, str]]) -> str:
+    """Renders (title, body) pairs as level-2 Markdown sections."""
+    return "\n\n".join(f"## {title}\n\n{body}" for title, body in sections).strip()
+
+
 def _assemble_raw_report(analysis: str, comparison: str, context: str = "", news: str = "") -> str:
     """Combines individual report sections into a raw Markdown report.
 
@@ -145,76 +526,177 @@ def _assemble_raw_report(analysis: str, comparison: str, context: str = "", news
     str
         The assembled raw Markdown report.
     """
-    report = f"""## Company Analysis
+    return _join_sections(_report_sections(analysis, comparison, context, news))
 
-{analysis}
 
-## Competitor Comparison
+class SectionTransition(BaseModel):
+    section: str = Field(..., description="Title of the section this transition introduces, exactly as given.")
+    text: str = Field(..., description="One or two sentences linking the previous section to this one.")
 
-{comparison}
-"""
-    if news:
-        report += f"\n## Financial News\n\n{news}"
-        
-    if context:
-        report += f"\n## Contextual Considerations\n\n{context}"
 
-    return report.strip()
+class ReportConclusion(BaseModel):
+    transitions: List[SectionTransition] = Field(
+        default_factory=list,
+        description="A short lead-in for each section after the first, in report order.",
+    )
+    final_recommendation: str = Field(
+        ...,
+        description="Markdown body of the '## Final Recommendation' section, without the heading.",
+    )
+
+
+_POLISHING_INSTRUCTIONS = [
+    "You are a financial editor refining one section of a multi-section financial report.",
+    "Improve structure, flow, and clarity. Remove redundancies and ensure best practices Markdown formatting.",
+    "Keep every figure, fact and conclusion of the section. Do not add information that is not in the section.",
+    "Do not repeat the section title and do not add a recommendation or conclusion for the whole report; other editors handle those.",
+    "Respond with only the polished Markdown body of the section, not internal thoughts or comments.",
+]
+
+_CONCLUSION_INSTRUCTIONS = [
+    "You are a financial editor finishing a multi-section investment report whose sections are already written.",
+    "Write a short transition introducing each section after the first, so the report reads as one document.",
+    "Write the body of a '## Final Recommendation' section based on all sections: an overall view, the main supporting arguments and the key risks.",
+    "Base everything strictly on the sections provided. Do not rewrite the sections themselves.",
+]
 
 
 def _build_polishing_agent() -> Agent:
-    """Constructs an agent for refining and polishing a Markdown report.
+    """Constructs an agent for refining and polishing one section of a Markdown report.
 
     Returns
     -------
     Agent
         A configured agent tasked with improving the structure, flow,
-        and formatting of a financial report.
+        and formatting of a single report section.
+    """
+    return create_agent(
+        instructions=_POLISHING_INSTRUCTIONS,
+        markdown=True,
+        show_tool_calls=False,
+        model_role="polishing",
+    )
+
+
+def _build_conclusion_agent() -> Agent:
+    """Constructs an agent that writes the final recommendation and the transitions between sections.
+
+    Returns
+    -------
+    Agent
+        A configured agent returning a `ReportConclusion`.
     """
     return create_agent(
-        instructions=[
-            "You are a financial editor tasked with refining a multi-section financial report.",
-            "Improve structure, flow, and clarity. Remove redundancies and ensure best practices Markdown formatting.",
-            "The report will contain sections such as: '## Company Analysis', '## Competitor Comparison', '## Financial News', and '## Contextual Considerations' (if provided). Ensure these sections are well-integrated.",
-            "Add a final section '## Final Recommendation' based on all inputs.",
-            "Respond with only the polished Markdown output, not internal thoughts or comments.",
-        ],
+        instructions=_CONCLUSION_INSTRUCTIONS,
         markdown=True,
         show_tool_calls=False,
+        response_model=ReportConclusion,
+        model_role="polishing",
+    )
+
+
+def _polish_section(title: str, body: str, store: Optional[_SectionStore] = None) -> str:
+    """Polishes the body of one section, returning it unchanged if polishing fails.
+
+    With a `store`, a section polished earlier from the same raw text is reused.
+    """
+    # Fallback versions are kept as is, so that their notice still marks the report as incomplete.
+    if body.startswith((_CACHED_SECTION_NOTICE, _UNAVAILABLE_SECTION_NOTICE)):
+        return body
+    fingerprint = (
+        store.fingerprint("polishing", {"title": title, "body": body, "instructions": _POLISHING_INSTRUCTIONS})
+        if store is not None
+        else None
+    )
+    try:
+        if store is not None:
+            return store.reuse_or_generate("polishing", fingerprint, _generate_polished_section, title, body)
+        return _generate_polished_section(title, body)
+    except Exception as e:
+        logger.warning(f"Polishing of section '{title}' failed, keeping the raw section. Error: {e}")
+        return body
+
+
+def _generate_polished_section(title: str, body: str) -> str:
+    """Runs the polishing agent on one section body."""
+    prompt = f"""Please polish the following '{title}' section of a financial report.
+
+Section:
+---
+{body}
+---
+"""
+    polished = _run_agent(_build_polishing_agent(), prompt)
+    # The title is added back when assembling; drop it if the model repeated it anyway.
+    first_line, _, rest = polished.partition("\n")
+    if first_line.lstrip("#").strip().lower() == title.lower():
+        polished = rest.strip()
+    return polished or body
+
+
+def _generate_conclusion(sections_text: str) -> str:
+    """Runs the conclusion agent on the polished sections, returning its `ReportConclusion` as JSON."""
+    response = _build_conclusion_agent().run(
+        f"Write the transitions and the final recommendation for this report.\n\nReport:\n---\n{sections_text}\n---"
     )
+    if not isinstance(response.content, ReportConclusion):
+        raise ValueError(f"Conclusion agent returned an unexpected response: {str(response.content)[:200]}")
+    return response.content.model_dump_json()
 
 
-def _polish_report(polishing_agent: Agent, raw_report: str) -> str:
-    """Uses a polishing agent to refine a raw Markdown report.
+def _polish_report(sections: list[tuple[str, str]], store: Optional[_SectionStore] = None) -> str:
+    """Polishes each section in parallel, then writes the transitions and the final recommendation.
 
-    The agent aims to improve layout, narrative flow, and overall presentation.
-    If polishing fails, the raw report is returned with a warning.
+    Each section is polished by its own LLM call, so the time taken follows
+    the largest section rather than the whole report, and no call has to
+    regenerate the other sections. A final call, with a structured and short
+    output, adds the transitions and the `## Final Recommendation` section.
 
     Parameters
     ----------
-    polishing_agent : Agent
-        The agent configured for polishing reports.
-    raw_report : str
-        The raw Markdown report content to be polished.
+    sections : list[tuple[str, str]]
+        The (title, Markdown body) pairs of the raw report, in display order.
+    store : Optional[_SectionStore], optional
+        The stored sections of the report. Polished sections and the
+        conclusion are reused when their input text is unchanged, so only
+        regenerated sections are polished again.
 
     Returns
     -------
     str
-        The polished Markdown report, or the raw report if polishing fails.
+        The polished Markdown report. Sections whose polishing fails are kept
+        as is; if the final call fails, the report has no recommendation.
     """
+    with ThreadPoolExecutor(max_workers=max(len(sections), 1), thread_name_prefix="apex-fin-polish") as executor:
+        # Each task runs in a copy of the caller's context, to keep the deadline and evidence pool.
+        futures = [
+            executor.submit(contextvars.copy_context().run, _polish_section, title, body, store)
+            for title, body in sections
+        ]
+        polished_sections = [(title, future.result()) for (title, _), future in zip(sections, futures)]
+
+    conclusion: Optional[ReportConclusion] = None
     try:
-        prompt = f"""Please polish the following financial report content.
-Respond with a clean, well-formatted Markdown version.
-
-Report:
----
-{raw_report}
----
-"""
-        return _run_agent(polishing_agent, prompt)
+        sections_text = _join_sections(polished_sections)
+        if store is not None:
+            fingerprint = store.fingerprint(
+                "polishing", {"report": sections_text, "instructions": _CONCLUSION_INSTRUCTIONS}
+            )
+            conclusion_json = store.reuse_or_generate("conclusion", fingerprint, _generate_conclusion, sections_text)
+        else:
+            conclusion_json = _generate_conclusion(sections_text)
+        conclusion = ReportConclusion.model_validate_json(conclusion_json)
     except Exception as e:
-        logger.warning("Polishing failed, returning raw report. Error: %s", e)
-        return "# Full Financial Report (Raw)\n\n" + raw_report
+        logger.warning(f"Writing the final recommendation failed, returning the polished sections only. Error: {e}")
+
+    transitions = {t.section.strip().lower(): t.text.strip() for t in conclusion.transitions} if conclusion else {}
+    parts = []
+    for title, body in polished_sections:
+        transition = transitions.get(title.lower())
+        parts.append(f"## {title}\n\n{transition}\n\n{body}" if transition else f"## {title}\n\n{body}")
+    if conclusion and conclusion.final_recommendation.strip():
+        parts.append(f"## Final Recommendation\n\n{conclusion.final_recommendation.strip()}")
+    return "\n\n".join(parts)
 
 
 if __name__ == "__main__":
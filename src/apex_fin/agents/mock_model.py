@@ -0,0 +1,409 @@
+"""
+Deterministic local stand-in for the LLM, for offline benchmarks.
+
+Selected with a model id starting with `mock` in `apex_fin.yaml`, globally or
+per role (see `llm.roles`):
+
+    llm:
+      model: mock/gemini-flash
+
+`mock/<profile>` picks a latency profile: a fixed time to first token, a
+token rate and a relative jitter (see `BUILTIN_PROFILES`, extended by
+`llm.mock.profiles`). Responses are canned or templated, and deterministic
+for a given conversation:
+
+- structured outputs follow the JSON schema of the agent's response model,
+  with realistic canned values for `CompetitorList` and `EvaluationFeedback`,
+  and a `BatchEvaluationFeedback` evaluating every section id of its prompt;
+- free-text outputs are Markdown of the profile's `output_tokens` length;
+- `llm.mock.responses` overrides either, by response model name, agent role
+  or `default`, as a `string.Template` with `$role`, `$model`, `$profile`
+  and `$prompt` placeholders.
+
+When a request offers tools, the mock spends `tool_call_turns` turns calling
+them before answering. Team leaders delegate to every member listed in their
+system message. Only the tools named in `llm.mock.tools` are called, which
+by default excludes every tool reaching the network.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from string import Template
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Type, Union
+
+from agno.models.base import Model
+from agno.models.litellm import LiteLLM
+from agno.models.message import Message
+from pydantic import BaseModel
+
+from apex_fin.config import MockProfile, settings
+from apex_fin.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MOCK_MODEL_PREFIX = "mock"
+
+# Latency profiles selectable as `mock/<name>`; `llm.mock.profiles` adds or replaces entries.
+BUILTIN_PROFILES: dict[str, MockProfile] = {
+    "instant": MockProfile(),
+    "fast": MockProfile(latency_seconds=0.2, tokens_per_second=400, jitter=0.1),
+    "gemini-flash": MockProfile(latency_seconds=0.6, tokens_per_second=180, jitter=0.2),
+    "gemini-pro": MockProfile(latency_seconds=1.5, tokens_per_second=70, jitter=0.25),
+}
+
+# Canned structured responses, by response model name
+CANNED_RESPONSES: dict[str, dict[str, Any]] = {
+    "CompetitorList": {
+        "competitors": [
+            {"ticker": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ", "confidence": 0.95},
+            {"ticker": "GOOGL", "name": "Alphabet Inc.", "exchange": "NASDAQ", "confidence": 0.9},
+            {"ticker": "AMZN", "name": "Amazon.com, Inc.", "exchange": "NASDAQ", "confidence": 0.85},
+        ]
+    },
+    "EvaluationFeedback": {
+        "score": 4,
+        "summary": "Mock evaluation: the content is complete, consistent and well structured.",
+        "needs_improvement": False,
+        "missing_elements": [],
+    },
+}
+
+_WORDS = (
+    "revenue margin growth guidance outlook valuation cash flow balance sheet leverage liquidity "
+    "demand pricing competition segment earnings estimate consensus multiple risk exposure "
+    "regulation supply chain capital expenditure dividend buyback momentum volatility"
+).split()
+
+# Team members as listed in a team leader's system message
+_MEMBER_ID_PATTERN = re.compile(r"^\s*- ID: (\S+)", re.MULTILINE)
+
+# Section headers of a batched evaluation prompt (see `evaluation_agent._format_section`)
+_SECTION_ID_PATTERN = re.compile(r"^### Section (\S+?):", re.MULTILINE)
+
+
+def is_mock_model(model_id: Optional[str]) -> bool:
+    """Whether a model id selects the mock provider (`mock` or `mock/<profile>`)."""
+    return bool(model_id) and (model_id == MOCK_MODEL_PREFIX or model_id.startswith(f"{MOCK_MODEL_PREFIX}/"))
+
+
+def mock_profile(model_id: str) -> tuple[str, MockProfile]:
+    """Resolves the latency profile of a mock model id.
+
+    Raises
+    ------
+    ValueError
+        If the profile is neither built in nor defined in `llm.mock.profiles`.
+    """
+    name = model_id.partition("/")[2] or "instant"
+    profiles = {**BUILTIN_PROFILES, **settings.mock_llm.profiles}
+    if name not in profiles:
+        raise ValueError(f"Unknown mock LLM profile '{name}'. Known profiles: {', '.join(sorted(profiles))}.")
+    return name, profiles[name]
+
+
+def _message_text(message: Message) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return "\n".join(str(part.get("text", "")) if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def _sample(schema: dict[str, Any], defs: dict[str, Any], rng: random.Random, name: str = "value") -> Any:
+    """Builds a value valid against a JSON schema, as produced by pydantic."""
+    if "$ref" in schema:
+        return _sample(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, rng, name)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [option for option in schema[combinator] if option.get("type") != "null"]
+            return _sample(options[0] if options else {"type": "null"}, defs, rng, name)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    kind = schema.get("type", "string")
+    if kind == "object":
+        return {key: _sample(value, defs, rng, key) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = max(schema.get("minItems", 0), min(2, schema.get("maxItems", 2)))
+        return [_sample(schema.get("items", {}), defs, rng, name) for _ in range(count)]
+    if kind in ("integer", "number"):
+        low = schema.get("minimum", schema.get("exclusiveMinimum", 0))
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 10))
+        value = low + 0.8 * (high - low)
+        return round(value) if kind == "integer" else round(value, 2)
+    if kind == "boolean":
+        return False
+    if kind == "null":
+        return None
+    return f"Mock {name.replace('_', ' ')} {rng.choice(_WORDS)}."
+
+
+def _markdown(rng: random.Random, title: str, tokens: int) -> str:
+    """Deterministic Markdown text of about `tokens` tokens."""
+    parts = [f"## {title}"]
+    while estimate_tokens("\n\n".join(parts)) < tokens:
+        if len(parts) % 3 == 0:
+            parts.append("\n".join(f"- **{rng.choice(_WORDS).title()}**: {rng.randint(1, 99)}%" for _ in range(3)))
+        else:
+            parts.append(" ".join(rng.choice(_WORDS) for _ in range(40)).capitalize() + ".")
+    return "\n\n".join(parts)
+
+
+@dataclass
+class MockLiteLLM(LiteLLM):
+    """
+    LiteLLM-compatible model answering locally, with simulated latency.
+
+    Responses are shaped like LiteLLM's, so agno parses them, runs tool calls
+    and validates structured outputs exactly as for a real provider. See the
+    module docstring for how responses and tool calls are generated.
+    """
+
+    name: str = "Mock"
+    provider: str = "Mock"
+    role: Optional[str] = None
+    profile_name: str = "instant"
+    profile: MockProfile = field(default_factory=MockProfile)
+    # Structured outputs are requested with their JSON schema, which the mock fills in.
+    supports_json_schema_outputs: bool = True
+
+    def __post_init__(self):
+        # Skip LiteLLM's API key lookup: the mock needs no credentials.
+        Model.__post_init__(self)
+
+    def _respond(
+        self,
+        messages: List[Message],
+        response_format: Optional[Union[Dict, Type[BaseModel]]],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> tuple[Optional[str], list[dict[str, Any]], float, SimpleNamespace]:
+        """Computes the response, its tool calls, its simulated duration and its token usage."""
+        conversation = "\n".join(f"{m.role}: {_message_text(m)}" for m in messages)
+        rng = random.Random(hashlib.sha256(f"{self.id}|{self.role}|{conversation}".encode("utf-8")).digest())
+
+        tool_calls = self._tool_calls(messages, tools, rng)
+        content = None if tool_calls else self._content(messages, response_format, rng)
+        output_tokens = estimate_tokens(content or json.dumps(tool_calls))
+        input_tokens = estimate_tokens(conversation)
+
+        duration = self.profile.latency_seconds
+        if self.profile.tokens_per_second:
+            duration += output_tokens / self.profile.tokens_per_second
+        duration *= max(0.0, 1 + self.profile.jitter * (2 * rng.random() - 1))
+        usage = SimpleNamespace(
+            prompt_tokens=input_tokens, completion_tokens=output_tokens, total_tokens=input_tokens + output_tokens
+        )
+        return content, tool_calls, duration, usage
+
+    def _content(
+        self, messages: List[Message], response_format: Optional[Union[Dict, Type[BaseModel]]], rng: random.Random
+    ) -> str:
+        schema = None
+        if isinstance(response_format, dict) and response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]
+        schema_name = schema["name"] if schema else None
+
+        responses = settings.mock_llm.responses
+        template = next(
+            (responses[key] for key in (schema_name, self.role, "default") if key and key in responses), None
+        )
+        prompt = next((_message_text(m) for m in reversed(messages) if m.role == "user"), "")
+        if template is not None:
+            return Template(template).safe_substitute(
+                role=self.role or "", model=self.id, profile=self.profile_name, prompt=" ".join(prompt.split())[:200]
+            )
+        if schema is not None:
+            if schema_name in CANNED_RESPONSES:
+                return json.dumps(CANNED_RESPONSES[schema_name])
+            if schema_name == "BatchEvaluationFeedback":
+                # One evaluation per section of the prompt, under the id it was given.
+                section_ids = dict.fromkeys(_SECTION_ID_PATTERN.findall(prompt))
+                evaluations = [{**CANNED_RESPONSES["EvaluationFeedback"], "section_id": i} for i in section_ids]
+                return json.dumps({"evaluations": evaluations})
+            return json.dumps(_sample(schema["schema"], schema["schema"].get("$defs", {}), rng))
+        title = f"Mock {self.role.replace('_', ' ')} response" if self.role else "Mock response"
+        return _markdown(rng, title, self.profile.output_tokens)
+
+    def _tool_calls(
+        self, messages: List[Message], tools: Optional[List[Dict[str, Any]]], rng: random.Random
+    ) -> list[dict[str, Any]]:
+        """Tool calls of the next turn, or none once `tool_call_turns` turns have called tools."""
+        allowed = settings.mock_llm.tools
+        functions = [
+            tool["function"]
+            for tool in tools or []
+            if tool.get("type") == "function" and (allowed is None or tool["function"]["name"] in allowed)
+        ]
+        last_user = max((i for i, m in enumerate(messages) if m.role == "user"), default=-1)
+        turns_done = sum(1 for m in messages[last_user + 1 :] if m.role == "assistant" and m.tool_calls)
+        if not functions or turns_done >= self.profile.tool_call_turns:
+            return []
+
+        system = next((_message_text(m) for m in messages if m.role == "system"), "")
+        members = _MEMBER_ID_PATTERN.findall(system)
+        delegation = next((f for f in functions if "member_id" in f.get("parameters", {}).get("properties", {})), None)
+        if delegation is not None and members:
+            calls = [(delegation, {"member_id": member}) for member in members]
+        else:
+            calls = [(functions[turns_done % len(functions)], {})]
+
+        tool_calls = []
+        for index, (function, fixed) in enumerate(calls):
+            parameters = function.get("parameters") or {"type": "object", "properties": {}}
+            arguments = {**_sample(parameters, parameters.get("$defs", {}), rng), **fixed}
+            tool_calls.append(
+                {
+                    "id": f"mock_call_{turns_done}_{index}",
+                    "type": "function",
+                    "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+                }
+            )
+        return tool_calls
+
+    def _timeout(self) -> Optional[float]:
+        return (self.request_params or {}).get("timeout")
+
+    @staticmethod
+    def _response(content: Optional[str], tool_calls: list[dict[str, Any]], usage: SimpleNamespace) -> Any:
+        message = SimpleNamespace(
+            content=content,
+            tool_calls=[
+                SimpleNamespace(
+                    id=call["id"],
+                    function=SimpleNamespace(name=call["function"]["name"], arguments=call["function"]["arguments"]),
+                )
+                for call in tool_calls
+            ],
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    @staticmethod
+    def _chunks(content: Optional[str], tool_calls: list[dict[str, Any]]) -> list[Any]:
+        """Splits a response into streaming deltas of a few words; tool calls come in one delta."""
+        if tool_calls:
+            deltas = [MockLiteLLM._response(None, tool_calls, None).choices[0].message]
+        else:
+            words = re.findall(r"\S+\s*", content or "")
+            pieces = ["".join(words[i : i + 8]) for i in range(0, len(words), 8)] or [""]
+            deltas = [SimpleNamespace(content=piece, tool_calls=None) for piece in pieces]
+        return [SimpleNamespace(choices=[SimpleNamespace(delta=delta)]) for delta in deltas]
+
+    def _timeout_error(self, duration: float) -> Optional[TimeoutError]:
+        """The error raised when the simulated duration exceeds the request timeout, if it does."""
+        timeout = self._timeout()
+        if timeout is None or duration <= timeout:
+            return None
+        return TimeoutError(f"Mock model {self.id} timed out after {timeout:.1f}s (simulated {duration:.1f}s).")
+
+    def invoke(
+        self,
+        messages: List[Message],
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+    ) -> Mapping[str, Any]:
+        content, tool_calls, duration, usage = self._respond(messages, response_format, tools)
+        error = self._timeout_error(duration)
+        if error is not None:
+            time.sleep(self._timeout())
+            raise error
+        time.sleep(duration)
+        return self._response(content, tool_calls, usage)
+
+    def invoke_stream(
+        self,
+        messages: List[Message],
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+    ) -> Iterator[Mapping[str, Any]]:
+        content, tool_calls, duration, _ = self._respond(messages, response_format, tools)
+        error = self._timeout_error(duration)
+        if error is not None:
+            time.sleep(self._timeout())
+            raise error
+        chunks = self._chunks(content, tool_calls)
+        first_token = min(self.profile.latency_seconds, duration)
+        time.sleep(first_token)
+        for chunk in chunks:
+            yield chunk
+            time.sleep((duration - first_token) / len(chunks))
+
+    async def ainvoke(
+        self,
+        messages: List[Message],
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+    ) -> Mapping[str, Any]:
+        content, tool_calls, duration, usage = self._respond(messages, response_format, tools)
+        error = self._timeout_error(duration)
+        if error is not None:
+            await asyncio.sleep(self._timeout())
+            raise error
+        await asyncio.sleep(duration)
+        return self._response(content, tool_calls, usage)
+
+    async def ainvoke_stream(
+        self,
+        messages: List[Message],
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+    ) -> AsyncIterator[Any]:
+        content, tool_calls, duration, _ = self._respond(messages, response_format, tools)
+        error = self._timeout_error(duration)
+        if error is not None:
+            await asyncio.sleep(self._timeout())
+            raise error
+        chunks = self._chunks(content, tool_calls)
+        first_token = min(self.profile.latency_seconds, duration)
+        await asyncio.sleep(first_token)
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep((duration - first_token) / len(chunks))
+
+
+def create_mock_model(model_id: str, role: Optional[str] = None, name: str = "Mock", **params: Any) -> MockLiteLLM:
+    """Builds the mock model for `model_id` (`mock` or `mock/<profile>`).
+
+    Parameters
+    ----------
+    model_id : str
+        The configured model id.
+    role : Optional[str], optional
+        The agent role, used to pick a templated response and in free-text
+        headings.
+    name : str, optional
+        Display name of the model.
+    **params
+        Generation parameters (`temperature`, `max_tokens`, `request_params`...),
+        accepted for compatibility. Only the request timeout is honoured.
+    """
+    profile_name, profile = mock_profile(model_id)
+    return MockLiteLLM(id=model_id, name=name, role=role, profile_name=profile_name, profile=profile, **params)
+
+
+if __name__ == "__main__":
+    from apex_fin.agents.base import create_agent
+    from apex_fin.agents.evaluation_agent import EvaluationFeedback
+    from apex_fin.config import UserOverrides, configure
+
+    logging.basicConfig(level=logging.INFO)
+    configure(user=UserOverrides.model_validate({"llm": {"model": "mock/fast"}}))
+
+    started = time.perf_counter()
+    text = create_agent(instructions=["Summarize."], model_role="news").run("Latest news on AAPL")
+    logger.info(f"Free text in {time.perf_counter() - started:.2f}s:\n{text.content[:300]}")
+
+    started = time.perf_counter()
+    feedback = create_agent(response_model=EvaluationFeedback, model_role="evaluation").run("Evaluate this.")
+    logger.info(f"Structured output in {time.perf_counter() - started:.2f}s: {feedback.content!r}")
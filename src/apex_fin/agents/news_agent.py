@@ -6,10 +6,10 @@ import logging
 from typing import List
 
 from agno.agent import Agent, RunResponse
-from agno.tools.duckduckgo import DuckDuckGoTools
 from apex_fin.agents.base import create_agent
 from apex_fin.prompts.news_instructions import NEWS_PROMPT
 from apex_fin.utils.prompt_loader import load_prompt
+from apex_fin.utils.search_cache import CachedDuckDuckGoTools
 from apex_fin.utils.ticker_validation import validate_and_get_ticker # Import the validator
 import yfinance as yf # Import yfinance to get company name
 from apex_fin.config import settings
@@ -22,8 +22,8 @@ def build_financial_news_agent() -> Agent:
     """
     Constructs and configures a financial news agent.
 
-    This agent uses DuckDuckGoTools to search for recent news related to a
-    given stock ticker. It then processes this information to provide summaries
+    This agent uses DuckDuckGo search, through the shared search cache and the
+    current run's evidence pool, to find recent news related to a given stock ticker. It then processes this information to provide summaries
     and explanations of relevance for financial analysis, formatted in Markdown.
 
     Returns
@@ -46,11 +46,12 @@ def build_financial_news_agent() -> Agent:
     instructions = [base_news_prompt + strict_output_instruction]
 
     return create_agent(
-        tools=[DuckDuckGoTools()],
+        tools=[CachedDuckDuckGoTools()],
         instructions=instructions,
         markdown=True, # Expecting Markdown output
         show_tool_calls=True, # Best for debugging
         response_model=None, # Output is a Markdown string
+        model_role="news",
     )
 
 
@@ -82,31 +83,35 @@ def _run_news_agent_and_get_content(
     Returns
     -------
     str
-        The string content from the agent's response, or an error/warning
-        message if issues occur.
+        The string content from the agent's response.
+
+    Raises
+    ------
+    ValueError
+        If the agent run fails or returns no content.
     """
     logger_instance.info(f"Running financial news agent for {entity_for_log} with prompt: '{prompt}'")
 
     try:
         response: RunResponse = agent.run(prompt)
-        if hasattr(response, "content") and response.content is not None:
-            # Ensure content is a string and strip any potential extra whitespace
-            content_str = str(response.content).strip()
-            if not content_str:
-                logger_instance.warning(f"Financial news agent returned empty content for {entity_for_log}.")
-                return f"No specific news content was generated for {entity_for_log}."
-            return content_str
-        else:
-            logger_instance.error(
-                f"Failed to get valid content from financial news agent for {entity_for_log}. Response: {response}"
-            )
-            return f"Error: Could not retrieve financial news for {entity_for_log}."
     except Exception as e:
         logger_instance.error(
             f"An exception occurred while running financial news agent for {entity_for_log}: {e}",
             exc_info=True,
         )
-        return f"Error: An exception occurred while fetching news for {entity_for_log}."
+        raise ValueError(f"An exception occurred while fetching news for {entity_for_log}: {e}") from e
+
+    if hasattr(response, "content") and response.content is not None:
+        # Ensure content is a string and strip any potential extra whitespace
+        content_str = str(response.content).strip()
+        if content_str:
+            return content_str
+        logger_instance.warning(f"Financial news agent returned empty content for {entity_for_log}.")
+        raise ValueError(f"No news content was generated for {entity_for_log}.")
+    logger_instance.error(
+        f"Failed to get valid content from financial news agent for {entity_for_log}. Response: {response}"
+    )
+    raise ValueError(f"Could not retrieve financial news for {entity_for_log}.")
 
 def get_financial_news(ticker_or_company_name: str) -> str:
     """
@@ -123,18 +128,22 @@ def get_financial_news(ticker_or_company_name: str) -> str:
     str
         A Markdown formatted string containing the relevant news,
         their summaries, and explanations of their financial relevance.
-        Returns an error message if validation or fetching fails.
+
+    Raises
+    ------
+    ValueError
+        If the input is not a valid ticker, or the news cannot be fetched.
     """
     if not ticker_or_company_name or not isinstance(ticker_or_company_name, str):
         logger.error("Invalid input: A non-empty string for ticker or company name must be provided.")
-        return "Error: A valid ticker string must be provided."
+        raise ValueError("A valid ticker string must be provided.")
 
     logger.info(f"Attempting to validate input for news agent: '{ticker_or_company_name}'")
     validated_ticker = validate_and_get_ticker(ticker_or_company_name)[0]
 
     if not validated_ticker:
         logger.error(f"Could not validate ticker for input: '{ticker_or_company_name}'.")
-        return f"Error: Could not find a valid stock ticker for '{ticker_or_company_name}'."
+        raise ValueError(f"Could not find a valid stock ticker for '{ticker_or_company_name}'.")
 
     # Try to get the company's long name for a more descriptive prompt
     company_display_name = validated_ticker # Default to ticker if name lookup fails
@@ -2,15 +2,85 @@
 Refinement Agent that runs a generation-evaluation loop to improve output quality.
 """
 
+import json
 import logging
-from typing import Callable
+import time
+from typing import Callable, Literal, Optional
 from agno.agent import RunResponse, Agent
+from pydantic import BaseModel
 from apex_fin.agents.analysis_agent import build_auto_analysis_agent
-from apex_fin.agents.evaluation_agent import build_evaluation_agent, EvaluationFeedback
+from apex_fin.agents.base import create_agent
+from apex_fin.agents.evaluation_agent import (
+    EvaluationFeedback,
+    FailedEvaluationFeedback,
+    SectionToEvaluate,
+    evaluate_sections,
+)
+from apex_fin.prompts.refinement_instructions import REVISION_PROMPT
+from apex_fin.utils.tokens import response_token_usage
 
 logger = logging.getLogger(__name__)
 
 
+class RefinementAttempt(BaseModel):
+    """
+    Cost and outcome of one generate/revise + evaluate attempt.
+
+    Attributes
+    ----------
+    attempt : int
+        1-based attempt number.
+    action : Literal["generate", "revise"]
+        Whether the draft was generated from scratch or revised from feedback.
+    score : int, optional
+        Evaluation score (1-5), or None if the evaluation failed.
+    needs_improvement : bool, optional
+        Evaluator verdict, or None if the evaluation failed.
+    missing_elements : list[str]
+        Elements the evaluator reported as missing.
+    input_tokens : int
+        Input tokens used by the attempt (generation or revision plus evaluation).
+        Custom generator functions are not metered.
+    output_tokens : int
+        Output tokens used by the attempt.
+    duration_seconds : float
+        Wall-clock duration of the attempt.
+    """
+
+    attempt: int
+    action: Literal["generate", "revise"]
+    score: Optional[int] = None
+    needs_improvement: Optional[bool] = None
+    missing_elements: list[str] = []
+    input_tokens: int = 0
+    output_tokens: int = 0
+    duration_seconds: float = 0.0
+
+
+class RefinementResult(BaseModel):
+    """
+    Final section content and the per-attempt history of a refinement loop.
+
+    Attributes
+    ----------
+    content : str
+        The latest version of the section.
+    attempts : list[RefinementAttempt]
+        One record per attempt, in order.
+    stop_reason : str
+        Why the loop stopped: "score_threshold", "max_retries",
+        "time_budget", "token_budget" or "generation_error".
+    """
+
+    content: str
+    attempts: list[RefinementAttempt] = []
+    stop_reason: str
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(a.input_tokens + a.output_tokens for a in self.attempts)
+
+
 def run_agent(agent: Agent, prompt: str) -> str:
     """
     Execute a given agent with a prompt and return its stringified content.
@@ -37,110 +107,258 @@ def run_agent(agent: Agent, prompt: str) -> str:
     return str(response.content).strip()
 
 
-def generate_refined_section(
+def build_revision_agent() -> Agent:
+    """
+    Construct an agent that revises a draft section from evaluation feedback.
+
+    Returns
+    -------
+    Agent
+        An agent configured with `REVISION_PROMPT`, returning Markdown.
+    """
+    return create_agent(
+        description="Revises report sections in place using reviewer feedback.",
+        instructions=[REVISION_PROMPT],
+        markdown=True,
+        show_tool_calls=False,
+        model_role="refinement",
+    )
+
+
+def _build_revision_prompt(
+    ticker: str,
+    section_name: str,
+    draft: str,
+    feedback: EvaluationFeedback,
+    source_data: Optional[str],
+) -> str:
+    """Builds the revision request sent to the revision agent.
+
+    Parameters
+    ----------
+    ticker : str
+        The company the section covers.
+    section_name : str
+        The name of the section being revised.
+    draft : str
+        The current draft.
+    feedback : EvaluationFeedback
+        The evaluation of the current draft.
+    source_data : Optional[str]
+        Optional source data (e.g. the financial snapshot JSON) that additions may rely on.
+
+    Returns
+    -------
+    str
+        The prompt text.
+    """
+    missing = "\n".join(f"- {element}" for element in feedback.missing_elements) or "- (none listed)"
+    prompt = f"""Revise the {section_name} for {ticker}.
+
+### Reviewer feedback (score {feedback.score}/5)
+{feedback.summary}
+
+### Missing or weak elements
+{missing}
+
+### Current draft
+{draft}
+"""
+    if source_data:
+        prompt += f"""
+### Source data
+{source_data}
+"""
+    return prompt
+
+
+def refine_section(
     ticker: str,
     generator_fn: Callable[[str], str] = None,
     section_name: str = "company analysis",
     max_retries: int = 2,
-) -> str:
+    score_threshold: int = 4,
+    max_seconds: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    source_data: Optional[str] = None,
+) -> RefinementResult:
     """
-    Generate a report section through an iterative refinement loop.
+    Generate a report section, then revise it from evaluation feedback until it passes.
 
-    This function attempts to produce a high-quality section of a report
-    by first generating an initial draft using a specified `generator_fn`
-    (or a default analysis agent). It then uses an evaluation agent to
-    assess the draft. If the evaluation indicates a need for improvement,
-    the process can be repeated up to `max_retries` times.
-    The intent is to improve the output quality through a
-    generation-evaluation cycle.
+    The first attempt generates a draft with `generator_fn` (or the default
+    analysis agent), and every draft is scored by one structured call of
+    `evaluate_sections`. Each following attempt sends the previous draft and the
+    evaluator's `missing_elements` to a revision agent, instead of
+    regenerating from scratch. The loop stops as soon as the score reaches
+    `score_threshold` (or the evaluator reports no improvement needed), when
+    `max_retries` attempts have been made, or before starting an attempt
+    once the wall-clock or token budget is spent.
 
     Parameters
     ----------
     ticker : str
-        The stock ticker symbol (e.g., 'AAPL') for which the section
-        is being generated. This is typically passed to the `generator_fn`.
+        The stock ticker symbol (e.g., 'AAPL') for which the section is generated.
     generator_fn : Callable[[str], str], optional
-        A function that takes a ticker string as input and returns a string
-        representing the generated report section. If None, a default
-        markdown analysis agent (`build_auto_analysis_agent()`)
-        will be used. Defaults to None.
+        A function that takes a ticker string and returns the first draft.
+        If None, the markdown analysis agent (`build_auto_analysis_agent()`)
+        is used. Defaults to None.
     section_name : str, optional
-        A descriptive name for the section being generated (e.g.,
-        "company analysis", "competitor overview"). This is used in
-        console output during the refinement process. Defaults to "company analysis".
+        A descriptive name for the section (e.g., "company analysis").
+        Defaults to "company analysis".
     max_retries : int, optional
-        The maximum number of generation and evaluation attempts.
+        The maximum number of attempts (the first generation included).
         Defaults to 2.
+    score_threshold : int, optional
+        Evaluation score (1-5) at which the draft is accepted. Defaults to 4.
+    max_seconds : float, optional
+        Wall-clock budget for the whole loop. No new attempt is started once
+        it is spent. Defaults to None (no limit).
+    max_tokens : int, optional
+        Token budget (input + output, metered agents only) for the whole loop.
+        No new attempt is started once it is spent. Defaults to None (no limit).
+    source_data : str, optional
+        Source data given to the revision agent so additions stay grounded.
+        Defaults to None.
 
     Returns
     -------
-    str
-        The content of the generated section. This will be the first version
-        that passes evaluation, or the latest version if `max_retries`
-        is reached without passing.
+    RefinementResult
+        The final content, the per-attempt cost and score history, and the
+        reason the loop stopped.
     """
-    # Default to markdown version of the analysis agent
-    analysis_agent = build_auto_analysis_agent()
-    evaluation_agent = build_evaluation_agent()
-
-    generator = generator_fn or (lambda ticker: run_agent(analysis_agent, ticker))
+    revision_agent: Optional[Agent] = None
 
+    started = time.monotonic()
+    attempts: list[RefinementAttempt] = []
     latest_draft = ""
+    feedback: Optional[EvaluationFeedback] = None
+    stop_reason = "max_retries"
+
     for attempt in range(1, max_retries + 1):
+        elapsed = time.monotonic() - started
+        tokens_used = sum(a.input_tokens + a.output_tokens for a in attempts)
+        if attempts and max_seconds is not None and elapsed >= max_seconds:
+            stop_reason = "time_budget"
+            break
+        if attempts and max_tokens is not None and tokens_used >= max_tokens:
+            stop_reason = "token_budget"
+            break
+
+        revise = bool(latest_draft) and feedback is not None
+        record = RefinementAttempt(attempt=attempt, action="revise" if revise else "generate")
+        attempt_started = time.monotonic()
         logger.info(
-            f"Attempt {attempt}/{max_retries} – Generating {section_name} for {ticker}..."
+            f"Attempt {attempt}/{max_retries} – {'Revising' if revise else 'Generating'} {section_name} for {ticker}..."
         )
         try:
-            latest_draft = generator(ticker)
-            if not latest_draft:  # Ensure generator actually produced something
+            if revise:
+                revision_agent = revision_agent or build_revision_agent()
+                response = revision_agent.run(
+                    _build_revision_prompt(ticker, section_name, latest_draft, feedback, source_data)
+                )
+                record.input_tokens, record.output_tokens = response_token_usage(response)
+                revised = str(response.content).strip() if response.content else ""
+                if revised:
+                    latest_draft = revised
+                else:
+                    logger.warning(f"Revision agent returned empty content for {ticker} on attempt {attempt}; keeping previous draft.")
+            elif generator_fn is not None:
+                latest_draft = generator_fn(ticker)
+            else:
+                response = build_auto_analysis_agent().run(ticker)
+                record.input_tokens, record.output_tokens = response_token_usage(response)
+                latest_draft = str(response.content).strip()
+            if not latest_draft:
                 logger.warning(
                     f"Generator function returned empty content for {ticker} on attempt {attempt}."
                 )
-                # Decide if to retry or fail, for now, we'll let it go to evaluation
-                # or could 'continue' to retry generation if that's desired.
         except Exception as e:
             logger.error(
                 f"Error during content generation for {ticker} on attempt {attempt}: {e}",
                 exc_info=True,
             )
+            record.duration_seconds = time.monotonic() - attempt_started
+            attempts.append(record)
             if attempt == max_retries:
                 logger.error(
                     "Max retries reached after generation error. Returning last known draft or empty."
                 )
-                return latest_draft  # Or raise the error
-            continue  # Try next attempt
-
-        evaluation_prompt = f"""
-Evaluate the following {section_name} for quality and completeness.
+                stop_reason = "generation_error"
+                break
+            continue
 
-### Content:
-{latest_draft}
-"""
-        try:
-            eval_response = evaluation_agent.run(evaluation_prompt)
-            feedback: EvaluationFeedback = eval_response.content
+        def _meter(eval_response: RunResponse) -> None:
+            eval_in, eval_out = response_token_usage(eval_response)
+            record.input_tokens += eval_in
+            record.output_tokens += eval_out
 
-            if not feedback.needs_improvement:
-                logger.info(
-                    f"Passed evaluation for {ticker} on attempt {attempt}. Score: {feedback.score}/5"
-                )
-                return latest_draft
+        [feedback] = evaluate_sections(
+            [SectionToEvaluate(label=section_name, content=latest_draft, ticker=ticker)], on_response=_meter
+        )
+        if isinstance(feedback, FailedEvaluationFeedback):
+            logger.error(f"Error during evaluation for {ticker} on attempt {attempt}: {feedback.error}")
+            feedback = None
+        else:
+            record.score = feedback.score
+            record.needs_improvement = feedback.needs_improvement
+            record.missing_elements = list(feedback.missing_elements)
+        record.duration_seconds = time.monotonic() - attempt_started
+        attempts.append(record)
+        logger.info(f"Refinement attempt record for {ticker}: {json.dumps(record.model_dump())}")
 
+        if feedback is None:
+            continue
+        if feedback.score >= score_threshold or not feedback.needs_improvement:
             logger.info(
-                f"Evaluation for {ticker} (attempt {attempt}) needs improvement. Score: {feedback.score}/5. Summary: {feedback.summary}"
+                f"Passed evaluation for {ticker} on attempt {attempt}. Score: {feedback.score}/5"
             )
-            logger.info(f"Missing elements: {feedback.missing_elements}")
-        except Exception as e:
-            logger.error(
-                f"Error during evaluation for {ticker} on attempt {attempt}: {e}",
-                exc_info=True,
-            )
-            # Fall through to next attempt or max_retries
+            stop_reason = "score_threshold"
+            break
+        logger.info(
+            f"Evaluation for {ticker} (attempt {attempt}) needs improvement. Score: {feedback.score}/5. Summary: {feedback.summary}"
+        )
+        logger.info(f"Missing elements: {feedback.missing_elements}")
 
-    logger.warning(
-        f"Max retries ({max_retries}) reached for {ticker}. Returning latest version of {section_name}."
-    )
-    return latest_draft
+    if stop_reason != "score_threshold":
+        logger.warning(
+            f"Refinement for {ticker} stopped ({stop_reason}) after {len(attempts)} attempt(s). Returning latest version of {section_name}."
+        )
+    return RefinementResult(content=latest_draft, attempts=attempts, stop_reason=stop_reason)
+
+
+def generate_refined_section(
+    ticker: str,
+    generator_fn: Callable[[str], str] = None,
+    section_name: str = "company analysis",
+    max_retries: int = 2,
+    score_threshold: int = 4,
+    max_seconds: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    source_data: Optional[str] = None,
+) -> str:
+    """
+    Generate a report section through a feedback-driven refinement loop.
+
+    Thin wrapper around `refine_section` that returns only the content.
+    See `refine_section` for the loop, budgets and parameters.
+
+    Returns
+    -------
+    str
+        The content of the generated section. This will be the first version
+        that reaches `score_threshold`, or the latest version if the loop
+        stops for another reason.
+    """
+    return refine_section(
+        ticker,
+        generator_fn=generator_fn,
+        section_name=section_name,
+        max_retries=max_retries,
+        score_threshold=score_threshold,
+        max_seconds=max_seconds,
+        max_tokens=max_tokens,
+        source_data=source_data,
+    ).content
 
 
 if __name__ == "__main__":
@@ -8,17 +8,20 @@ from typing import Optional
 
 from apex_fin.config import settings
 from apex_fin.agents.analysis_agent import build_auto_analysis_agent, _fetch_financial_data_for_agent 
-from apex_fin.agents.base import build_base_risk_agent 
-from apex_fin.prompts.risk_instructions import RISK_PROMPT_TEMPLATE
+from apex_fin.agents.base import build_base_risk_agent, create_model
+from apex_fin.prompts.risk_instructions import RISK_PROMPT_SOURCE
 from apex_fin.utils.risk_tools import get_tools_for_risk 
+from apex_fin.utils.prompt_registry import get_prompt_registry
+from apex_fin.utils.team_context import team_context_hooks
 from agno.agent import Agent
 from agno.team import Team
-from agno.models.litellm import LiteLLM 
 
 logger = logging.getLogger(__name__) 
 
 
-def build_thinking_agent(ticker: str, precomputed_financial_summary: Optional[str] = None) -> Team:
+def build_thinking_agent(
+    ticker: str, precomputed_financial_summary: Optional[str] = None, snapshot: Optional[dict] = None
+) -> Team:
     """
     Constructs a modular risk assessment team using analysis agent output
     and dynamically configured risk agents defined in config.risk.enabled.
@@ -31,9 +34,16 @@ def build_thinking_agent(ticker: str, precomputed_financial_summary: Optional[st
         An already generated markdown financial summary for the ticker.
         If provided, this summary is used directly, avoiding a new call
         to the analysis agent. Defaults to None.
+    snapshot : Optional[dict], optional
+        An already fetched financial snapshot of the ticker, summarized
+        instead of fetching it again when no summary is given. Defaults to None.
     """
     _validate_risk_guidelines()
-    financial_summary = precomputed_financial_summary if precomputed_financial_summary is not None else _get_financial_summary(ticker)
+    financial_summary = (
+        precomputed_financial_summary
+        if precomputed_financial_summary is not None
+        else _get_financial_summary(ticker, snapshot)
+    )
     agents = [
         _build_risk_agent(risk, financial_summary) for risk in settings.enabled_risks
     ]
@@ -42,18 +52,15 @@ def build_thinking_agent(ticker: str, precomputed_financial_summary: Optional[st
         raise RuntimeError("No risk agents were built. Check configuration.")
     
     # Configure the model for the Team Leader (coordinator)
-    team_leader_model = LiteLLM(
-        id=settings.LLM_MODEL,
-        api_key=settings.GEMINI_API_KEY,
-        name="GeminiTeamLeader", 
-        # api_base=settings.BASE_URL, # Uncomment if you use a custom base URL
-    )
+    team_leader_model = create_model("team_leader", name="GeminiTeamLeader")
 
     return Team(
         members=agents,
         name="Thinking Team",
         mode="coordinate",
         model=team_leader_model,
+        # Bounds the risk reports the coordinator reads back
+        tool_hooks=team_context_hooks(agents),
         instructions=[
             "You are the coordinator for a team of specialized risk assessment agents.",
             "Your task is to synthesize the individual risk reports provided by your team members.",
@@ -92,7 +99,7 @@ def _validate_risk_guidelines() -> None:
         )
 
 
-def _get_financial_summary(ticker: str) -> str:
+def _get_financial_summary(ticker: str, snapshot: Optional[dict] = None) -> str:
     """Generates a financial summary for a ticker using the analysis agent.
 
     This function first pre-fetches financial data for the given ticker.
@@ -104,6 +111,8 @@ def _get_financial_summary(ticker: str) -> str:
     ----------
     ticker : str
         The stock ticker symbol for which to generate the summary.
+    snapshot : Optional[dict], optional
+        An already fetched financial snapshot, used instead of fetching it.
 
     Returns
     -------
@@ -119,7 +128,9 @@ def _get_financial_summary(ticker: str) -> str:
     # Pre-fetch financial data
     logger.info(f"Attempting to pre-fetch financial data for ticker: {ticker}")
     try:
-        input_json_for_analysis_agent = _fetch_financial_data_for_agent(ticker, logger)
+        input_json_for_analysis_agent = (
+            json.dumps(snapshot) if snapshot is not None else _fetch_financial_data_for_agent(ticker, logger)
+        )
     except Exception as e:
         logger.error(f"Error during _fetch_financial_data_for_agent for ticker '{ticker}': {e}", exc_info=True)
         raise RuntimeError(f"Failed to fetch initial data for analysis for ticker '{ticker}': {e}") from e
@@ -158,8 +169,9 @@ def _build_risk_agent(risk: str, context: str) -> Agent: #NOSONAR
 
     This function builds a risk agent tailored to a specific risk type.
     It retrieves appropriate tools for the risk, fetches the corresponding
-    guideline from settings, and renders a prompt using these details.
-    The `build_base_risk_agent` factory is then used to create the agent.
+    guideline from settings, and renders the static prompt using these details.
+    The `build_base_risk_agent` factory is then used to create the agent, with
+    the financial summary appended after the instructions.
 
     Parameters
     ----------
@@ -177,8 +189,9 @@ def _build_risk_agent(risk: str, context: str) -> Agent: #NOSONAR
     # _validate_risk_guidelines() ensures that the guideline exists and is non-empty
     # for all risks in settings.enabled_risks.
     guideline = settings.risk_guidelines[risk] # type: ignore
-    instruction_content = RISK_PROMPT_TEMPLATE.render( # type: ignore
-        risk_name=risk, context=context, focus=guideline # type: ignore
+    # Static per risk type: rendered once per process, not once per report.
+    instruction_content = get_prompt_registry().render( # type: ignore
+        RISK_PROMPT_SOURCE, risk_name=risk, focus=guideline # type: ignore
     ) # type: ignore
     return build_base_risk_agent( # type: ignore
         risk_name=risk, context=context, tools=tools, instructions=[instruction_content] # type: ignore
@@ -0,0 +1,408 @@
+"""
+Local archive of generated reports, with content-addressed reuse.
+
+Every report is stored zlib-compressed in a SQLite database (`archive.path`),
+indexed by ticker, date, command and configuration hash. Its key is a hash of
+everything that determines it:
+
+- the company's financial snapshot, without its retrieval time;
+- the prompts and templates, built-in or customized;
+- the `llm`, `report`, `risk` and `prompts` settings.
+
+A request whose inputs hash to an archived key gets the archived report back
+without any LLM call (see `archived` in `apex_fin.operations`). Any change in
+the figures, prompts or model configuration changes the key.
+
+The sections of full reports are stored as well, under a fingerprint of the
+inputs each one actually uses (see `section_fingerprint`). When a report is
+rebuilt, a section whose fingerprint is unchanged is reused instead of being
+regenerated, so a report whose news alone went stale only regenerates the
+news section and its polishing.
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import pkgutil
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from pydantic import BaseModel
+
+from apex_fin.config import register_reset_hook, settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT_VERSION = 1
+
+# Snapshot fields that change on every fetch without changing the report's inputs
+_VOLATILE_SNAPSHOT_FIELDS = ("data_retrieved_utc",)
+
+# Key metrics that move with the share price, left out of the analysis fingerprint (see `fundamentals_hash`)
+_PRICE_DRIVEN_METRICS = (
+    "current_price",
+    "previous_close",
+    "market_cap",
+    "trailing_pe",
+    "forward_pe",
+    "enterprise_to_ebitda",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    key TEXT PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    command TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    created_date TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    snapshot_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_ticker_date ON reports (ticker, created_date);
+CREATE INDEX IF NOT EXISTS reports_command ON reports (command);
+CREATE INDEX IF NOT EXISTS reports_config ON reports (config_hash);
+CREATE TABLE IF NOT EXISTS sections (
+    fingerprint TEXT PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    section TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_ticker ON sections (ticker, section);
+"""
+
+# Prompt sources (see `_prompt_sources`) each report section is written with
+_SECTION_PROMPTS: dict[str, tuple[str, ...]] = {
+    "analysis": ("prompts.analysis_instructions.", "custom.analysis"),
+    "comparison": (
+        "prompts.analysis_instructions.",
+        "prompts.comparison_instructions.",
+        "custom.analysis",
+        "custom.comparison",
+    ),
+    "context": (
+        "prompts.risk_instructions.",
+        "prompts.thinking_instructions.",
+        "prompts.team_instructions.",
+        "custom.team",
+    ),
+    "news": ("prompts.news_instructions.",),
+}
+
+# Agent roles (see `llm.roles`) whose model writes each report section
+_SECTION_ROLES: dict[str, tuple[str, ...]] = {
+    "analysis": ("analysis",),
+    "peers": ("competitor",),
+    "comparison": ("analysis", "comparison"),
+    "context": ("risk", "team_leader"),
+    "news": ("news",),
+    "polishing": ("polishing",),
+}
+
+# Sections whose date bucket follows the refresh period of another section
+_SECTION_BUCKET_ALIASES = {"peers": "comparison"}
+
+
+class ArchivedReport(BaseModel):
+    key: str
+    ticker: str
+    command: str
+    created_utc: str
+    config_hash: str
+    snapshot_hash: str
+    size: int
+    content: Optional[str] = None
+
+
+def _digest(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def snapshot_hash(snapshot: dict[str, Any]) -> str:
+    """Hashes a financial snapshot, ignoring its retrieval time."""
+    return _digest({k: v for k, v in snapshot.items() if k not in _VOLATILE_SNAPSHOT_FIELDS})
+
+
+def fundamentals_hash(snapshot: dict[str, Any]) -> str:
+    """Hashes the slow-moving fields of a financial snapshot, for the analysis fingerprint.
+
+    Price-driven metrics are left out, so that price ticks do not regenerate
+    the analysis and, through its text, every section written from it. The
+    analysis refresh period (see `date_bucket`) bounds how stale they get;
+    without one, this is `snapshot_hash`.
+    """
+    metrics = snapshot.get("key_financial_metrics")
+    if date_bucket("analysis") is None or not isinstance(metrics, dict):
+        return snapshot_hash(snapshot)
+    fundamentals = {k: v for k, v in metrics.items() if k not in _PRICE_DRIVEN_METRICS}
+    return snapshot_hash({**snapshot, "key_financial_metrics": fundamentals})
+
+
+def _prompt_sources() -> dict[str, str]:
+    """The built-in prompt and template texts, and the customized prompt files in use."""
+    import apex_fin.prompts
+    from apex_fin.templates.report_template import DEFAULT_MD_TEMPLATE
+    from apex_fin.utils.prompt_registry import get_prompt_registry
+
+    sources = {"templates.report_template.DEFAULT_MD_TEMPLATE": DEFAULT_MD_TEMPLATE}
+    for module_info in pkgutil.iter_modules(apex_fin.prompts.__path__):
+        module = importlib.import_module(f"apex_fin.prompts.{module_info.name}")
+        for name, value in vars(module).items():
+            if name.isupper() and isinstance(value, str):
+                sources[f"prompts.{module_info.name}.{name}"] = value
+
+    registry = get_prompt_registry()
+    custom_paths = settings.prompt_paths.model_dump(exclude={"reload_check_seconds"})
+    custom_paths["markdown_template_path"] = settings.markdown_template_path
+    for name, path in custom_paths.items():
+        if path:
+            sources[f"custom.{name}"] = registry.load(path, "")
+    return sources
+
+
+def config_hash() -> str:
+    """Hashes the prompts, templates and settings that determine a report's content.
+
+    The report deadline and section weights are left out: they only decide
+    whether a section is generated in time, and reports with missing
+    sections are not archived.
+    """
+    user = settings.user
+    return _digest(
+        {
+            "format": ARCHIVE_FORMAT_VERSION,
+            "llm": user.llm.model_dump(),
+            "report": user.report.model_dump(exclude={"deadline_seconds", "section_weights"}),
+            "risk": user.risk.model_dump(),
+            "comparison": user.comparison.model_dump(exclude={"concurrency"}),
+            "prompts": _prompt_sources(),
+        }
+    )
+
+
+def date_bucket(section: str, now: Optional[float] = None) -> Optional[str]:
+    """Start of the current refresh period of a report section, or None if it has none.
+
+    Periods are `archive.section_refresh_hours[section]` long and aligned on
+    the Unix epoch, so every process agrees on the current one.
+    """
+    hours = settings.archive.section_refresh_hours.get(_SECTION_BUCKET_ALIASES.get(section, section))
+    if not hours:
+        return None
+    period = hours * 3600
+    start = ((time.time() if now is None else now) // period) * period
+    return datetime.fromtimestamp(start, timezone.utc).isoformat(timespec="minutes")
+
+
+def section_date_buckets(now: Optional[float] = None) -> dict[str, Optional[str]]:
+    """Current refresh period of every section with one, keyed by section."""
+    return {section: date_bucket(section, now) for section in settings.archive.section_refresh_hours}
+
+
+def section_fingerprint(section: str, inputs: dict[str, Any]) -> str:
+    """Hashes everything a report section is generated from.
+
+    Parameters
+    ----------
+    section : str
+        The section name (`analysis`, `peers`, `comparison`, `context`,
+        `news` or `polishing`).
+    inputs : dict[str, Any]
+        The section's own inputs, e.g. the snapshot hash for the analysis,
+        the analysis text and peer set for the comparison.
+
+    Returns
+    -------
+    str
+        A hash of the inputs, of the prompts and models the section is
+        written with, and of its current date bucket (see `date_bucket`).
+    """
+    prefixes = _SECTION_PROMPTS.get(section, ())
+    prompts = {name: text for name, text in _prompt_sources().items() if name.startswith(prefixes)} if prefixes else {}
+    return _digest(
+        {
+            "format": ARCHIVE_FORMAT_VERSION,
+            "section": section,
+            "inputs": inputs,
+            "prompts": prompts,
+            "models": {role: settings.model_for_role(role).model_dump() for role in _SECTION_ROLES.get(section, ())},
+            "base_url": settings.BASE_URL,
+            "date_bucket": date_bucket(section),
+        }
+    )
+
+
+def archive_key(
+    command: str,
+    snapshot_digest: str,
+    configuration_digest: str,
+    date_buckets: Optional[dict[str, Optional[str]]] = None,
+) -> str:
+    """Combines a command and the hashes of its inputs into an archive key.
+
+    `date_buckets` ties the key to the current refresh periods of the report
+    sections (see `section_date_buckets`), for reports with time-dependent
+    sections such as the news.
+    """
+    inputs: dict[str, Any] = {"command": command, "snapshot": snapshot_digest, "config": configuration_digest}
+    if date_buckets:
+        inputs["date_buckets"] = date_buckets
+    return _digest(inputs)
+
+
+class ReportArchive:
+    """
+    SQLite database of compressed reports, safe to share between threads and processes.
+
+    Parameters
+    ----------
+    path : Optional[str], optional
+        Database file, created if needed. Defaults to `archive.path`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.archive.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _to_report(row: sqlite3.Row, with_content: bool) -> ArchivedReport:
+        report = ArchivedReport(
+            key=row["key"],
+            ticker=row["ticker"],
+            command=row["command"],
+            created_utc=datetime.fromtimestamp(row["created_at"], timezone.utc).isoformat(timespec="seconds"),
+            config_hash=row["config_hash"],
+            snapshot_hash=row["snapshot_hash"],
+            size=row["size"],
+        )
+        if with_content:
+            report.content = zlib.decompress(row["content"]).decode("utf-8")
+        return report
+
+    def get(self, key: str) -> Optional[ArchivedReport]:
+        """Returns the archived report with this key, including its content, if any."""
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM reports WHERE key = ?", (key,)).fetchone()
+        return self._to_report(row, with_content=True) if row else None
+
+    def put(
+        self, key: str, ticker: str, command: str, content: str, config_digest: str, snapshot_digest: str
+    ) -> None:
+        """Archives a report, replacing any report with the same key."""
+        now = time.time()
+        data = content.encode("utf-8")
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO reports "
+                "(key, ticker, command, created_at, created_date, config_hash, snapshot_hash, size, content) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    ticker,
+                    command,
+                    now,
+                    datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d"),
+                    config_digest,
+                    snapshot_digest,
+                    len(data),
+                    zlib.compress(data, 6),
+                ),
+            )
+
+    def find(
+        self,
+        ticker: Optional[str] = None,
+        command: Optional[str] = None,
+        since: Optional[str] = None,
+        config_digest: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[ArchivedReport]:
+        """Lists archived reports, newest first, without their content.
+
+        Parameters
+        ----------
+        ticker, command : Optional[str], optional
+            Only reports for this ticker / command.
+        since : Optional[str], optional
+            Only reports created on or after this date (`YYYY-MM-DD`).
+        config_digest : Optional[str], optional
+            Only reports generated with this configuration hash.
+        limit : int, optional
+            Maximum number of reports returned. Defaults to 50.
+        """
+        clauses, parameters = [], []
+        for column, value in (("ticker", ticker), ("command", command), ("config_hash", config_digest)):
+            if value:
+                clauses.append(f"{column} = ?")
+                parameters.append(value)
+        if since:
+            clauses.append("created_date >= ?")
+            parameters.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT key, ticker, command, created_at, config_hash, snapshot_hash, size FROM reports "
+                f"{where} ORDER BY created_at DESC LIMIT ?",
+                (*parameters, limit),
+            ).fetchall()
+        return [self._to_report(row, with_content=False) for row in rows]
+
+    def get_section(self, fingerprint: str) -> Optional[str]:
+        """Returns the stored content of the report section with this fingerprint, if any."""
+        with self._connect() as connection:
+            row = connection.execute("SELECT content FROM sections WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return zlib.decompress(row["content"]).decode("utf-8") if row else None
+
+    def put_section(self, fingerprint: str, ticker: str, section: str, content: str) -> None:
+        """Stores a report section under the fingerprint of its inputs."""
+        data = content.encode("utf-8")
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sections (fingerprint, ticker, section, created_at, size, content) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, ticker, section, time.time(), len(data), zlib.compress(data, 6)),
+            )
+
+
+_archive: Optional[ReportArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_report_archive() -> ReportArchive:
+    """Returns the process-wide report archive, opening it from settings on first use."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ReportArchive()
+        return _archive
+
+
+def _reset_report_archive() -> None:
+    global _archive
+    with _archive_lock:
+        _archive = None
+
+
+register_reset_hook(_reset_report_archive)
@@ -0,0 +1,258 @@
+"""
+Run one report operation over many tickers with bounded concurrency.
+
+Each ticker's output is written to its own file in an output directory, via a
+temporary file and an atomic rename, so an interrupted batch never leaves
+partial reports. Re-running the same batch skips tickers whose output is still
+fresh, which makes nightly jobs resumable. Full reports with sections missing
+because of a deadline overrun are written next to it, as
+`<TICKER>.fullreport.partial.md`, so they are regenerated on the next run.
+"""
+
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Literal, Optional
+
+from pydantic import BaseModel
+
+from apex_fin.operations import OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FILENAME = "batch_summary.json"
+
+
+class TickerOutcome(BaseModel):
+    ticker: str
+    status: Literal["ok", "partial", "skipped", "failed"]
+    duration_seconds: float = 0.0
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchSummary(BaseModel):
+    command: str
+    started_utc: str
+    wall_seconds: float
+    concurrency: int
+    outcomes: list[TickerOutcome]
+
+    def _with_status(self, status: str) -> list[TickerOutcome]:
+        return [outcome for outcome in self.outcomes if outcome.status == status]
+
+    @property
+    def succeeded(self) -> list[TickerOutcome]:
+        return self._with_status("ok")
+
+    @property
+    def partial(self) -> list[TickerOutcome]:
+        return self._with_status("partial")
+
+    @property
+    def skipped(self) -> list[TickerOutcome]:
+        return self._with_status("skipped")
+
+    @property
+    def failed(self) -> list[TickerOutcome]:
+        return self._with_status("failed")
+
+    @property
+    def throughput_per_minute(self) -> float:
+        """Tickers processed (succeeded, partial or failed) per minute of wall time."""
+        processed = len(self.succeeded) + len(self.partial) + len(self.failed)
+        return processed / self.wall_seconds * 60 if self.wall_seconds > 0 else 0.0
+
+    def format(self) -> str:
+        """Formats the throughput and failure statistics for display."""
+        durations = [outcome.duration_seconds for outcome in self.succeeded]
+        lines = [
+            f"Batch '{self.command}': {len(self.outcomes)} ticker(s) in {self.wall_seconds:.1f}s "
+            f"(concurrency {self.concurrency})",
+            f"  succeeded: {len(self.succeeded)}  partial: {len(self.partial)}  skipped (fresh): {len(self.skipped)}  "
+            f"failed: {len(self.failed)}",
+            f"  throughput: {self.throughput_per_minute:.1f} ticker(s)/min",
+        ]
+        if durations:
+            lines.append(
+                f"  per ticker: median {statistics.median(durations):.1f}s, max {max(durations):.1f}s"
+            )
+        if self.outcomes and len(self.skipped) < len(self.outcomes):
+            failure_rate = len(self.failed) / (len(self.outcomes) - len(self.skipped))
+            lines.append(f"  failure rate: {failure_rate:.1%}")
+        for outcome in self.partial:
+            lines.append(f"  PARTIAL {outcome.ticker}: {outcome.error}")
+        for outcome in self.failed:
+            lines.append(f"  FAILED {outcome.ticker}: {outcome.error}")
+        return "\n".join(lines)
+
+
+def read_tickers(lines: Iterable[str]) -> list[str]:
+    """Parses tickers from lines of text, one or more per line.
+
+    Tickers may be separated by whitespace or commas. Blank lines and text
+    after `#` are ignored, and repeated tokens are dropped, keeping the first
+    occurrence. Tokens are returned as written: callers that normalize them
+    (e.g. with `sanitize_ticker`) deduplicate again afterwards.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        Lines read from a file or stdin.
+
+    Returns
+    -------
+    list[str]
+        The tickers, in input order.
+    """
+    tickers: list[str] = []
+    for line in lines:
+        for token in line.split("#", 1)[0].replace(",", " ").split():
+            if token not in tickers:
+                tickers.append(token)
+    return tickers
+
+
+def output_path_for(output_dir: Path, ticker: str, command: str) -> Path:
+    """Returns the output file of `command` for `ticker`."""
+    return output_dir / f"{ticker}.{command}.md"
+
+
+def partial_path_for(path: Path) -> Path:
+    """Returns the file an incomplete full report is written to instead of `path`."""
+    return path.with_suffix(".partial.md")
+
+
+def is_fresh(path: Path, max_age_hours: Optional[float]) -> bool:
+    """Whether `path` exists and was written less than `max_age_hours` ago (None: any age)."""
+    try:
+        modified = path.stat().st_mtime
+    except OSError:
+        return False
+    return max_age_hours is None or time.time() - modified < max_age_hours * 3600
+
+
+def _report_is_complete(content: str) -> bool:
+    from apex_fin.agents.full_report_agent import report_is_complete
+
+    return report_is_complete(content)
+
+
+def _write_atomically(path: Path, content: str) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def run_batch(
+    tickers: list[str],
+    command: str,
+    output_dir: Path,
+    concurrency: int = 4,
+    max_age_hours: Optional[float] = 24.0,
+    force: bool = False,
+    on_outcome: Optional[Callable[[TickerOutcome], None]] = None,
+    ticker_kwargs: Optional[dict[str, dict[str, Any]]] = None,
+    **operation_kwargs,
+) -> BatchSummary:
+    """Runs `command` for every ticker, writing one Markdown file per ticker.
+
+    Parameters
+    ----------
+    tickers : list[str]
+        The tickers to process.
+    command : str
+        One of `OPERATIONS` (`analyze`, `compare`, `think`, `fullreport`).
+    output_dir : Path
+        Directory receiving `<TICKER>.<command>.md` files and `batch_summary.json`.
+    concurrency : int, optional
+        Maximum number of tickers processed at the same time. Defaults to 4.
+    max_age_hours : Optional[float], optional
+        Existing outputs younger than this are kept and the ticker skipped.
+        None keeps outputs of any age. Defaults to 24.
+    force : bool, optional
+        Regenerate every ticker, even with fresh output. Defaults to False.
+    on_outcome : Optional[Callable[[TickerOutcome], None]], optional
+        Called as soon as each ticker finishes, e.g. to report progress.
+    ticker_kwargs : Optional[dict[str, dict[str, Any]]], optional
+        Extra arguments for the operation of individual tickers (e.g. an
+        already fetched `snapshot`), added to `operation_kwargs`.
+    **operation_kwargs
+        Extra arguments for the operation (e.g. `deadline_seconds` for `fullreport`).
+
+    Returns
+    -------
+    BatchSummary
+        The outcome of every ticker and the batch statistics. The summary is
+        also written to `batch_summary.json` in `output_dir`.
+
+    Raises
+    ------
+    ValueError
+        If `command` is unknown or `concurrency` is not positive.
+    """
+    if command not in OPERATIONS:
+        raise ValueError(f"Unknown command '{command}'. Choose one of: {', '.join(OPERATIONS)}.")
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1.")
+    operation = OPERATIONS[command]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started_utc = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    batch_start = time.perf_counter()
+
+    def _process(ticker: str) -> TickerOutcome:
+        path = output_path_for(output_dir, ticker, command)
+        if not force and is_fresh(path, max_age_hours):
+            return TickerOutcome(ticker=ticker, status="skipped", output_path=str(path))
+        start = time.perf_counter()
+        try:
+            content = operation(ticker, **operation_kwargs, **(ticker_kwargs or {}).get(ticker, {}))
+            if command == "fullreport" and not _report_is_complete(content):
+                # Kept out of the final name, so that `is_fresh` does not skip it on the next run.
+                partial_path = partial_path_for(path)
+                _write_atomically(partial_path, content)
+                logger.warning(f"Batch '{command}' for {ticker} is incomplete; written to {partial_path}.")
+                return TickerOutcome(
+                    ticker=ticker,
+                    status="partial",
+                    duration_seconds=time.perf_counter() - start,
+                    output_path=str(partial_path),
+                    error="sections missing because of a deadline overrun",
+                )
+            _write_atomically(path, content)
+            partial_path_for(path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.error(f"Batch '{command}' failed for {ticker}: {e}")
+            return TickerOutcome(
+                ticker=ticker, status="failed", duration_seconds=time.perf_counter() - start, error=str(e)
+            )
+        return TickerOutcome(
+            ticker=ticker, status="ok", duration_seconds=time.perf_counter() - start, output_path=str(path)
+        )
+
+    outcomes: dict[str, TickerOutcome] = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="apex-fin-batch") as executor:
+        futures = {executor.submit(_process, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            outcome = future.result()
+            outcomes[outcome.ticker] = outcome
+            if on_outcome is not None:
+                on_outcome(outcome)
+
+    summary = BatchSummary(
+        command=command,
+        started_utc=started_utc,
+        wall_seconds=time.perf_counter() - batch_start,
+        concurrency=concurrency,
+        outcomes=[outcomes[ticker] for ticker in tickers],
+    )
+    summary_data = summary.model_dump()
+    summary_data["throughput_per_minute"] = summary.throughput_per_minute
+    _write_atomically(output_dir / SUMMARY_FILENAME, json.dumps(summary_data, indent=2))
+    return summary
@@ -0,0 +1,513 @@
+"""
+Concurrent load test of the report operations.
+
+Runs N `analyze`, `compare`, `think` or `fullreport` requests with a fixed
+concurrency, either in process (through `apex_fin.operations`) or against the
+HTTP service (`apex_fin.service`), and reports:
+
+- latency percentiles (p50, p95, p99) per operation and per stage: the
+  `fullreport` sections, the final assembly and, for the service, the time
+  spent queued before a worker picked the job up;
+- throughput and error rates;
+- the resident memory of this process (start, peak while running);
+- the calls computed and shared by each single-flight group (see
+  `apex_fin.utils.singleflight`), when the requests run in this process.
+
+By default the run is offline: the LLM is the local mock model (`--model`,
+see `apex_fin.agents.mock_model`) and Yahoo Finance responses are replayed
+from the benchmark fixtures, with stand-ins for tickers without a fixture.
+The report archive and the coalescing of concurrent identical calls are
+disabled, so every request does the full work; `--coalesce` measures the
+service's behavior instead, where concurrent requests for the same ticker
+share their fetches and sections.
+
+Usage:
+    python -m apex_fin.benchmarks.load --requests 40 --concurrency 8 --output load.json
+    python -m apex_fin.benchmarks.load --operations analyze fullreport --model mock/gemini-flash
+    python -m apex_fin.benchmarks.load --target http --serve --workers 4 --concurrency 16 --coalesce
+    python -m apex_fin.benchmarks.load --target http --url http://127.0.0.1:8000 --live-data --model none
+    python -m apex_fin.benchmarks.load --output new.json --compare load.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+from apex_fin.benchmarks.startup import DEFAULT_FIXTURES_DIR, _git_commit, load_fixtures, replay_fixtures
+from apex_fin.utils.singleflight import flight_stats, set_coalescing
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+class RequestResult(BaseModel):
+    operation: str
+    ticker: str
+    ok: bool
+    error: Optional[str] = None
+    total_seconds: float
+    # Stage name -> duration, in the order the stages finished
+    stages: dict[str, float] = {}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """The `q`-th percentile of `samples`, interpolated linearly between the closest ranks."""
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _latency_summary(samples: list[float]) -> dict[str, Any]:
+    summary: dict[str, Any] = {"count": len(samples), "mean_s": round(statistics.fmean(samples), 4)}
+    for q in PERCENTILES:
+        summary[f"p{q}_s"] = round(percentile(samples, q), 4)
+    summary["max_s"] = round(max(samples), 4)
+    return summary
+
+
+# Memory
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, where `/proc` is available."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process over its lifetime, as reported by the OS."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """
+    Samples this process's resident memory in a background thread.
+
+    Parameters
+    ----------
+    interval_seconds : float, optional
+        Time between two samples. Defaults to 0.05.
+    """
+
+    def __init__(self, interval_seconds: float = 0.05):
+        self.interval_seconds = interval_seconds
+        self.start_bytes = _current_rss_bytes()
+        self.peak_bytes = self.start_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="apex-fin-rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            current = _current_rss_bytes()
+            if current is not None and (self.peak_bytes is None or current > self.peak_bytes):
+                self.peak_bytes = current
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> dict[str, Optional[float]]:
+        to_mb = lambda value: round(value / 2**20, 1) if value is not None else None
+        return {
+            "rss_start_mb": to_mb(self.start_bytes),
+            "rss_peak_mb": to_mb(self.peak_bytes),
+            "max_rss_mb": to_mb(_max_rss_bytes()),
+        }
+
+
+# Targets
+
+
+def run_in_process(operation: str, ticker: str) -> RequestResult:
+    """Runs one operation through `apex_fin.operations`, timing each `fullreport` section."""
+    from apex_fin.operations import OPERATIONS
+
+    stages: dict[str, float] = {}
+    start = last = time.perf_counter()
+
+    def on_section(section: str, content: str) -> None:
+        nonlocal last
+        now = time.perf_counter()
+        stages[section] = now - last
+        last = now
+
+    kwargs = {"on_section": on_section} if operation == "fullreport" else {}
+    try:
+        OPERATIONS[operation](ticker, **kwargs)
+    except Exception as e:
+        return RequestResult(
+            operation=operation, ticker=ticker, ok=False, error=f"{type(e).__name__}: {e}",
+            total_seconds=time.perf_counter() - start, stages=stages,
+        )
+    end = time.perf_counter()
+    if stages:
+        stages["assembly"] = end - last
+    return RequestResult(operation=operation, ticker=ticker, ok=True, total_seconds=end - start, stages=stages)
+
+
+def run_over_http(base_url: str, operation: str, ticker: str, timeout: float = 600.0) -> RequestResult:
+    """Runs one operation on the HTTP service, timing its NDJSON events as they arrive.
+
+    The `queue` stage is the time from sending the request to the job
+    starting, which includes the wait for a free service worker.
+    """
+    import http.client
+
+    url = urlsplit(base_url)
+    stages: dict[str, float] = {}
+    start = last = time.perf_counter()
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+    try:
+        connection.request(
+            "POST",
+            f"{url.path.rstrip('/')}/{operation}?stream=true",
+            body=json.dumps({"ticker": ticker}),
+            headers={"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        if response.status != 200:
+            error = f"HTTP {response.status}: {response.read().decode('utf-8', 'replace')[:200]}"
+            return RequestResult(
+                operation=operation, ticker=ticker, ok=False, error=error, total_seconds=time.perf_counter() - start
+            )
+        for line in response:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            now = time.perf_counter()
+            kind = event["event"]
+            if kind == "running":
+                stages["queue"] = now - last
+            elif kind == "section":
+                stages[event["section"]] = now - last
+            elif kind in ("succeeded", "failed"):
+                if any(name != "queue" for name in stages):
+                    stages["assembly"] = now - last
+                return RequestResult(
+                    operation=operation, ticker=ticker, ok=kind == "succeeded", error=event.get("error"),
+                    total_seconds=now - start, stages=stages,
+                )
+            else:  # queued, heartbeat
+                continue
+            last = now
+        return RequestResult(
+            operation=operation, ticker=ticker, ok=False, error="Event stream ended before the job finished.",
+            total_seconds=time.perf_counter() - start, stages=stages,
+        )
+    except Exception as e:
+        return RequestResult(
+            operation=operation, ticker=ticker, ok=False, error=f"{type(e).__name__}: {e}",
+            total_seconds=time.perf_counter() - start, stages=stages,
+        )
+    finally:
+        connection.close()
+
+
+@contextmanager
+def local_service(workers: int) -> Iterator[str]:
+    """Starts the HTTP service in this process, on a free local port, and yields its URL."""
+    from apex_fin.service import ApexFinServer, JobManager, warm_up
+
+    warm_up()
+    jobs = JobManager(workers=workers)
+    server = ApexFinServer(("127.0.0.1", 0), jobs)
+    thread = threading.Thread(target=server.serve_forever, name="apex-fin-load-service", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        jobs.shutdown()
+
+
+# Settings
+
+
+def load_test_settings(model: Optional[str], use_archive: bool = False) -> None:
+    """Applies the load-test settings on top of `apex_fin.yaml`.
+
+    Parameters
+    ----------
+    model : Optional[str]
+        Model used for every role, e.g. `mock/fast`. None keeps the
+        configured models.
+    use_archive : bool, optional
+        Whether to keep the report archive and section reuse enabled.
+        Defaults to False, so every request does the full work.
+    """
+    from apex_fin.config import configure, load_user_config
+
+    user = load_user_config()
+    if model is not None:
+        user.llm.model = model
+        for role_config in user.llm.roles.values():
+            role_config.model = None
+    if not use_archive:
+        user.archive.enabled = False
+        user.archive.sections = False
+    configure(user=user)
+
+
+# Run and report
+
+
+def run_load_test(
+    operations: list[str],
+    tickers: list[str],
+    requests: int,
+    concurrency: int,
+    target: str = "inprocess",
+    url: Optional[str] = None,
+    warmup: int = 1,
+) -> tuple[list[RequestResult], float, dict[str, Any], dict[str, dict[str, int]]]:
+    """Runs the requests and returns their results, the wall time, the memory summary and the single-flight counts.
+
+    Requests cycle through `operations` and `tickers`. The `warmup` first
+    requests run sequentially before the measurement and are not reported.
+    The single-flight counts are those of this process during the measurement.
+    """
+    if target == "http" and not url:
+        raise ValueError("The http target needs the service URL.")
+
+    def _one(index: int) -> RequestResult:
+        operation, ticker = operations[index % len(operations)], tickers[index % len(tickers)]
+        if target == "http":
+            return run_over_http(url, operation, ticker)
+        return run_in_process(operation, ticker)
+
+    for index in range(warmup):
+        result = _one(index)
+        logger.info(f"Warm-up {result.operation} {result.ticker}: {'ok' if result.ok else result.error}")
+
+    flights_before = flight_stats()
+    with RSSSampler() as sampler, ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="apex-fin-load"
+    ) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(_one, range(requests)))
+        wall_seconds = time.perf_counter() - start
+    flights = {
+        name: {count: value - flights_before.get(name, {}).get(count, 0) for count, value in counts.items()}
+        for name, counts in sorted(flight_stats().items())
+    }
+    return results, wall_seconds, sampler.summary(), flights
+
+
+def summarize(results: list[RequestResult], wall_seconds: float) -> dict[str, Any]:
+    """Aggregates request results into latency percentiles, throughput and error rates."""
+    succeeded = [r for r in results if r.ok]
+    summary: dict[str, Any] = {
+        "wall_s": round(wall_seconds, 3),
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "error_rate": round((len(results) - len(succeeded)) / len(results), 4) if results else 0.0,
+        "throughput_rps": round(len(succeeded) / wall_seconds, 4) if wall_seconds > 0 else None,
+        "operations": {},
+        "errors": dict(Counter(r.error for r in results if not r.ok).most_common(10)),
+    }
+    by_operation: dict[str, list[RequestResult]] = defaultdict(list)
+    for result in results:
+        by_operation[result.operation].append(result)
+    for operation, op_results in sorted(by_operation.items()):
+        ok = [r for r in op_results if r.ok]
+        stages: dict[str, list[float]] = defaultdict(list)
+        for result in ok:
+            for stage, seconds in result.stages.items():
+                stages[stage].append(seconds)
+        summary["operations"][operation] = {
+            "requests": len(op_results),
+            "error_rate": round((len(op_results) - len(ok)) / len(op_results), 4),
+            "total": _latency_summary([r.total_seconds for r in ok]) if ok else None,
+            "stages": {stage: _latency_summary(samples) for stage, samples in stages.items()},
+        }
+    return summary
+
+
+def format_summary(report: dict[str, Any]) -> str:
+    """Formats a load-test report as a table of latency percentiles."""
+    results = report["results"]
+    lines = [
+        f"{results['requests']} requests, concurrency {report['config']['concurrency']}, "
+        f"{report['config']['target']} target: {results['wall_s']:.1f}s, "
+        f"{results['throughput_rps'] or 0:.2f} req/s, error rate {results['error_rate']:.1%}",
+        f"{'operation / stage':<32} {'count':>6} " + " ".join(f"{f'p{q}':>9}" for q in PERCENTILES) + f" {'max':>9}",
+    ]
+    for operation, data in results["operations"].items():
+        rows = [(operation, data["total"])] + [(f"  {stage}", summary) for stage, summary in data["stages"].items()]
+        for name, summary in rows:
+            if summary is None:
+                lines.append(f"{name:<32} {'-':>6}")
+                continue
+            cells = " ".join(f"{summary[f'p{q}_s']:8.3f}s" for q in PERCENTILES)
+            lines.append(f"{name:<32} {summary['count']:>6} {cells} {summary['max_s']:8.3f}s")
+    memory = report["memory"]
+    lines.append(f"RSS: {memory['rss_start_mb']} MB at start, {memory['rss_peak_mb']} MB peak")
+    if report.get("single_flight"):
+        lines.append(
+            f"Single-flight ({'on' if report['config']['coalescing'] else 'off'}): "
+            + "; ".join(
+                f"{name} {counts['executions']} computed, {counts['shared']} shared"
+                for name, counts in report["single_flight"].items()
+            )
+        )
+    for error, count in results["errors"].items():
+        lines.append(f"  {count} x {error}")
+    return "\n".join(lines)
+
+
+def _flatten(report: dict[str, Any]) -> dict[str, float]:
+    results = report.get("results", {})
+    metrics: dict[str, float] = {}
+    for name in ("throughput_rps", "error_rate"):
+        if results.get(name) is not None:
+            metrics[name] = results[name]
+    for operation, data in results.get("operations", {}).items():
+        rows = [("total", data.get("total"))] + list(data.get("stages", {}).items())
+        for stage, summary in rows:
+            for q in PERCENTILES[:2]:
+                if summary:
+                    metrics[f"{operation} {stage} p{q}_s"] = summary[f"p{q}_s"]
+    if report.get("memory", {}).get("rss_peak_mb") is not None:
+        metrics["rss_peak_mb"] = report["memory"]["rss_peak_mb"]
+    return metrics
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    """Formats a metric-by-metric comparison of two load-test reports."""
+    old, new = _flatten(baseline), _flatten(current)
+    lines = [f"{'metric':<48} {'baseline':>10} {'current':>10} {'ratio':>7}"]
+    for name in sorted(old.keys() | new.keys()):
+        before, after = old.get(name), new.get(name)
+        ratio = f"{after / before:6.2f}x" if before and after is not None else "    n/a"
+        fmt = lambda value: f"{value:10.3f}" if value is not None else f"{'-':>10}"
+        lines.append(f"{name:<48} {fmt(before)} {fmt(after)} {ratio}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--operations", nargs="+", default=["analyze", "compare", "fullreport"],
+        choices=["analyze", "compare", "think", "fullreport"], help="Operations, run in turn.",
+    )
+    parser.add_argument("--tickers", nargs="+", help="Tickers, used in turn. Defaults to the fixture tickers.")
+    parser.add_argument("--requests", "-n", type=int, default=20, help="Number of measured requests.")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Requests in flight at the same time.")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured requests run first.")
+    parser.add_argument("--target", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", help="Base URL of a running service, for the http target.")
+    parser.add_argument("--serve", action="store_true", help="Start the service in this process (http target).")
+    parser.add_argument("--workers", type=int, help="Workers of the service started by --serve.")
+    parser.add_argument(
+        "--model", default="mock/fast",
+        help="Model for every role (default mock/fast). 'none' keeps the models of apex_fin.yaml.",
+    )
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES_DIR, help="Snapshot fixtures directory.")
+    parser.add_argument("--live-data", action="store_true", help="Fetch Yahoo Finance data instead of fixtures.")
+    parser.add_argument("--archive", action="store_true", help="Keep the report archive and section reuse enabled.")
+    parser.add_argument(
+        "--coalesce", action="store_true",
+        help="Let concurrent identical calls share one computation, as the service does (in this process only).",
+    )
+    parser.add_argument("--output", "-o", type=Path, help="Write the report to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Print a comparison against an earlier report.")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Keep the agents' INFO logs.")
+    args = parser.parse_args(argv)
+
+    if args.target == "http" and not (args.url or args.serve):
+        parser.error("--target http needs --url or --serve.")
+
+    # LiteLLM otherwise downloads its model cost map on import.
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    model = None if args.model.lower() == "none" else args.model
+    load_test_settings(model, use_archive=args.archive)
+    fixtures = [] if args.live_data else load_fixtures(args.fixtures)
+    if not args.live_data and not fixtures:
+        parser.error(f"No fixture in {args.fixtures}; record some with `apex_fin.benchmarks.startup --record` or use --live-data.")
+    tickers = [t.upper() for t in args.tickers] if args.tickers else [f["input"].upper() for f in fixtures]
+    if not tickers:
+        parser.error("--tickers is required with --live-data.")
+
+    # Imports the agents before the measurement; the full report module also configures logging on import.
+    import apex_fin.agents.full_report_agent  # noqa: F401
+    import apex_fin.operations  # noqa: F401
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    set_coalescing(args.coalesce)
+
+    with ExitStack() as stack:
+        if fixtures:
+            stack.enter_context(replay_fixtures(fixtures))
+        url = args.url
+        if args.target == "http" and args.serve:
+            url = stack.enter_context(local_service(args.workers or args.concurrency))
+        results, wall_seconds, memory, flights = run_load_test(
+            args.operations, tickers, args.requests, args.concurrency, args.target, url, args.warmup
+        )
+
+    report = {
+        "commit": _git_commit(),
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "target": args.target,
+            "url": args.url,
+            "service_workers": (args.workers or args.concurrency) if args.serve else None,
+            "operations": args.operations,
+            "tickers": tickers,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "model": model,
+            "fixtures": not args.live_data,
+            "archive": args.archive,
+            "coalescing": args.coalesce,
+        },
+        "results": summarize(results, wall_seconds),
+        "memory": memory,
+        # A service at --url runs its single-flight groups in its own process.
+        "single_flight": flights if args.target == "inprocess" or args.serve else None,
+    }
+    print(format_summary(report))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Report written to {args.output}")
+    if args.compare:
+        print(compare_results(json.loads(args.compare.read_text(encoding="utf-8")), report))
+    return 0 if results and all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,432 @@
+"""
+Import-time and cold-start benchmarks.
+
+Measures how long the package takes to become ready and writes the results to
+a JSON file that can be compared across commits:
+
+- import time of each top-level module (`apex_fin.main`, `apex_fin.config`,
+  every `apex_fin.agents.*` module, `apex_fin.utils.yf_fetcher`), each in a
+  fresh interpreter;
+- construction time of each agent through its `build_*` factory;
+- cold (first call in a fresh process) versus warm time of
+  `YFinanceFinancialAnalyzer.get_financial_snapshot_dict`, replaying recorded
+  Yahoo Finance responses so the numbers do not depend on the network.
+
+Usage:
+    python -m apex_fin.benchmarks.startup --output bench.json
+    python -m apex_fin.benchmarks.startup --output new.json --compare bench.json
+    python -m apex_fin.benchmarks.startup --record AAPL MSFT   # refresh fixtures (network)
+
+Only the standard library is imported at module level, so the benchmark
+itself does not skew the import measurements.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = PACKAGE_DIR.parent.parent
+DEFAULT_FIXTURES_DIR = PROJECT_ROOT / "benchmarks" / "fixtures"
+
+EXTRA_IMPORT_MODULES = ("apex_fin.main", "apex_fin.config", "apex_fin.utils.yf_fetcher")
+
+
+def _subprocess_env(network_imports: bool) -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PACKAGE_DIR.parent), env.get("PYTHONPATH")]))
+    if not network_imports:
+        # LiteLLM otherwise downloads its model cost map on import, which measures the network.
+        env.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    return env
+
+
+def _summary(samples: list[float]) -> dict[str, Any]:
+    return {
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+        "runs": len(samples),
+    }
+
+
+def benchmark_modules() -> list[str]:
+    """Returns the modules whose import time is measured."""
+    agent_modules = sorted(
+        f"apex_fin.agents.{path.stem}"
+        for path in (PACKAGE_DIR / "agents").glob("*.py")
+        if path.stem != "__init__"
+    )
+    return [EXTRA_IMPORT_MODULES[0], EXTRA_IMPORT_MODULES[1], *agent_modules, EXTRA_IMPORT_MODULES[2]]
+
+
+def measure_import_times(modules: list[str], repeats: int, network_imports: bool = False) -> dict[str, Any]:
+    """Measures the import time of each module in a fresh interpreter.
+
+    Parameters
+    ----------
+    modules : list[str]
+        Dotted module names.
+    repeats : int
+        Number of fresh interpreters per module.
+    network_imports : bool, optional
+        Whether to let libraries reach the network at import time. Defaults to False.
+
+    Returns
+    -------
+    dict[str, Any]
+        Timing summary per module, or an `error` entry if the import fails.
+    """
+    env = _subprocess_env(network_imports)
+    results: dict[str, Any] = {}
+    for module in modules:
+        code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+        samples = []
+        for _ in range(repeats):
+            completed = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+            if completed.returncode != 0:
+                results[module] = {"error": completed.stderr.strip().splitlines()[-1:]}
+                break
+            samples.append(float(completed.stdout.strip().splitlines()[-1]))
+        else:
+            results[module] = _summary(samples)
+    return results
+
+
+def _agent_factories() -> dict[str, Callable[[], Any]]:
+    from apex_fin.agents.analysis_agent import build_auto_analysis_agent
+    from apex_fin.agents.comparison_agent import build_comparison_agent
+    from apex_fin.agents.competitor_agent import build_competitor_agent
+    from apex_fin.agents.evaluation_agent import build_batch_evaluation_agent, build_evaluation_agent
+    from apex_fin.agents.news_agent import build_financial_news_agent
+    from apex_fin.agents.refinement_agent import build_revision_agent
+    from apex_fin.agents.thinking_agent import build_thinking_agent
+
+    return {
+        "build_auto_analysis_agent": build_auto_analysis_agent,
+        "build_comparison_agent": build_comparison_agent,
+        "build_competitor_agent": build_competitor_agent,
+        "build_competitor_agent(use_search=False)": lambda: build_competitor_agent(use_search=False),
+        "build_evaluation_agent": build_evaluation_agent,
+        "build_batch_evaluation_agent": build_batch_evaluation_agent,
+        "build_financial_news_agent": build_financial_news_agent,
+        "build_revision_agent": build_revision_agent,
+        # A precomputed summary keeps the analysis LLM call out of the measurement.
+        "build_thinking_agent": lambda: build_thinking_agent(
+            "BENCH", precomputed_financial_summary="Benchmark financial summary."
+        ),
+    }
+
+
+def measure_agent_construction(repeats: int) -> dict[str, Any]:
+    """Measures the construction time of each agent factory, in this process.
+
+    The first construction of each factory is reported separately, as it
+    includes one-off work such as loading prompt files.
+
+    Parameters
+    ----------
+    repeats : int
+        Number of constructions per factory.
+
+    Returns
+    -------
+    dict[str, Any]
+        Timing summary per factory, or an `error` entry if construction fails.
+    """
+    results: dict[str, Any] = {}
+    for name, factory in _agent_factories().items():
+        samples = []
+        try:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                factory()
+                samples.append(time.perf_counter() - start)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        results[name] = {"first_s": round(samples[0], 4), **_summary(samples[1:] or samples)}
+    return results
+
+
+# Fixtures: recorded Yahoo Finance responses, replayed through yfinance's public entry points.
+
+
+def record_fixture(ticker: str, fixtures_dir: Path) -> Path:
+    """Fetches and records the Yahoo Finance responses used by a snapshot of `ticker`.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker symbol or company name, as given to `YFinanceFinancialAnalyzer`.
+    fixtures_dir : Path
+        Directory to write `<ticker>.json` to.
+
+    Returns
+    -------
+    Path
+        The fixture file.
+    """
+    import yfinance as yf
+
+    quotes = yf.Search(ticker, max_results=5).quotes
+    symbol = quotes[0]["symbol"] if quotes else ticker
+    yf_ticker = yf.Ticker(symbol)
+    recommendations = yf_ticker.recommendations
+    calendar = yf_ticker.calendar
+    fixture = {
+        "input": ticker,
+        "recorded_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "search_quotes": quotes,
+        "info": yf_ticker.info,
+        "recommendations": (
+            json.loads(recommendations.to_json(orient="split", date_format="iso"))
+            if recommendations is not None and not recommendations.empty
+            else None
+        ),
+        "calendar": calendar if isinstance(calendar, dict) else None,
+    }
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    path = fixtures_dir / f"{ticker.upper()}.json"
+    path.write_text(json.dumps(fixture, indent=2, default=str), encoding="utf-8")
+    return path
+
+
+def load_fixtures(fixtures_dir: Path) -> list[dict[str, Any]]:
+    """Reads every fixture written by `record_fixture` in `fixtures_dir`."""
+    return [json.loads(path.read_text(encoding="utf-8")) for path in sorted(fixtures_dir.glob("*.json"))]
+
+
+def _stand_in(fixture: dict[str, Any], symbol: str) -> dict[str, Any]:
+    """A copy of `fixture` presented as the company `symbol`, for tickers without a fixture."""
+    name = f"{symbol} (stand-in)"
+    quotes = [dict(quote, symbol=symbol, shortname=name, longname=name) for quote in fixture["search_quotes"][:1]]
+    return dict(
+        fixture,
+        input=symbol,
+        search_quotes=quotes,
+        info=dict(fixture["info"], symbol=symbol, longName=name, shortName=name),
+    )
+
+
+@contextmanager
+def replay_fixtures(fixtures: list[dict[str, Any]]) -> Iterator[None]:
+    """Serves `yfinance.Search` and `yfinance.Ticker` from recorded fixtures.
+
+    A query or symbol is matched against each fixture's input and symbol.
+    Unknown ones get a stand-in: the first fixture, renamed to the requested
+    symbol, so that any ticker (e.g. a competitor) resolves offline.
+    """
+    import pandas as pd
+    import yfinance as yf
+    from io import StringIO
+
+    by_key: dict[str, dict[str, Any]] = {}
+    for fixture in fixtures:
+        keys = [fixture["input"], fixture["info"].get("symbol")]
+        keys += [quote.get("symbol") for quote in fixture["search_quotes"][:1]]
+        for key in filter(None, keys):
+            by_key.setdefault(key.strip().upper(), fixture)
+
+    def _lookup(query: str) -> dict[str, Any]:
+        key = query.strip().upper()
+        return by_key.get(key) or _stand_in(fixtures[0], key)
+
+    class _RecordedSearch:
+        def __init__(self, query: str, max_results: int = 8, **kwargs):
+            self.quotes = _lookup(query)["search_quotes"][:max_results]
+
+    class _RecordedTicker:
+        def __init__(self, symbol: str, *args, **kwargs):
+            fixture = _lookup(symbol)
+            self.ticker = symbol
+            self.info = dict(fixture["info"])
+            recorded = fixture.get("recommendations")
+            self.recommendations = (
+                pd.read_json(StringIO(json.dumps(recorded)), orient="split") if recorded else pd.DataFrame()
+            )
+            self.calendar = fixture.get("calendar") or {}
+
+    original = yf.Search, yf.Ticker
+    yf.Search, yf.Ticker = _RecordedSearch, _RecordedTicker
+    try:
+        yield
+    finally:
+        yf.Search, yf.Ticker = original
+
+
+@contextmanager
+def replay_fixture(fixture: dict[str, Any]) -> Iterator[None]:
+    """Serves `yfinance.Search` and `yfinance.Ticker` from a recorded fixture."""
+    with replay_fixtures([fixture]):
+        yield
+
+
+def _snapshot_worker(fixture_path: str, repeats: int) -> None:
+    """Runs in a fresh interpreter: prints cold and warm snapshot timings as JSON."""
+    fixture = json.loads(Path(fixture_path).read_text(encoding="utf-8"))
+
+    start = time.perf_counter()
+    from apex_fin.utils.yf_fetcher import YFinanceFinancialAnalyzer
+
+    import_s = time.perf_counter() - start
+    with replay_fixture(fixture):
+        start = time.perf_counter()
+        YFinanceFinancialAnalyzer(fixture["input"]).get_financial_snapshot_dict()
+        cold_s = time.perf_counter() - start
+        warm = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            YFinanceFinancialAnalyzer(fixture["input"]).get_financial_snapshot_dict()
+            warm.append(time.perf_counter() - start)
+    print(json.dumps({"import_s": import_s, "cold_s": cold_s, "warm": warm}))
+
+
+def measure_snapshot_times(fixtures_dir: Path, repeats: int, network_imports: bool = False) -> dict[str, Any]:
+    """Measures cold and warm `get_financial_snapshot_dict` times for every recorded fixture.
+
+    Each fixture runs in a fresh interpreter. `cold_s` is the first call after
+    importing the fetcher (its import time is reported as `import_s`), and
+    `warm` summarizes the following calls in the same process.
+
+    Parameters
+    ----------
+    fixtures_dir : Path
+        Directory containing fixtures written by `record_fixture`.
+    repeats : int
+        Number of warm calls.
+    network_imports : bool, optional
+        Whether to let libraries reach the network at import time. Defaults to False.
+
+    Returns
+    -------
+    dict[str, Any]
+        Timings per fixture, keyed by fixture name.
+    """
+    results: dict[str, Any] = {}
+    for path in sorted(fixtures_dir.glob("*.json")):
+        code = f"from apex_fin.benchmarks.startup import _snapshot_worker; _snapshot_worker({str(path)!r}, {repeats})"
+        completed = subprocess.run(
+            [sys.executable, "-c", code], env=_subprocess_env(network_imports), capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            results[path.stem] = {"error": completed.stderr.strip().splitlines()[-1:]}
+            continue
+        timings = json.loads(completed.stdout.strip().splitlines()[-1])
+        results[path.stem] = {
+            "import_s": round(timings["import_s"], 4),
+            "cold_s": round(timings["cold_s"], 4),
+            "warm": _summary(timings["warm"]),
+        }
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def run_benchmarks(
+    import_repeats: int = 5,
+    construction_repeats: int = 20,
+    snapshot_repeats: int = 20,
+    fixtures_dir: Path = DEFAULT_FIXTURES_DIR,
+    network_imports: bool = False,
+) -> dict[str, Any]:
+    """Runs every benchmark and returns the results as a JSON-serializable dict."""
+    return {
+        "commit": _git_commit(),
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "network_imports": network_imports,
+        "imports": measure_import_times(benchmark_modules(), import_repeats, network_imports),
+        "agent_construction": measure_agent_construction(construction_repeats),
+        "snapshot": measure_snapshot_times(fixtures_dir, snapshot_repeats, network_imports),
+    }
+
+
+def _flatten(results: dict[str, Any]) -> dict[str, float]:
+    metrics: dict[str, float] = {}
+    for module, timing in results.get("imports", {}).items():
+        if "median_s" in timing:
+            metrics[f"import {module}"] = timing["median_s"]
+    for factory, timing in results.get("agent_construction", {}).items():
+        if "median_s" in timing:
+            metrics[f"construct {factory}"] = timing["median_s"]
+    for fixture, timing in results.get("snapshot", {}).items():
+        if "cold_s" in timing:
+            metrics[f"snapshot {fixture} cold"] = timing["cold_s"]
+            metrics[f"snapshot {fixture} warm"] = timing["warm"]["median_s"]
+    return metrics
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    """Formats a metric-by-metric comparison of two benchmark results."""
+    old, new = _flatten(baseline), _flatten(current)
+    lines = [f"{'metric':<60} {'baseline':>10} {'current':>10} {'ratio':>7}"]
+    for name in sorted(old.keys() | new.keys()):
+        before, after = old.get(name), new.get(name)
+        ratio = f"{after / before:6.2f}x" if before and after is not None else "    n/a"
+        fmt = lambda value: f"{value * 1000:8.1f}ms" if value is not None else f"{'-':>10}"
+        lines.append(f"{name:<60} {fmt(before)} {fmt(after)} {ratio}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Print a comparison against an earlier results file.")
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES_DIR, help="Snapshot fixtures directory.")
+    parser.add_argument("--import-repeats", type=int, default=5)
+    parser.add_argument("--construction-repeats", type=int, default=20)
+    parser.add_argument("--snapshot-repeats", type=int, default=20)
+    parser.add_argument(
+        "--network-imports",
+        action="store_true",
+        help="Let libraries fetch remote data at import time (e.g. the LiteLLM cost map).",
+    )
+    parser.add_argument("--record", nargs="+", metavar="TICKER", help="Record fixtures for these tickers and exit.")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        for ticker in args.record:
+            print(f"Recorded {record_fixture(ticker, args.fixtures)}")
+        return 0
+
+    if not args.network_imports:
+        os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    results = run_benchmarks(
+        import_repeats=args.import_repeats,
+        construction_repeats=args.construction_repeats,
+        snapshot_repeats=args.snapshot_repeats,
+        fixtures_dir=args.fixtures,
+        network_imports=args.network_imports,
+    )
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(serialized + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+    else:
+        print(serialized)
+    if args.compare:
+        print(compare_results(json.loads(args.compare.read_text(encoding="utf-8")), results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
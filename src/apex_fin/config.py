@@ -1,4 +1,5 @@
-from typing import Optional
+import threading
+from typing import Any, Callable, Optional
 from pathlib import Path
 from pydantic import BaseModel, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -7,7 +8,9 @@ import yaml
 
 # Environment Settings (.env)
 class EnvSettings(BaseSettings):
-    GEMINI_API_KEY: str
+    # Optional so that the package can be imported and configured without a key;
+    # LLM calls fail at request time when it is missing.
+    GEMINI_API_KEY: Optional[str] = None
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
@@ -40,17 +43,98 @@ class RiskConfig(BaseModel):
         return v
 
 
+# Agent roles that can be routed to their own model in apex_fin.yaml (llm.roles)
+AGENT_ROLES = (
+    "analysis",
+    "comparison",
+    "competitor",
+    "news",
+    "risk",
+    "team_leader",
+    "evaluation",
+    "polishing",
+    "refinement",
+)
+
+
+class ModelRoleConfig(BaseModel):
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    top_p: Optional[float] = None
+
+
+class ContextCachingConfig(BaseModel):
+    enabled: bool = False
+    min_prefix_tokens: int = 1024
+
+
+class MockProfile(BaseModel):
+    latency_seconds: float = 0.0
+    tokens_per_second: Optional[float] = None
+    jitter: float = 0.0
+    output_tokens: int = 400
+    tool_call_turns: int = 1
+
+
+class MockLLMConfig(BaseModel):
+    profiles: dict[str, MockProfile] = {}
+    responses: dict[str, str] = {}
+    tools: Optional[list[str]] = ["transfer_task_to_member", "forward_task_to_member", "think"]
+
+
+class TeamContextConfig(BaseModel):
+    enabled: bool = True
+    max_tokens: int = 8000
+    min_member_tokens: int = 300
+    strategy: str = "summarize"
+    priorities: dict[str, float] = {}
+
+    @field_validator("strategy")
+    @classmethod
+    def check_strategy(cls, v: str):
+        if v not in ("summarize", "truncate"):
+            raise ValueError(f"Unknown llm.team_context.strategy '{v}'. Valid strategies are: summarize, truncate.")
+        return v
+
+
 # YAML Configuration Schema
 class LLMOverrides(BaseModel):
     model: Optional[str] = None
     base_url: Optional[str] = None
+    roles: dict[str, ModelRoleConfig] = {}
+    context_caching: ContextCachingConfig = ContextCachingConfig()
+    mock: MockLLMConfig = MockLLMConfig()
+    team_context: TeamContextConfig = TeamContextConfig()
+
+    @field_validator("roles", mode="before")
+    @classmethod
+    def check_known_roles(cls, v: Optional[dict]):
+        if v is None:
+            return {}
+        if isinstance(v, dict):
+            unknown = [key for key in v if key not in AGENT_ROLES]
+            if unknown:
+                raise ValueError(
+                    f"Unknown agent role(s) in llm.roles: {', '.join(unknown)}. Valid roles are: {', '.join(AGENT_ROLES)}."
+                )
+        return v
 
 
 class ReportOverrides(BaseModel):
     markdown_template_path: Optional[str] = None
     enable_polishing: bool = True
+    use_template: bool = False
     include_context: bool = True
     include_news: bool = True
+    deadline_seconds: Optional[float] = None
+    section_weights: dict[str, float] = {
+        "analysis": 3.0,
+        "comparison": 4.0,
+        "context": 3.0,
+        "news": 1.5,
+        "polishing": 1.5,
+    }
 
 
 class PromptOverrides(BaseModel):
@@ -60,6 +144,70 @@ class PromptOverrides(BaseModel):
     evaluation: Optional[str] = None
     analysis_markdown: Optional[str] = None
     analysis_structured: Optional[str] = None
+    reload_check_seconds: float = 2.0
+
+
+class ComparisonOverrides(BaseModel):
+    mode: str = "auto"
+    cards_min_companies: int = 6
+    group_size: int = 10
+    concurrency: int = 8
+
+    @field_validator("mode")
+    @classmethod
+    def check_mode(cls, v: str):
+        if v not in ("auto", "summaries", "cards"):
+            raise ValueError(f"Unknown comparison.mode '{v}'. Valid modes are: auto, summaries, cards.")
+        return v
+
+
+class SearchOverrides(BaseModel):
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 900
+    cache_max_entries: int = 512
+
+
+class WatchOverrides(BaseModel):
+    interval_minutes: float = 60
+    price_move_pct: float = 3.0
+    target_change_pct: float = 5.0
+    metric_change_pct: float = 10.0
+    materiality_threshold: float = 1.0
+    recommendation_change: bool = True
+    earnings_passed: bool = True
+    state_dir: str = ".apex_fin/watch"
+    output_dir: str = "reports"
+    concurrency: int = 2
+
+
+class ServiceOverrides(BaseModel):
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 4
+    max_jobs: int = 1000
+    warmup: bool = True
+
+
+class QueueOverrides(BaseModel):
+    path: str = ".apex_fin/jobs.sqlite3"
+    workers: int = 4
+    lease_seconds: float = 300
+    max_attempts: int = 3
+    backoff_seconds: float = 30
+    backoff_max_seconds: float = 900
+    poll_seconds: float = 2
+
+
+class ArchiveOverrides(BaseModel):
+    enabled: bool = True
+    path: str = ".apex_fin/reports.sqlite3"
+    sections: bool = True
+    section_refresh_hours: dict[str, float] = {
+        "analysis": 24,
+        "comparison": 168,
+        "context": 24,
+        "news": 4,
+    }
 
 
 class UserOverrides(BaseModel):
@@ -67,6 +215,12 @@ class UserOverrides(BaseModel):
     report: ReportOverrides = ReportOverrides()
     prompts: PromptOverrides = PromptOverrides()
     risk: RiskConfig = RiskConfig()
+    comparison: ComparisonOverrides = ComparisonOverrides()
+    search: SearchOverrides = SearchOverrides()
+    watch: WatchOverrides = WatchOverrides()
+    service: ServiceOverrides = ServiceOverrides()
+    queue: QueueOverrides = QueueOverrides()
+    archive: ArchiveOverrides = ArchiveOverrides()
 
 
 # YAML Loader
@@ -92,13 +246,38 @@ class MergedSettings:
              raise ValueError("LLM model must be specified in apex_fin.yaml")
         return self.user.llm.model
 
+    def model_for_role(self, role: Optional[str] = None) -> ModelRoleConfig:
+        """Resolve the model and generation parameters for an agent role.
+
+        Roles without an entry in `llm.roles`, or entries without a `model`,
+        fall back to the global `llm.model`.
+        """
+        role_config = self.user.llm.roles.get(role) if role else None
+        if role_config is None:
+            return ModelRoleConfig(model=self.LLM_MODEL)
+        return role_config.model_copy(
+            update={"model": role_config.model or self.LLM_MODEL}
+        )
+
     @property
     def BASE_URL(self) -> Optional[str]:
         # BASE_URL is now only configured in apex_fin.yaml
         return self.user.llm.base_url
 
     @property
-    def GEMINI_API_KEY(self) -> str:
+    def context_caching(self) -> ContextCachingConfig:
+        return self.user.llm.context_caching
+
+    @property
+    def mock_llm(self) -> MockLLMConfig:
+        return self.user.llm.mock
+
+    @property
+    def team_context(self) -> TeamContextConfig:
+        return self.user.llm.team_context
+
+    @property
+    def GEMINI_API_KEY(self) -> Optional[str]:
         return self.env.GEMINI_API_KEY  # Always from .env
 
     @property
@@ -117,6 +296,22 @@ class MergedSettings:
     def report_include_news(self) -> bool:
         return self.user.report.include_news
 
+    @property
+    def report_use_template(self) -> bool:
+        return self.user.report.use_template
+
+    @property
+    def report_deadline_seconds(self) -> Optional[float]:
+        return self.user.report.deadline_seconds
+
+    @property
+    def report_section_weights(self) -> dict[str, float]:
+        return self.user.report.section_weights
+
+    @property
+    def prompt_reload_check_seconds(self) -> float:
+        return self.user.prompts.reload_check_seconds
+
     @property
     def prompt_paths(self) -> PromptOverrides:
         return self.user.prompts
@@ -133,8 +328,127 @@ class MergedSettings:
     def risk_tools(self) -> dict[str, list[str]]:
         return self.user.risk.tools
 
+    @property
+    def comparison(self) -> ComparisonOverrides:
+        return self.user.comparison
+
+    @property
+    def search_cache_enabled(self) -> bool:
+        return self.user.search.cache_enabled
+
+    @property
+    def search_cache_ttl_seconds(self) -> float:
+        return self.user.search.cache_ttl_seconds
+
+    @property
+    def search_cache_max_entries(self) -> int:
+        return self.user.search.cache_max_entries
+
+    @property
+    def watch(self) -> WatchOverrides:
+        return self.user.watch
+
+    @property
+    def service(self) -> ServiceOverrides:
+        return self.user.service
+
+    @property
+    def queue(self) -> QueueOverrides:
+        return self.user.queue
+
+    @property
+    def archive(self) -> ArchiveOverrides:
+        return self.user.archive
+
+
+# Lazily built runtime settings
+_active_settings: Optional[MergedSettings] = None
+_settings_lock = threading.Lock()
+_reset_hooks: list[Callable[[], None]] = []
+
+
+def get_settings() -> MergedSettings:
+    """Returns the active settings, building them from `.env` and `apex_fin.yaml` on first use.
+
+    Returns
+    -------
+    MergedSettings
+        The settings used by every agent and utility of the package.
+    """
+    global _active_settings
+    if _active_settings is None:
+        with _settings_lock:
+            if _active_settings is None:
+                _active_settings = MergedSettings(EnvSettings(), load_user_config())
+    return _active_settings
+
+
+def configure(
+    config_path: Optional[str] = None,
+    env: Optional[EnvSettings] = None,
+    user: Optional[UserOverrides] = None,
+) -> MergedSettings:
+    """Replaces the active settings, e.g. with a custom YAML file from `--config`.
+
+    Every module sees the new settings through `settings`, without being
+    re-imported. Caches built from the previous settings (search cache,
+    prompt registry) are reset.
+
+    Parameters
+    ----------
+    config_path : Optional[str], optional
+        Path of the YAML configuration file. Defaults to `apex_fin.yaml`.
+        Ignored when `user` is given.
+    env : Optional[EnvSettings], optional
+        Environment settings to use. Defaults to reading the environment and `.env`.
+    user : Optional[UserOverrides], optional
+        User settings to use instead of loading a YAML file.
+
+    Returns
+    -------
+    MergedSettings
+        The new active settings.
+    """
+    global _active_settings
+    new_settings = MergedSettings(env or EnvSettings(), user or load_user_config(config_path))
+    with _settings_lock:
+        _active_settings = new_settings
+    for hook in list(_reset_hooks):
+        hook()
+    return new_settings
+
+
+def register_reset_hook(hook: Callable[[], None]) -> None:
+    """Registers a function called whenever `configure` replaces the settings."""
+    _reset_hooks.append(hook)
+
+
+class _LazySettings:
+    """Forwards attribute access to the active settings, building them on first use.
+
+    Modules import this object once (`from apex_fin.config import settings`)
+    and always see the settings installed by the latest `configure` call.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+    def __repr__(self) -> str:
+        return f"<lazy settings: {get_settings()!r}>" if _active_settings else "<lazy settings: not loaded>"
+
+
+settings = _LazySettings()
+
 
-# Singleton Instantiation
-env_settings = EnvSettings()
-user_config = load_user_config()
-settings = MergedSettings(env_settings, user_config)
+def __getattr__(name: str) -> Any:
+    # Backward compatibility for the former import-time singletons.
+    if name == "env_settings":
+        return get_settings().env
+    if name == "user_config":
+        return get_settings().user
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
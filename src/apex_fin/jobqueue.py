@@ -0,0 +1,445 @@
+"""
+Persistent, SQLite-backed queue of report jobs, processed by a pool of worker processes.
+
+Jobs are rows in a SQLite database (`queue.path`), so they survive crashes and
+restarts. Workers are separate processes, so reports use several cores. A worker
+claims a job by taking a lease on it and renews the lease while the job runs. If
+the worker dies, the lease expires and another worker takes the job over. A
+failed attempt is retried with exponential backoff, up to `queue.max_attempts`.
+Each job records its status, number of attempts, timings and last error.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Literal, Optional
+
+from pydantic import BaseModel
+
+from apex_fin.config import QueueOverrides, settings
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    output_dir TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration_seconds REAL,
+    output_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at);
+"""
+
+
+class QueuedJob(BaseModel):
+    id: int
+    operation: str
+    ticker: str
+    options: dict[str, Any] = {}
+    output_dir: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    available_at: float
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class QueueStats(BaseModel):
+    counts: dict[str, int]
+    throughput_per_minute: float = 0.0
+    mean_duration_seconds: Optional[float] = None
+
+    def format(self) -> str:
+        """Formats the queue statistics for display."""
+        line = "  ".join(f"{status}: {count}" for status, count in self.counts.items())
+        lines = [f"Jobs  {line}"]
+        if self.mean_duration_seconds is not None:
+            lines.append(
+                f"  throughput: {self.throughput_per_minute:.1f} job(s)/min, "
+                f"mean duration {self.mean_duration_seconds:.1f}s"
+            )
+        return "\n".join(lines)
+
+
+class JobQueue:
+    """
+    The job table of a SQLite database, safe to share between processes.
+
+    Parameters
+    ----------
+    path : Optional[str], optional
+        Database file, created if needed. Defaults to `queue.path`.
+    config : Optional[QueueOverrides], optional
+        Attempts, lease and backoff settings. Defaults to the `queue` settings.
+    """
+
+    def __init__(self, path: Optional[str] = None, config: Optional[QueueOverrides] = None):
+        self.config = config or settings.queue
+        self.path = Path(path or self.config.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same job.
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> QueuedJob:
+        data = dict(row)
+        data["options"] = json.loads(data["options"] or "{}")
+        return QueuedJob.model_validate(data)
+
+    def enqueue(
+        self,
+        operation: str,
+        tickers: list[str],
+        output_dir: str,
+        max_attempts: Optional[int] = None,
+        **options: Any,
+    ) -> list[int]:
+        """Adds one job per ticker.
+
+        Parameters
+        ----------
+        operation : str
+            One of `OPERATIONS`.
+        tickers : list[str]
+            The tickers.
+        output_dir : str
+            Directory receiving the `<TICKER>.<operation>.md` files.
+        max_attempts : Optional[int], optional
+            Overrides `queue.max_attempts`.
+        **options
+            Extra arguments for the operation (e.g. `deadline_seconds`).
+
+        Returns
+        -------
+        list[int]
+            The ids of the new jobs.
+        """
+        now = time.time()
+        attempts = max_attempts or self.config.max_attempts
+        with self._transaction() as connection:
+            return [
+                connection.execute(
+                    "INSERT INTO jobs (operation, ticker, options, output_dir, max_attempts, available_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (operation, ticker, json.dumps(options), str(output_dir), attempts, now, now),
+                ).lastrowid
+                for ticker in tickers
+            ]
+
+    def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        """Leases the oldest job that is due, or whose previous worker lost its lease.
+
+        Returns
+        -------
+        Optional[QueuedJob]
+            The claimed job, or None if no job is available.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            # Jobs whose worker died on their last attempt are not retried again.
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_owner = NULL, "
+                "error = COALESCE(error, 'worker lost') || ' (lease expired on the last attempt)' "
+                "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = connection.execute(
+                "SELECT id FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires_at < ?) ORDER BY available_at, id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires_at = ?, started_at = ? WHERE id = ?",
+                (worker_id, now + self.config.lease_seconds, now, row["id"]),
+            )
+            return self._to_job(connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def renew(self, job_id: int, worker_id: str) -> bool:
+        """Extends the lease of a running job. Returns False if the worker no longer holds it."""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + self.config.lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, output_path: str) -> bool:
+        """Marks a job as succeeded. Returns False if the worker no longer held its lease."""
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'succeeded', finished_at = ?, duration_seconds = ? - started_at, "
+                "output_path = ?, error = NULL, lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (now, now, output_path, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[float]:
+        """Records a failed attempt, scheduling a retry with exponential backoff if attempts remain.
+
+        Returns
+        -------
+        Optional[float]
+            The delay before the retry, or None if the job is now failed for good
+            (or the worker no longer held its lease).
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (job_id, worker_id),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, duration_seconds = ? - started_at, "
+                    "error = ?, lease_owner = NULL, lease_expires_at = NULL WHERE id = ?",
+                    (now, now, error, job_id),
+                )
+                return None
+            delay = min(self.config.backoff_max_seconds, self.config.backoff_seconds * 2 ** (row["attempts"] - 1))
+            delay *= random.uniform(0.8, 1.2)  # jitter, so that jobs failing together do not retry together
+            connection.execute(
+                "UPDATE jobs SET status = 'queued', available_at = ?, error = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL WHERE id = ?",
+                (now + delay, error, job_id),
+            )
+            return delay
+
+    def retry_failed(self) -> int:
+        """Re-queues every failed job with a fresh set of attempts. Returns how many were re-queued."""
+        with self._connect() as connection:
+            return connection.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, finished_at = NULL "
+                "WHERE status = 'failed'",
+                (time.time(),),
+            ).rowcount
+
+    def jobs(self, status: Optional[str] = None) -> list[QueuedJob]:
+        """Lists the jobs, optionally only those with the given status."""
+        with self._connect() as connection:
+            if status is None:
+                rows = connection.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+            else:
+                rows = connection.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def pending(self) -> int:
+        """Number of jobs that are queued (possibly waiting for a retry) or running."""
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def stats(self) -> QueueStats:
+        """Counts jobs per status, and measures the throughput of succeeded jobs."""
+        with self._connect() as connection:
+            counts = {status: 0 for status in ("queued", "running", "succeeded", "failed")}
+            for row in connection.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["n"]
+            row = connection.execute(
+                "SELECT COUNT(*) AS n, MIN(started_at) AS first, MAX(finished_at) AS last, "
+                "AVG(duration_seconds) AS mean FROM jobs WHERE status = 'succeeded'"
+            ).fetchone()
+        stats = QueueStats(counts=counts)
+        if row["n"]:
+            elapsed = row["last"] - row["first"]
+            stats.throughput_per_minute = row["n"] / elapsed * 60 if elapsed > 0 else 0.0
+            stats.mean_duration_seconds = row["mean"]
+        return stats
+
+
+def process_job(queue: JobQueue, job: QueuedJob, worker_id: str) -> None:
+    """Runs one claimed job, renewing its lease while it runs, and records the outcome.
+
+    A worker that lost the lease, e.g. after a pause longer than
+    `queue.lease_seconds`, discards its result without writing the output:
+    the job now belongs to another worker.
+    """
+    from apex_fin.batch import _write_atomically, output_path_for
+    from apex_fin.operations import OPERATIONS
+
+    stop_renewing = threading.Event()
+    lease_lost = threading.Event()
+
+    def _renew_lease() -> None:
+        while not stop_renewing.wait(queue.config.lease_seconds / 3):
+            if not queue.renew(job.id, worker_id):
+                logger.warning(f"Worker {worker_id} lost the lease on job {job.id}; its result will be discarded.")
+                lease_lost.set()
+                return
+
+    renewer = threading.Thread(target=_renew_lease, name=f"lease-{job.id}", daemon=True)
+    renewer.start()
+    logger.info(f"Worker {worker_id}: job {job.id} ({job.operation} {job.ticker}), attempt {job.attempts}.")
+    try:
+        if job.operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{job.operation}'.")
+        content = OPERATIONS[job.operation](job.ticker, **job.options)
+        # The lease may also have expired since the last renewal.
+        if lease_lost.is_set() or not queue.renew(job.id, worker_id):
+            logger.warning(f"Worker {worker_id}: discarding the result of job {job.id} ({job.ticker}), lease lost.")
+            return
+        output_dir = Path(job.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_path_for(output_dir, job.ticker, job.operation)
+        _write_atomically(path, content)
+    except Exception as e:
+        stop_renewing.set()
+        delay = queue.fail(job.id, worker_id, str(e))
+        if delay is None:
+            logger.error(f"Worker {worker_id}: job {job.id} ({job.ticker}) failed for good: {e}")
+        else:
+            logger.warning(f"Worker {worker_id}: job {job.id} ({job.ticker}) failed, retrying in {delay:.0f}s: {e}")
+        return
+    finally:
+        stop_renewing.set()
+    if not queue.complete(job.id, worker_id, str(path)):
+        logger.warning(f"Worker {worker_id}: job {job.id} ({job.ticker}) was reassigned before it could be completed.")
+
+
+def work(
+    queue: JobQueue,
+    worker_id: str,
+    drain: bool = True,
+    stop: Optional[threading.Event] = None,
+) -> int:
+    """Claims and runs jobs until the queue is drained (or forever).
+
+    Parameters
+    ----------
+    queue : JobQueue
+        The queue.
+    worker_id : str
+        Identifies this worker in the leases.
+    drain : bool, optional
+        Stop once no job is queued or running. Otherwise keep polling for new
+        jobs. Defaults to True.
+    stop : Optional[threading.Event], optional
+        Stops the loop between two jobs when set.
+
+    Returns
+    -------
+    int
+        The number of jobs this worker ran.
+    """
+    processed = 0
+    while stop is None or not stop.is_set():
+        job = queue.claim(worker_id)
+        if job is None:
+            if drain and queue.pending() == 0:
+                break
+            time.sleep(queue.config.poll_seconds)
+            continue
+        process_job(queue, job, worker_id)
+        processed += 1
+    return processed
+
+
+def _worker_process(path: str, worker_id: str, user_settings: dict[str, Any], drain: bool) -> None:
+    from apex_fin.config import UserOverrides, configure
+
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s - {worker_id} - %(name)s - %(levelname)s - %(message)s")
+    # Worker processes start from a fresh interpreter: apply the parent's settings, including --config.
+    configure(user=UserOverrides.model_validate(user_settings))
+    try:
+        processed = work(JobQueue(path), worker_id, drain=drain)
+    except KeyboardInterrupt:
+        return
+    logger.info(f"Worker {worker_id} finished after {processed} job(s).")
+
+
+def run_workers(workers: Optional[int] = None, drain: bool = True, path: Optional[str] = None) -> QueueStats:
+    """Starts a pool of worker processes on the queue and waits for them.
+
+    Parameters
+    ----------
+    workers : Optional[int], optional
+        Number of worker processes. Defaults to `queue.workers`.
+    drain : bool, optional
+        Stop the workers once the queue is drained. Defaults to True.
+    path : Optional[str], optional
+        Database file. Defaults to `queue.path`.
+
+    Returns
+    -------
+    QueueStats
+        The queue statistics once the workers stopped.
+    """
+    queue = JobQueue(path)
+    workers = workers or settings.queue.workers
+    # "spawn" gives each worker a clean interpreter, without threads or locks copied from the parent.
+    context = multiprocessing.get_context("spawn")
+    user_settings = settings.user.model_dump()
+    processes = [
+        context.Process(
+            target=_worker_process,
+            args=(str(queue.path), f"worker-{os.getpid()}-{index}", user_settings, drain),
+            name=f"apex-fin-worker-{index}",
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children got the interrupt too; their running jobs are picked up again once their leases expire.
+        for process in processes:
+            process.join(timeout=5)
+    return queue.stats()
@@ -1,22 +1,16 @@
 """
 Typer-powered CLI for the Financial Agent application.
 Supports modular and team-based report generation workflows.
+
+Agent builders and the configuration are imported inside the commands that
+use them: agno, litellm, yfinance, pandas and pydantic take several seconds to
+import, which `--help` and argument errors should not pay for.
 """
 
 import typer
 import re
 import functools
 from typing import Optional, Any, Callable
-
-# Agent and Team builders
-from apex_fin.agents.analysis_agent import build_auto_analysis_agent, _fetch_financial_data_for_agent
-from apex_fin.agents.comparison_agent import compare_company
-from apex_fin.agents.full_report_agent import build_full_report
-from apex_fin.agents.thinking_agent import build_thinking_agent
-from apex_fin.teams.report_team import build_report_team
-
-# Configuration
-from apex_fin.config import load_user_config, env_settings, MergedSettings
 import logging
 
 app = typer.Typer(help="CLI to run AI-powered financial analysis reports.")
@@ -56,8 +50,8 @@ def main(
     Load optional YAML configuration at CLI startup.
 
     This callback function is executed before any command. It allows
-    users to specify a custom configuration file path, which will
-    override the default settings.
+    users to specify a custom configuration file path, which replaces
+    the settings seen by all agents.
 
     Parameters
     ----------
@@ -66,9 +60,10 @@ def main(
         If None, default configuration is used.
         Defaults to None.
     """
-    global settings
-    user_config = load_user_config(config_path)
-    settings = MergedSettings(env_settings, user_config)
+    if config_path:
+        from apex_fin.config import configure
+
+        configure(config_path)
 
 
 def _get_content_from_result(result: Any) -> str:
@@ -141,6 +136,8 @@ def handle_cli_errors(func: Callable) -> Callable:
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
+        except (typer.Exit, typer.Abort, typer.BadParameter):
+            raise  # Already carry their own message and exit code
         except Exception as e:
             typer.echo(f"[ERROR] Command failed: {e}", err=True)
             # For more detailed debugging, uncomment the next two lines:
@@ -166,28 +163,17 @@ def analyze(ticker: str) -> None:
         The stock ticker symbol for the company to analyze.
         Example: "AAPL", "MSFT".
     """
-    safe_ticker = sanitize_ticker(ticker)
-    typer.echo(f"Fetching financial data for {safe_ticker}...")
+    from apex_fin.operations import run_analyze
 
-    # Setup logger for _fetch_financial_data_for_agent
-    cli_logger = logging.getLogger("apex_fin.cli.analyze")
+    safe_ticker = sanitize_ticker(ticker)
     if not logging.getLogger().hasHandlers(): # Basic config if not already set up
         logging.basicConfig(
             level=logging.INFO,
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
 
-    input_json_str = _fetch_financial_data_for_agent(safe_ticker, cli_logger)
-
-    # Crude check for error in fetched data; _fetch_financial_data_for_agent returns a JSON string
-    if '"error":' in input_json_str and "Data pre-fetch failed" in input_json_str:
-        typer.echo(f"Error: Could not fetch financial data for {safe_ticker}. Details: {input_json_str}")
-        raise typer.Exit(code=1)
-
-    typer.echo(f"Running analysis for {safe_ticker}...")
-    agent = build_auto_analysis_agent()
-    response = agent.run(input_json_str) # Pass the pre-fetched JSON data string
-    typer.echo(_get_content_from_result(response))
+    typer.echo(f"Fetching financial data and running analysis for {safe_ticker}...")
+    typer.echo(_get_content_from_result(run_analyze(safe_ticker)))
 
 
 @app.command()
@@ -202,9 +188,10 @@ def compare(ticker: str) -> None:
         The stock ticker symbol for the primary company to compare.
         Example: "GOOGL", "TSLA".
     """
+    from apex_fin.operations import run_compare
+
     safe_ticker = sanitize_ticker(ticker)
-    report = compare_company(safe_ticker)
-    typer.echo(_get_content_from_result(report))
+    typer.echo(_get_content_from_result(run_compare(safe_ticker)))
 
 
 @app.command()
@@ -219,14 +206,10 @@ def think(ticker: str) -> None:
         The stock ticker symbol for which to perform contextual reasoning.
         Example: "NVDA", "VZ".
     """
+    from apex_fin.operations import run_think
+
     safe_ticker = sanitize_ticker(ticker)
-    # Directly use the thinking_agent for the 'think' command
-    agent = build_thinking_agent(safe_ticker)  # This agent is a Team
-    # The prompt here is for the Team's LLM to orchestrate its members.
-    # The internal instructions within build_thinking_agent guide the output structure.
-    prompt_for_thinking_team = f"Generate a comprehensive risk assessment for {safe_ticker} based on its financial summary."
-    response = agent.run(prompt_for_thinking_team)
-    typer.echo(_get_content_from_result(response))
+    typer.echo(_get_content_from_result(run_think(safe_ticker)))
 
 
 @app.command(name="fullreport")
@@ -239,6 +222,16 @@ def full_report(
         "-o",
         help="Optional path to write the report as a Markdown file.",
     ),
+    deadline: Optional[float] = typer.Option(
+        None,
+        "--deadline",
+        help="Time budget for the whole report, in seconds. Overrides `report.deadline_seconds`.",
+    ),
+    no_archive: bool = typer.Option(
+        False,
+        "--no-archive",
+        help="Generate a new report, and each of its sections, even if archived ones have the same inputs.",
+    ),
 ) -> None:
     """
     Run a complete financial report for a stock.
@@ -248,9 +241,21 @@ def full_report(
     ticker : str
         The stock ticker symbol for which to generate a full report.
         Example: "JPM", "XOM".
+    deadline : Optional[float]
+        Time budget for the whole report, in seconds. Sections that overrun
+        their share are replaced by a marked placeholder.
+    no_archive : bool
+        Bypass the report archive lookup and regenerate every section.
     """
+    from apex_fin.operations import run_fullreport
+
     safe_ticker = sanitize_ticker(ticker)
-    report = build_full_report(safe_ticker)
+    report = run_fullreport(
+        safe_ticker,
+        deadline_seconds=deadline,
+        use_archive=False if no_archive else None,
+        reuse_sections=False if no_archive else None,
+    )
     typer.echo(_get_content_from_result(report))
     if output:
         output.write(report)
@@ -259,6 +264,351 @@ def full_report(
         typer.echo(report)
 
 
+@app.command()
+@handle_cli_errors
+def batch(
+    command: str = typer.Argument(..., help="Command to run for each ticker: analyze, compare, think or fullreport."),
+    input_file: typer.FileText = typer.Option(
+        "-", "--input", "-i", help="File listing tickers (one or more per line, '#' for comments). Defaults to stdin."
+    ),
+    output_dir: str = typer.Option(
+        "reports", "--output-dir", "-d", help="Directory receiving one <TICKER>.<command>.md file per ticker."
+    ),
+    concurrency: int = typer.Option(4, "--concurrency", "-n", min=1, help="Tickers processed at the same time."),
+    max_age_hours: float = typer.Option(
+        24.0, "--max-age-hours", help="Skip tickers whose output is younger than this. Use 0 to regenerate all."
+    ),
+    force: bool = typer.Option(False, "--force", help="Regenerate every ticker, even with fresh output."),
+    deadline: Optional[float] = typer.Option(
+        None, "--deadline", help="Per-report time budget in seconds (fullreport only)."
+    ),
+) -> None:
+    """
+    Run one command across many tickers with bounded concurrency.
+
+    Each ticker's output is written to its own file in the output directory.
+    Re-running a batch skips tickers with fresh output, so an interrupted
+    batch resumes where it stopped. Throughput and failure statistics are
+    printed at the end and saved to `batch_summary.json`.
+
+    Parameters
+    ----------
+    command : str
+        The command to run for each ticker.
+    input_file : typer.FileText
+        Source of the tickers, a file or stdin.
+    output_dir : str
+        The output directory.
+    concurrency : int
+        Maximum number of tickers processed at the same time.
+    max_age_hours : float
+        Outputs younger than this are kept and their ticker skipped.
+    force : bool
+        Regenerate every ticker, ignoring existing outputs.
+    deadline : Optional[float]
+        Per-report deadline, passed to `fullreport`.
+    """
+    from pathlib import Path
+
+    from apex_fin.batch import read_tickers, run_batch
+    from apex_fin.operations import OPERATIONS
+
+    if command not in OPERATIONS:
+        raise typer.BadParameter(f"Choose one of: {', '.join(OPERATIONS)}.", param_hint="COMMAND")
+    # Deduplicated once sanitized, so that e.g. `aapl` and `AAPL` are one job.
+    tickers = list(dict.fromkeys(safe for safe in (sanitize_ticker(t) for t in read_tickers(input_file)) if safe))
+    if not tickers:
+        typer.echo("No tickers to process.", err=True)
+        raise typer.Exit(code=1)
+
+    operation_kwargs = {}
+    if deadline is not None:
+        if command != "fullreport":
+            raise typer.BadParameter("--deadline only applies to fullreport.", param_hint="--deadline")
+        operation_kwargs["deadline_seconds"] = deadline
+
+    typer.echo(f"Running '{command}' for {len(tickers)} ticker(s) with concurrency {concurrency}...", err=True)
+    summary = run_batch(
+        tickers,
+        command,
+        Path(output_dir),
+        concurrency=concurrency,
+        max_age_hours=max_age_hours if max_age_hours > 0 else None,
+        force=force or max_age_hours <= 0,
+        on_outcome=lambda outcome: typer.echo(f"[{outcome.status}] {outcome.ticker}", err=True),
+        **operation_kwargs,
+    )
+    typer.echo(summary.format())
+    if summary.failed or summary.partial:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+@handle_cli_errors
+def watch(
+    tickers: Optional[list[str]] = typer.Argument(None, help="Tickers to watch."),
+    watchlist: Optional[typer.FileText] = typer.Option(
+        None, "--watchlist", "-w", help="File listing tickers to watch (one or more per line, '#' for comments)."
+    ),
+    interval_minutes: Optional[float] = typer.Option(
+        None, "--interval-minutes", help="Minutes between two refreshes. Defaults to watch.interval_minutes."
+    ),
+    once: bool = typer.Option(False, "--once", help="Run a single refresh cycle and exit (e.g. from cron)."),
+    deadline: Optional[float] = typer.Option(None, "--deadline", help="Per-report time budget in seconds."),
+) -> None:
+    """
+    Watch tickers and regenerate their full report only when something moved.
+
+    Snapshots are refreshed periodically and compared with the snapshot of
+    each ticker's last report. Tickers crossing one of the `watch` thresholds
+    (price move, target price change, new analyst recommendations, earnings
+    date passed) get a new report in `watch.output_dir`; the others are left
+    untouched.
+
+    Parameters
+    ----------
+    tickers : Optional[list[str]]
+        Tickers given on the command line.
+    watchlist : Optional[typer.FileText]
+        File listing more tickers.
+    interval_minutes : Optional[float]
+        Overrides `watch.interval_minutes`.
+    once : bool
+        Run one cycle instead of looping.
+    deadline : Optional[float]
+        Per-report deadline, passed to `fullreport`.
+    """
+    from apex_fin.batch import read_tickers
+    from apex_fin.scheduler import WatchlistScheduler
+
+    names = list(tickers or []) + (read_tickers(watchlist) if watchlist else [])
+    watched = list(dict.fromkeys(safe for safe in (sanitize_ticker(t) for t in names) if safe))
+    if not watched:
+        typer.echo("No tickers to watch.", err=True)
+        raise typer.Exit(code=1)
+
+    report_kwargs = {"deadline_seconds": deadline} if deadline is not None else {}
+    scheduler = WatchlistScheduler(watched, **report_kwargs)
+
+    def _print_cycle(results) -> None:
+        for result in results:
+            if result.error:
+                status = f"error: {result.error}"
+            elif result.regenerated:
+                status = f"regenerated ({'; '.join(result.reasons)})"
+            else:
+                status = "unchanged"
+            typer.echo(f"[{result.ticker}] {status}", err=True)
+
+    if once:
+        results = scheduler.run_once()
+        _print_cycle(results)
+        if any(result.error for result in results):
+            raise typer.Exit(code=1)
+        return
+
+    typer.echo(f"Watching {len(watched)} ticker(s). Press Ctrl+C to stop.", err=True)
+    try:
+        scheduler.run_forever(interval_minutes=interval_minutes, on_cycle=_print_cycle)
+    except KeyboardInterrupt:
+        typer.echo("Stopped watching.", err=True)
+
+
+@app.command()
+@handle_cli_errors
+def serve(
+    host: Optional[str] = typer.Option(None, "--host", help="Interface to listen on. Defaults to service.host."),
+    port: Optional[int] = typer.Option(None, "--port", "-p", help="Port to listen on. Defaults to service.port."),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-n", min=1, help="Jobs run at the same time. Defaults to service.workers."
+    ),
+) -> None:
+    """
+    Run a local HTTP service exposing analyze, compare, think and fullreport.
+
+    The service keeps agents, LLM clients, prompts and caches warm between
+    requests. Jobs can be submitted asynchronously and polled, or followed
+    as an NDJSON event stream; see `apex_fin.service` for the endpoints.
+
+    Parameters
+    ----------
+    host : Optional[str]
+        Overrides `service.host`.
+    port : Optional[int]
+        Overrides `service.port`.
+    workers : Optional[int]
+        Overrides `service.workers`.
+    """
+    from apex_fin.service import serve as run_service
+
+    run_service(host=host, port=port, workers=workers)
+
+
+@app.command(name="archive")
+@handle_cli_errors
+def list_archive(
+    ticker: Optional[str] = typer.Argument(None, help="Only reports for this ticker."),
+    command: Optional[str] = typer.Option(None, "--command", help="Only reports of this command."),
+    since: Optional[str] = typer.Option(None, "--since", help="Only reports created on or after this date (YYYY-MM-DD)."),
+    limit: int = typer.Option(20, "--limit", "-n", min=1, help="Maximum number of reports listed."),
+    show: Optional[str] = typer.Option(None, "--show", help="Print the archived report with this key."),
+) -> None:
+    """
+    List the archived reports, newest first, or print one of them.
+
+    Parameters
+    ----------
+    ticker : Optional[str]
+        Ticker filter.
+    command : Optional[str]
+        Command filter.
+    since : Optional[str]
+        Creation date filter.
+    limit : int
+        Maximum number of reports listed.
+    show : Optional[str]
+        Key of a report to print instead of listing.
+    """
+    from apex_fin.archive import get_report_archive
+
+    archive = get_report_archive()
+    if show:
+        report = archive.get(show)
+        if report is None:
+            typer.echo(f"No archived report with key {show}.", err=True)
+            raise typer.Exit(code=1)
+        typer.echo(report.content)
+        return
+    reports = archive.find(ticker=sanitize_ticker(ticker) if ticker else None, command=command, since=since, limit=limit)
+    if not reports:
+        typer.echo("No archived reports.")
+    for report in reports:
+        typer.echo(f"{report.created_utc}  {report.ticker:<10} {report.command:<10} {report.size:>8} B  {report.key}")
+
+
+queue_app = typer.Typer(help="Persistent job queue for large report runs, processed by worker processes.")
+app.add_typer(queue_app, name="queue")
+
+
+@queue_app.command("add")
+@handle_cli_errors
+def queue_add(
+    command: str = typer.Argument(..., help="Command to run for each ticker: analyze, compare, think or fullreport."),
+    input_file: typer.FileText = typer.Option(
+        "-", "--input", "-i", help="File listing tickers (one or more per line, '#' for comments). Defaults to stdin."
+    ),
+    output_dir: str = typer.Option(
+        "reports", "--output-dir", "-d", help="Directory receiving one <TICKER>.<command>.md file per ticker."
+    ),
+    max_attempts: Optional[int] = typer.Option(
+        None, "--max-attempts", min=1, help="Attempts per job. Defaults to queue.max_attempts."
+    ),
+    deadline: Optional[float] = typer.Option(
+        None, "--deadline", help="Per-report time budget in seconds (fullreport only)."
+    ),
+) -> None:
+    """
+    Add one job per ticker to the persistent queue.
+
+    Parameters
+    ----------
+    command : str
+        The command to run for each ticker.
+    input_file : typer.FileText
+        Source of the tickers, a file or stdin.
+    output_dir : str
+        The output directory.
+    max_attempts : Optional[int]
+        Overrides `queue.max_attempts`.
+    deadline : Optional[float]
+        Per-report deadline, passed to `fullreport`.
+    """
+    from apex_fin.batch import read_tickers
+    from apex_fin.jobqueue import JobQueue
+    from apex_fin.operations import OPERATIONS
+
+    if command not in OPERATIONS:
+        raise typer.BadParameter(f"Choose one of: {', '.join(OPERATIONS)}.", param_hint="COMMAND")
+    # Deduplicated once sanitized, so that e.g. `aapl` and `AAPL` are one job.
+    tickers = list(dict.fromkeys(safe for safe in (sanitize_ticker(t) for t in read_tickers(input_file)) if safe))
+    if not tickers:
+        typer.echo("No tickers to queue.", err=True)
+        raise typer.Exit(code=1)
+    options = {}
+    if deadline is not None:
+        if command != "fullreport":
+            raise typer.BadParameter("--deadline only applies to fullreport.", param_hint="--deadline")
+        options["deadline_seconds"] = deadline
+
+    queue = JobQueue()
+    job_ids = queue.enqueue(command, tickers, output_dir, max_attempts=max_attempts, **options)
+    typer.echo(f"Queued {len(job_ids)} '{command}' job(s) in {queue.path}.")
+
+
+@queue_app.command("work")
+@handle_cli_errors
+def queue_work(
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-n", min=1, help="Worker processes. Defaults to queue.workers."
+    ),
+    keep_running: bool = typer.Option(
+        False, "--keep-running", help="Keep polling for new jobs instead of stopping once the queue is drained."
+    ),
+) -> None:
+    """
+    Process the queued jobs with a pool of worker processes.
+
+    Jobs interrupted by a crash or a restart are taken over once their lease
+    expires; failed attempts are retried with exponential backoff.
+
+    Parameters
+    ----------
+    workers : Optional[int]
+        Overrides `queue.workers`.
+    keep_running : bool
+        Keep waiting for new jobs once the queue is drained.
+    """
+    from apex_fin.jobqueue import run_workers
+
+    stats = run_workers(workers=workers, drain=not keep_running)
+    typer.echo(stats.format())
+    if stats.counts["failed"]:
+        raise typer.Exit(code=1)
+
+
+@queue_app.command("status")
+@handle_cli_errors
+def queue_status(
+    show_failed: bool = typer.Option(False, "--failed", help="List the failed jobs and their last error."),
+) -> None:
+    """
+    Show the number of jobs per status and the throughput.
+
+    Parameters
+    ----------
+    show_failed : bool
+        Also list the failed jobs.
+    """
+    from apex_fin.jobqueue import JobQueue
+
+    queue = JobQueue()
+    typer.echo(queue.stats().format())
+    if show_failed:
+        for job in queue.jobs("failed"):
+            typer.echo(f"  FAILED #{job.id} {job.operation} {job.ticker} after {job.attempts} attempt(s): {job.error}")
+
+
+@queue_app.command("retry")
+@handle_cli_errors
+def queue_retry() -> None:
+    """
+    Re-queue every failed job with a fresh set of attempts.
+    """
+    from apex_fin.jobqueue import JobQueue
+
+    typer.echo(f"Re-queued {JobQueue().retry_failed()} failed job(s).")
+
+
 ################################################
 # performance not as good than full report
 ################################################
@@ -290,6 +640,8 @@ def full_report(
 #         If not provided, the report is printed to standard output.
 #         Defaults to None.
 #     """
+#     from apex_fin.teams.report_team import build_report_team
+#
 #     safe_ticker = sanitize_ticker(ticker)
 #     team = build_report_team(safe_ticker)
 
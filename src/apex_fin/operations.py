@@ -0,0 +1,194 @@
+"""
+The report operations behind the CLI commands, as plain functions.
+
+Each operation takes a ticker and returns Markdown, raising on failure. They
+are shared by the single-ticker commands and by `batch`, and import their
+agents lazily so that importing this module stays cheap.
+
+Operations go through the report archive (see `apex_fin.archive`): when the
+ticker's snapshot, the prompts and the model settings are unchanged since an
+archived report, that report is returned without any LLM call. Otherwise the
+snapshot fetched for the lookup is handed to the operation, which writes the
+report from it instead of fetching it again.
+"""
+
+import functools
+import json
+import logging
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _content(result: Any) -> str:
+    content = result.content if hasattr(result, "content") else result
+    text = str(content).strip() if content is not None else ""
+    if not text:
+        raise ValueError("Agent returned empty content.")
+    return text
+
+
+# The report section whose refresh period an operation's archived results expire with.
+_DATED_SECTIONS = {"think": "context", "compare": "comparison"}
+
+
+def _is_error_result(content: str) -> bool:
+    """Whether an operation returned an error message instead of a report."""
+    return content.lstrip().startswith("Error:")
+
+
+def archived(command: str) -> Callable[[Callable[..., str]], Callable[..., str]]:
+    """Decorator serving an operation from the report archive when its inputs are unchanged.
+
+    The decorated operation accepts an extra `use_archive` keyword argument,
+    which overrides `archive.enabled`, and must accept a `snapshot` keyword
+    argument: on an archive miss, it receives the snapshot the archive key was
+    computed from. New results are archived, except error messages and full
+    reports with sections missing because of a deadline overrun. A snapshot
+    passed by the caller is used for the key instead of fetching a new one.
+
+    For `fullreport`, the report deadline starts before the lookup: the
+    snapshot is fetched within the analysis section's share of it, and the
+    running deadline is handed to the operation.
+
+    Parameters
+    ----------
+    command : str
+        The operation name, part of the archive key.
+    """
+
+    def decorator(operation: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(operation)
+        def wrapper(ticker: str, *args: Any, use_archive: Optional[bool] = None, **kwargs: Any) -> str:
+            from apex_fin.config import settings
+
+            if not (settings.archive.enabled if use_archive is None else use_archive):
+                return operation(ticker, *args, **kwargs)
+
+            from apex_fin.archive import (
+                archive_key,
+                config_hash,
+                get_report_archive,
+                section_date_buckets,
+                snapshot_hash,
+            )
+            from apex_fin.utils.deadline import Deadline, run_with_deadline
+            from apex_fin.utils.yf_fetcher import fetch_financial_snapshot
+
+            fetch_deadline = Deadline(None)
+            if command == "fullreport":
+                from apex_fin.agents.full_report_agent import report_budgets
+
+                seconds = kwargs.get("deadline_seconds")
+                kwargs["deadline"] = Deadline(settings.report_deadline_seconds if seconds is None else seconds)
+                fetch_deadline = report_budgets(kwargs["deadline"]).share("analysis")
+
+            snapshot = kwargs.pop("snapshot", None)
+            try:
+                if snapshot is None:
+                    snapshot = run_with_deadline(fetch_deadline, fetch_financial_snapshot, ticker)
+                snapshot_digest, config_digest = snapshot_hash(snapshot), config_hash()
+                # Full reports, risk assessments and comparisons use time-dependent sources, such as the news.
+                date_buckets = {
+                    section: bucket
+                    for section, bucket in section_date_buckets().items()
+                    if command == "fullreport" or section == _DATED_SECTIONS.get(command)
+                } or None
+                key = archive_key(command, snapshot_digest, config_digest, date_buckets)
+                archived_report = get_report_archive().get(key)
+            except Exception as e:
+                logger.warning(f"Report archive lookup failed for {command} {ticker}, generating the report: {e}")
+                return operation(ticker, *args, snapshot=snapshot, **kwargs)
+            if archived_report is not None:
+                logger.info(f"Inputs of {command} {ticker} unchanged since {archived_report.created_utc}; using the archived report.")
+                return archived_report.content
+
+            content = operation(ticker, *args, snapshot=snapshot, **kwargs)
+            if _is_error_result(content):
+                logger.warning(f"{command} {ticker} returned an error; not archiving it.")
+                return content
+            if command == "fullreport":
+                from apex_fin.agents.full_report_agent import report_is_complete
+
+                if not report_is_complete(content):
+                    return content
+            try:
+                archived_ticker = snapshot.get("ticker_symbol") or ticker
+                get_report_archive().put(key, archived_ticker, command, content, config_digest, snapshot_digest)
+            except Exception as e:
+                logger.warning(f"Could not archive {command} {ticker}: {e}")
+            return content
+
+        return wrapper
+
+    return decorator
+
+
+@archived("analyze")
+def run_analyze(ticker: str, snapshot: Optional[dict[str, Any]] = None) -> str:
+    """Runs the financial health analysis of `ticker`, from `snapshot` when it is given.
+
+    Raises
+    ------
+    ValueError
+        If the financial data cannot be fetched or the agent returns nothing.
+    """
+    from apex_fin.agents.analysis_agent import build_auto_analysis_agent, _fetch_financial_data_for_agent
+
+    if snapshot is not None:
+        return _content(build_auto_analysis_agent().run(json.dumps(snapshot)))
+    input_json_str = _fetch_financial_data_for_agent(ticker, logger)
+    # _fetch_financial_data_for_agent returns an error payload instead of raising
+    if '"error":' in input_json_str and "Data pre-fetch failed" in input_json_str:
+        raise ValueError(f"Could not fetch financial data for {ticker}. Details: {input_json_str}")
+    return _content(build_auto_analysis_agent().run(input_json_str))
+
+
+@archived("compare")
+def run_compare(ticker: str, snapshot: Optional[dict[str, Any]] = None) -> str:
+    """Compares `ticker` to its top competitors, analyzing it from `snapshot` when it is given."""
+    from apex_fin.agents.comparison_agent import compare_company
+
+    return _content(compare_company(ticker, primary_snapshot=snapshot))
+
+
+@archived("think")
+def run_think(ticker: str, snapshot: Optional[dict[str, Any]] = None) -> str:
+    """Runs the contextual risk assessment of `ticker`, summarizing it from `snapshot` when it is given."""
+    from apex_fin.agents.thinking_agent import build_thinking_agent
+
+    team = build_thinking_agent(ticker, snapshot=snapshot)
+    return _content(team.run(f"Generate a comprehensive risk assessment for {ticker} based on its financial summary."))
+
+
+@archived("fullreport")
+def run_fullreport(
+    ticker: str,
+    deadline_seconds: Optional[float] = None,
+    on_section: Optional[Callable[[str, str], None]] = None,
+    reuse_sections: Optional[bool] = None,
+    snapshot: Optional[dict[str, Any]] = None,
+    deadline: Optional[Any] = None,
+) -> str:
+    """Generates the full report of `ticker`; see `build_full_report`."""
+    from apex_fin.agents.full_report_agent import build_full_report
+
+    return _content(
+        build_full_report(
+            ticker,
+            deadline_seconds=deadline_seconds,
+            on_section=on_section,
+            reuse_sections=reuse_sections,
+            snapshot=snapshot,
+            deadline=deadline,
+        )
+    )
+
+
+# Operation name (as used by the CLI) -> function taking a ticker and returning Markdown
+OPERATIONS: dict[str, Callable[..., str]] = {
+    "analyze": run_analyze,
+    "compare": run_compare,
+    "think": run_think,
+    "fullreport": run_fullreport,
+}
@@ -1,15 +1,9 @@
 from jinja2 import Template
 
-RISK_PROMPT_TEMPLATE = Template(
-    """
+RISK_PROMPT_SOURCE = """
 You are a financial risk analyst specializing in {{ risk_name | replace("_", " ") }} risk.
 
-Use the following company financial summary and your tools to perform your analysis:
-
-Company Financial Summary:
----
-{{ context }}
----
+Use the company financial summary provided at the end of these instructions and your tools to perform your analysis.
 
 Focus on the following key areas:
 {{ focus }}
@@ -26,4 +20,16 @@ Specifically:
 Respond in **Markdown**. Use bullet points or tables for clarity.
 Do not include internal reasoning or system commentary.
 """.strip()
-)
\ No newline at end of file
+
+RISK_PROMPT_TEMPLATE = Template(RISK_PROMPT_SOURCE)
+
+# Per-company data, kept out of RISK_PROMPT_TEMPLATE so the rendered instructions
+# stay byte-identical across tickers and can be served from a provider prefix cache.
+RISK_CONTEXT_TEMPLATE = Template(
+    """
+Company Financial Summary:
+---
+{{ context }}
+---
+""".strip()
+)
@@ -0,0 +1,187 @@
+"""
+Watchlist scheduler: regenerate full reports only when something material moved.
+
+Every `watch.interval_minutes`, the scheduler refreshes the financial snapshot
+of each watched ticker through `YFinanceFinancialAnalyzer` and compares it with
+the snapshot the ticker's last report was built from, with the snapshot diff
+engine (`apex_fin.utils.snapshot_diff`). Only tickers whose changes are
+material (price move, target price change, new analyst recommendations,
+earnings date passed, ...) get a new `build_full_report`.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from apex_fin.batch import TickerOutcome, run_batch
+from apex_fin.config import WatchOverrides, settings
+from apex_fin.utils.snapshot_diff import diff_universe
+
+logger = logging.getLogger(__name__)
+
+
+class WatchResult(BaseModel):
+    ticker: str
+    reasons: list[str] = []
+    materiality: Optional[float] = None
+    regenerated: bool = False
+    error: Optional[str] = None
+
+
+def fetch_snapshot(ticker: str) -> dict[str, Any]:
+    """Fetches the current financial snapshot of `ticker`."""
+    from apex_fin.utils.yf_fetcher import fetch_financial_snapshot
+
+    return fetch_financial_snapshot(ticker)
+
+
+class WatchlistScheduler:
+    """
+    Periodically refreshes snapshots and regenerates the reports of tickers that moved.
+
+    Parameters
+    ----------
+    tickers : list[str]
+        The watchlist.
+    thresholds : Optional[WatchOverrides], optional
+        Thresholds and paths. Defaults to the `watch` settings.
+    fetch : Callable[[str], dict[str, Any]], optional
+        Snapshot fetcher. Defaults to `fetch_snapshot`.
+    **report_kwargs
+        Extra arguments for the report operation (e.g. `deadline_seconds`).
+    """
+
+    def __init__(
+        self,
+        tickers: list[str],
+        thresholds: Optional[WatchOverrides] = None,
+        fetch: Callable[[str], dict[str, Any]] = fetch_snapshot,
+        **report_kwargs,
+    ):
+        self.tickers = tickers
+        self.thresholds = thresholds or settings.watch
+        self.fetch = fetch
+        self.report_kwargs = report_kwargs
+        self.state_dir = Path(self.thresholds.state_dir)
+        self.output_dir = Path(self.thresholds.output_dir)
+
+    def _state_path(self, ticker: str) -> Path:
+        return self.state_dir / f"{ticker}.snapshot.json"
+
+    def load_reported_snapshot(self, ticker: str) -> Optional[dict[str, Any]]:
+        """Returns the snapshot the last report of `ticker` was built from, if any."""
+        try:
+            return json.loads(self._state_path(ticker).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _save_reported_snapshot(self, ticker: str, snapshot: dict[str, Any]) -> None:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        path = self._state_path(ticker)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(snapshot, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def run_once(self) -> list[WatchResult]:
+        """Refreshes every snapshot and regenerates the reports of tickers that crossed a threshold.
+
+        Returns
+        -------
+        list[WatchResult]
+            One result per ticker, in watchlist order.
+        """
+        results = {ticker: WatchResult(ticker=ticker) for ticker in self.tickers}
+        snapshots: dict[str, dict[str, Any]] = {}
+
+        def _refresh(ticker: str) -> tuple[str, Optional[dict[str, Any]], Optional[str]]:
+            try:
+                return ticker, self.fetch(ticker), None
+            except Exception as e:
+                return ticker, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=max(self.thresholds.concurrency, 1)) as executor:
+            for ticker, snapshot, error in executor.map(_refresh, self.tickers):
+                if snapshot is None:
+                    logger.error(f"Watch: could not refresh snapshot for {ticker}: {error}")
+                    results[ticker].error = f"snapshot refresh failed: {error}"
+                    continue
+                snapshots[ticker] = snapshot
+
+        reported = {ticker: self.load_reported_snapshot(ticker) for ticker in snapshots}
+        previous = {ticker: snapshot for ticker, snapshot in reported.items() if snapshot is not None}
+        # One vectorized diff for the whole watchlist; detailed diffs only for material changes.
+        threshold = self.thresholds.materiality_threshold
+        diffs = diff_universe(previous, snapshots, self.thresholds, min_materiality=threshold)
+        for ticker in snapshots:
+            if ticker not in previous:
+                results[ticker].reasons = ["no previous report"]
+            elif ticker in diffs:
+                results[ticker].reasons = diffs[ticker].reasons() or [f"materiality {diffs[ticker].materiality:.2f}"]
+                results[ticker].materiality = diffs[ticker].materiality
+
+        changed = [ticker for ticker in self.tickers if results[ticker].reasons]
+        for ticker in self.tickers:
+            if ticker in snapshots and not results[ticker].reasons:
+                logger.info(f"Watch: {ticker} unchanged, keeping the current report.")
+        if not changed:
+            return list(results.values())
+
+        logger.info(f"Watch: regenerating {len(changed)} report(s): {', '.join(changed)}")
+
+        def _record(outcome: TickerOutcome) -> None:
+            if outcome.status == "ok":
+                results[outcome.ticker].regenerated = True
+                self._save_reported_snapshot(outcome.ticker, snapshots[outcome.ticker])
+            elif outcome.status == "partial":
+                # A report with cached or unavailable sections is retried next cycle.
+                results[outcome.ticker].error = f"report incomplete: {outcome.error}; retrying next cycle"
+            else:
+                results[outcome.ticker].error = f"report generation failed: {outcome.error}"
+
+        run_batch(
+            changed,
+            "fullreport",
+            self.output_dir,
+            concurrency=self.thresholds.concurrency,
+            force=True,
+            on_outcome=_record,
+            # Each report is built from the snapshot it was diffed on, which is the one saved.
+            ticker_kwargs={ticker: {"snapshot": snapshots[ticker]} for ticker in changed},
+            **self.report_kwargs,
+        )
+        return list(results.values())
+
+    def run_forever(
+        self,
+        interval_minutes: Optional[float] = None,
+        iterations: Optional[int] = None,
+        on_cycle: Optional[Callable[[list[WatchResult]], None]] = None,
+    ) -> None:
+        """Runs `run_once` every interval until interrupted.
+
+        Parameters
+        ----------
+        interval_minutes : Optional[float], optional
+            Time between the starts of two cycles. Defaults to `watch.interval_minutes`.
+        iterations : Optional[int], optional
+            Stop after this many cycles. None runs until interrupted.
+        on_cycle : Optional[Callable[[list[WatchResult]], None]], optional
+            Called with the results of each cycle.
+        """
+        interval_seconds = (interval_minutes or self.thresholds.interval_minutes) * 60
+        cycle = 0
+        while iterations is None or cycle < iterations:
+            started = time.monotonic()
+            results = self.run_once()
+            cycle += 1
+            if on_cycle is not None:
+                on_cycle(results)
+            if iterations is not None and cycle >= iterations:
+                break
+            time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
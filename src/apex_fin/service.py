@@ -0,0 +1,374 @@
+"""
+Local HTTP service exposing the report operations.
+
+A long-running process keeps the imported agents, LLM clients, loaded prompts,
+settings and search cache warm between requests, instead of paying for an
+interpreter start and all imports on every CLI call. Operations run as jobs on
+a bounded worker pool:
+
+* `POST /jobs` with `{"operation": "fullreport", "ticker": "AAPL"}` queues a job
+  and returns it immediately (`202`), with its id.
+* `GET /jobs/<id>` polls the job: status, timings, and the result once done.
+* `GET /jobs/<id>/events` streams the job's events as NDJSON (one JSON object
+  per line): `queued`, `running`, one `section` event per finished `fullreport`
+  section, then `succeeded` (with the result) or `failed` (with the error).
+* `POST /<operation>` (`/analyze`, `/compare`, `/think`, `/fullreport`) with
+  `{"ticker": "AAPL"}` runs a job and waits for it; add `?stream=true` to get
+  the NDJSON event stream instead.
+* `GET /health` and `GET /operations` report the service state.
+
+The service uses the standard library HTTP server and has no authentication:
+bind it to a local interface (the default) or put it behind a proxy.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, Literal, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import BaseModel
+
+from apex_fin.config import settings
+from apex_fin.main import sanitize_ticker
+from apex_fin.operations import OPERATIONS
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+_FINISHED: tuple[str, ...] = ("succeeded", "failed")
+
+
+class JobRequest(BaseModel):
+    operation: str
+    ticker: str
+    deadline_seconds: Optional[float] = None
+
+
+class Job(BaseModel):
+    id: str
+    operation: str
+    ticker: str
+    status: JobStatus = "queued"
+    created_utc: str
+    started_utc: Optional[str] = None
+    finished_utc: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class _JobRecord:
+    """A job and its event log, guarded by a condition for the streaming readers."""
+
+    def __init__(self, job: Job):
+        self.job = job
+        self.events: list[dict[str, Any]] = []
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        """Whether the final event (`succeeded` or `failed`) was emitted."""
+        return bool(self.events) and self.events[-1]["event"] in _FINISHED
+
+    def emit(self, event: str, **fields: Any) -> None:
+        with self.condition:
+            self.events.append({"event": event, "job_id": self.job.id, "time_utc": _utc_now(), **fields})
+            self.condition.notify_all()
+
+
+class JobManager:
+    """
+    Runs report operations as jobs on a bounded worker pool.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Jobs run at the same time. Defaults to `service.workers`.
+    max_jobs : int, optional
+        Finished jobs kept for polling. Defaults to `service.max_jobs`.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_jobs: Optional[int] = None):
+        self.workers = workers or settings.service.workers
+        self.max_jobs = max_jobs or settings.service.max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="apex-fin-job")
+        self._records: "OrderedDict[str, _JobRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, request: JobRequest) -> Job:
+        """Queues a job.
+
+        Raises
+        ------
+        ValueError
+            If the operation is unknown, the ticker is empty after sanitization,
+            or a deadline is given for another operation than `fullreport`.
+        """
+        if request.operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{request.operation}'. Choose one of: {', '.join(OPERATIONS)}.")
+        ticker = sanitize_ticker(request.ticker)
+        if not ticker:
+            raise ValueError(f"Invalid ticker '{request.ticker}'.")
+        if request.deadline_seconds is not None and request.operation != "fullreport":
+            raise ValueError("deadline_seconds only applies to fullreport.")
+
+        record = _JobRecord(
+            Job(id=uuid.uuid4().hex, operation=request.operation, ticker=ticker, created_utc=_utc_now())
+        )
+        with self._lock:
+            self._records[record.job.id] = record
+            self._forget_old_jobs()
+        record.emit("queued", operation=request.operation, ticker=ticker)
+        self._executor.submit(self._run, record, request.deadline_seconds)
+        return record.job.model_copy()
+
+    def _forget_old_jobs(self) -> None:
+        excess = len(self._records) - self.max_jobs
+        for job_id in [job_id for job_id, record in self._records.items() if record.finished]:
+            if excess <= 0:
+                break
+            del self._records[job_id]
+            excess -= 1
+
+    def _run(self, record: _JobRecord, deadline_seconds: Optional[float]) -> None:
+        job = record.job
+        kwargs: dict[str, Any] = {}
+        if job.operation == "fullreport":
+            kwargs["on_section"] = lambda section, content: record.emit("section", section=section, content=content)
+            if deadline_seconds is not None:
+                kwargs["deadline_seconds"] = deadline_seconds
+
+        job.status, job.started_utc = "running", _utc_now()
+        record.emit("running")
+        start = time.perf_counter()
+        try:
+            result = OPERATIONS[job.operation](job.ticker, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.operation} {job.ticker}) failed: {e}")
+            job.error, job.status = str(e), "failed"
+        else:
+            job.result, job.status = result, "succeeded"
+        job.finished_utc = _utc_now()
+        job.duration_seconds = round(time.perf_counter() - start, 3)
+        if job.status == "succeeded":
+            record.emit("succeeded", result=job.result, duration_seconds=job.duration_seconds)
+        else:
+            record.emit("failed", error=job.error, duration_seconds=job.duration_seconds)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Returns a snapshot of the job, or None if it is unknown or was forgotten."""
+        record = self._records.get(job_id)
+        return record.job.model_copy() if record else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Blocks until the job is finished (or `timeout` elapsed) and returns it."""
+        record = self._records.get(job_id)
+        if record is None:
+            return None
+        with record.condition:
+            record.condition.wait_for(lambda: record.finished, timeout=timeout)
+        return record.job.model_copy()
+
+    def events(self, job_id: str, heartbeat_seconds: float = 15.0) -> Iterator[dict[str, Any]]:
+        """Yields the events of a job from the start, blocking for new ones until it finishes.
+
+        A `heartbeat` event is yielded when nothing happened for
+        `heartbeat_seconds`, so that disconnected clients are noticed.
+        """
+        record = self._records.get(job_id)
+        if record is None:
+            return
+        index = 0
+        while True:
+            with record.condition:
+                if index >= len(record.events) and not record.finished:
+                    record.condition.wait(timeout=heartbeat_seconds)
+                pending = record.events[index:]
+                index += len(pending)
+                finished = record.finished
+            if pending:
+                yield from pending
+            elif not finished:
+                yield {"event": "heartbeat", "job_id": job_id, "time_utc": _utc_now()}
+            if finished:
+                return
+
+    def counts(self) -> dict[str, int]:
+        """Number of known jobs per status."""
+        counts = {status: 0 for status in ("queued", "running", "succeeded", "failed")}
+        for record in list(self._records.values()):
+            counts[record.job.status] += 1
+        return counts
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def warm_up() -> None:
+    """Imports the agents and loads prompts and templates, so the first request does not pay for it."""
+    start = time.perf_counter()
+    try:
+        from apex_fin.agents.analysis_agent import build_auto_analysis_agent
+        from apex_fin.agents.comparison_agent import build_comparison_agent
+        from apex_fin.agents.full_report_agent import build_full_report  # noqa: F401
+        from apex_fin.agents.news_agent import build_financial_news_agent
+        from apex_fin.templates.renderer import get_report_template
+
+        build_auto_analysis_agent()
+        build_comparison_agent()
+        build_financial_news_agent()
+        get_report_template()
+    except Exception as e:
+        logger.warning(f"Service warm-up incomplete, the first requests may be slower: {e}")
+        return
+    logger.info(f"Service warmed up in {time.perf_counter() - start:.1f}s.")
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Routes the HTTP requests to the `JobManager` of the server."""
+
+    protocol_version = "HTTP/1.1"
+    server: "ApexFinServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+    # Responses
+
+    def _send_json(self, status: HTTPStatus, payload: Any, headers: Optional[dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _stream_events(self, job_id: str) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for event in self.server.jobs.events(job_id):
+                line = (json.dumps(event) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info(f"Client stopped following job {job_id}.")
+            self.close_connection = True
+
+    def _read_json(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        data = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("The request body must be a JSON object.")
+        return data
+
+    # Routes
+
+    def do_GET(self) -> None:
+        parts = [part for part in urlsplit(self.path).path.split("/") if part]
+        if parts == ["health"]:
+            self._send_json(HTTPStatus.OK, {"status": "ok", "workers": self.server.jobs.workers, "jobs": self.server.jobs.counts()})
+        elif parts == ["operations"]:
+            self._send_json(HTTPStatus.OK, {"operations": list(OPERATIONS)})
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.server.jobs.get(parts[1])
+            if job is None:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job '{parts[1]}'.")
+            elif len(parts) == 2:
+                self._send_json(HTTPStatus.OK, job.model_dump())
+            elif parts[2] == "events":
+                self._stream_events(job.id)
+            else:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path '{self.path}'.")
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path '{self.path}'.")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["jobs"]:
+            operation, wait = None, False
+        elif len(parts) == 1 and parts[0] in OPERATIONS:
+            operation, wait = parts[0], True
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path '{self.path}'.")
+            return
+
+        try:
+            data = self._read_json()
+            if operation is not None:
+                data["operation"] = operation
+            job = self.server.jobs.submit(JobRequest.model_validate(data))
+        except ValueError as e:  # also covers JSON decoding and pydantic validation errors
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        if not wait:
+            self._send_json(HTTPStatus.ACCEPTED, job.model_dump(), headers={"Location": f"/jobs/{job.id}"})
+        elif parse_qs(url.query).get("stream", ["false"])[0].lower() in ("1", "true", "yes"):
+            self._stream_events(job.id)
+        else:
+            self._send_json(HTTPStatus.OK, self.server.jobs.wait(job.id).model_dump())
+
+
+class ApexFinServer(ThreadingHTTPServer):
+    """HTTP server sharing one `JobManager` between its request threads."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], jobs: JobManager):
+        super().__init__(address, ServiceRequestHandler)
+        self.jobs = jobs
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None) -> None:
+    """Runs the service until interrupted.
+
+    Parameters
+    ----------
+    host : Optional[str], optional
+        Interface to listen on. Defaults to `service.host`.
+    port : Optional[int], optional
+        Port to listen on. Defaults to `service.port`.
+    workers : Optional[int], optional
+        Jobs run at the same time. Defaults to `service.workers`.
+    """
+    service_settings = settings.service
+    if service_settings.warmup:
+        warm_up()
+    jobs = JobManager(workers=workers)
+    server = ApexFinServer((host or service_settings.host, port or service_settings.port), jobs)
+    logger.info(f"apex-fin service listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down the apex-fin service.")
+    finally:
+        server.server_close()
+        jobs.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    serve()
@@ -1,20 +1,31 @@
 import logging
 from agno.team.team import Team
 from agno.tools.thinking import ThinkingTools
-from agno.models.litellm import LiteLLM 
 
 from apex_fin.agents.analysis_agent import build_auto_analysis_agent
 from apex_fin.agents.comparison_agent import build_comparison_agent
 from apex_fin.agents.news_agent import build_financial_news_agent
 from apex_fin.agents.thinking_agent import build_thinking_agent
 from apex_fin.agents.evaluation_agent import build_evaluation_agent
+from apex_fin.agents.base import create_model
 from apex_fin.prompts.team_instructions import TEAM_PROMPT
 from apex_fin.config import settings
 from apex_fin.utils.prompt_loader import load_prompt
+from apex_fin.utils.search_cache import evidence_pool
+from apex_fin.utils.team_context import team_context_hooks
 
 
 logger = logging.getLogger(__name__)
 
+# Default shares of the team leader's context budget (llm.team_context), by member ID
+MEMBER_PRIORITIES = {
+    "financial-analysis-agent": 3.0,
+    "comparison-agent": 3.0,
+    "thinking-agent": 2.0,
+    "news-agent": 1.0,
+    "evaluation-agent": 1.0,
+}
+
 def build_report_team(ticker: str):
     """
     Builds a multi-agent team that coordinates full report generation.
@@ -73,26 +84,24 @@ def build_report_team(ticker: str):
     )
     
     # Configure the model for the Team Leader (coordinator)
-    team_leader_model = LiteLLM(
-        id=settings.LLM_MODEL,
-        api_key=settings.GEMINI_API_KEY,
-        name="GeminiTeamLeader", 
-        # api_base=settings.BASE_URL, # Uncomment if you use a custom base URL
-    )
+    team_leader_model = create_model("team_leader", name="GeminiTeamLeader")
+    members = [
+        comparison_agent,
+        thinking_agent,
+        evaluation_agent,
+        news_agent,
+        analysis_agent,
+    ]
 
     team = Team(
         name="FullReportTeam",
         model=team_leader_model,
-        members=[
-            comparison_agent,
-            thinking_agent,
-            evaluation_agent,
-            news_agent,
-            analysis_agent,
-        ],
+        members=members,
         tools=[
             ThinkingTools(),
         ],
+        # Bounds the member outputs the coordinator reads back
+        tool_hooks=team_context_hooks(members, MEMBER_PRIORITIES),
         mode="coordinate",
         instructions=[
             load_prompt(settings.prompt_paths.team, TEAM_PROMPT),
@@ -105,7 +114,15 @@ def build_report_team(ticker: str):
 def generate_report_with_team(ticker: str) -> str:
     """
     Generates a full financial report by leveraging the Report Team.
+
+    All web searches made by the team's agents share one evidence pool.
     """
+    with evidence_pool():
+        return _generate_report_with_team(ticker)
+
+
+def _generate_report_with_team(ticker: str) -> str:
+    """Runs the Report Team; see `generate_report_with_team`."""
     logger.info(f"Building report team for ticker: {ticker}")
     report_team = build_report_team(ticker) # ticker is passed to team builder
 
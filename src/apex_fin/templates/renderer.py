@@ -0,0 +1,195 @@
+"""
+Deterministic, LLM-free assembly of the full report from a Jinja2 template.
+
+The template is `report.markdown_template_path` when configured, otherwise
+`DEFAULT_MD_TEMPLATE`. Compiled templates are cached by the prompt registry,
+so rendering a report costs a dictionary lookup plus string formatting.
+Sections given to a template that does not use them are logged as warnings.
+"""
+
+import functools
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from jinja2 import Environment, Template, meta
+
+from apex_fin.config import settings
+from apex_fin.templates.report_template import DEFAULT_MD_TEMPLATE
+from apex_fin.utils.prompt_loader import load_prompt
+from apex_fin.utils.prompt_registry import get_prompt_registry
+
+logger = logging.getLogger(__name__)
+
+_NA_VALUE = "N/A"
+
+_environment = Environment(trim_blocks=True, lstrip_blocks=True, keep_trailing_newline=False, autoescape=False)
+
+
+def _template_source(path_str: Optional[str] = None) -> str:
+    return load_prompt(path_str or settings.markdown_template_path, DEFAULT_MD_TEMPLATE)
+
+
+@functools.lru_cache(maxsize=16)
+def _template_variables(source: str) -> frozenset[str]:
+    """Names of the variables a template source refers to."""
+    return frozenset(meta.find_undeclared_variables(_environment.parse(source)))
+
+
+def get_report_template(path_str: Optional[str] = None) -> Template:
+    """Returns the compiled report template.
+
+    Parameters
+    ----------
+    path_str : Optional[str], optional
+        Template path relative to the project root. Defaults to
+        `report.markdown_template_path`; `DEFAULT_MD_TEMPLATE` is used when
+        neither is set or the file cannot be loaded.
+
+    Returns
+    -------
+    Template
+        The compiled Jinja2 template.
+    """
+    return get_prompt_registry().template(_template_source(path_str), environment=_environment)
+
+
+def summarize_analyst_consensus(snapshot: Optional[dict[str, Any]]) -> str:
+    """Builds a one-line recommendation from the analyst consensus in a financial snapshot.
+
+    Parameters
+    ----------
+    snapshot : Optional[dict[str, Any]]
+        A snapshot from `YFinanceFinancialAnalyzer.get_financial_snapshot_dict`.
+
+    Returns
+    -------
+    str
+        The consensus rating, number of analysts and mean target price, when available.
+    """
+    recommendations = (snapshot or {}).get("analyst_recommendations") or {}
+    summary = recommendations.get("summary") if isinstance(recommendations, dict) else None
+    if not isinstance(summary, dict) or summary.get("recommendation") in (None, _NA_VALUE, "none"):
+        return "No analyst consensus is available for this company."
+
+    text = f"Analyst consensus: {str(summary['recommendation']).replace('_', ' ').title()}"
+    opinions = summary.get("number_of_analyst_opinions")
+    if opinions not in (None, _NA_VALUE):
+        text += f" ({opinions} analysts)"
+    mean_target = summary.get("mean_target_price")
+    if mean_target not in (None, _NA_VALUE):
+        text += f", mean target price {mean_target}"
+        low, high = summary.get("low_target_price"), summary.get("high_target_price")
+        if low not in (None, _NA_VALUE) and high not in (None, _NA_VALUE):
+            text += f" (range {low} to {high})"
+    return text + "."
+
+
+def render_report(
+    ticker: str,
+    analysis: str,
+    comparison: str,
+    context: str = "",
+    news: str = "",
+    snapshot: Optional[dict[str, Any]] = None,
+    company_name: Optional[str] = None,
+    recommendation: Optional[str] = None,
+    template_path: Optional[str] = None,
+) -> str:
+    """Renders the full report from its sections and financial snapshot, without any LLM call.
+
+    Besides the section variables (`analysis`, `comparison`, `thinking` for the
+    contextual considerations, `news`), templates can use `ticker`,
+    `company_name`, `recommendation`, `generated_at`, and the snapshot fields
+    `snapshot`, `sector`, `industry`, `metrics` (the key financial metrics),
+    `earnings`, `analyst_recommendations` and `data_retrieved_utc`.
+
+    Parameters
+    ----------
+    ticker : str
+        The ticker symbol of the company.
+    analysis : str
+        The company analysis section in Markdown format.
+    comparison : str
+        The competitor comparison section in Markdown format.
+    context : str, optional
+        The contextual considerations section in Markdown format. Defaults to "".
+    news : str, optional
+        The financial news section in Markdown format. Defaults to "".
+    snapshot : Optional[dict[str, Any]], optional
+        The financial snapshot the report is based on.
+    company_name : Optional[str], optional
+        The company name, when known.
+    recommendation : Optional[str], optional
+        The recommendation line. Defaults to the analyst consensus of the snapshot.
+    template_path : Optional[str], optional
+        Overrides `report.markdown_template_path`.
+
+    Returns
+    -------
+    str
+        The rendered Markdown report.
+    """
+    snapshot = snapshot or {}
+    source = _template_source(template_path)
+    sections = {"analysis": analysis, "comparison": comparison, "thinking": context, "news": news}
+    unused = [name for name, text in sections.items() if text and name not in _template_variables(source)]
+    if unused:
+        logger.warning(
+            f"The report template does not use the {', '.join(unused)} section(s); they are left out of the report "
+            f"for {ticker}. Add them to {template_path or settings.markdown_template_path or 'the template'}."
+        )
+    rendered = get_prompt_registry().template(source, environment=_environment).render(
+        ticker=ticker,
+        company_name=company_name,
+        analysis=analysis,
+        comparison=comparison,
+        thinking=context,
+        news=news,
+        recommendation=recommendation or summarize_analyst_consensus(snapshot),
+        generated_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        snapshot=snapshot,
+        sector=snapshot.get("sector") if snapshot.get("sector") != _NA_VALUE else None,
+        industry=snapshot.get("industry") if snapshot.get("industry") != _NA_VALUE else None,
+        metrics=snapshot.get("key_financial_metrics") or {},
+        earnings=snapshot.get("earnings_information") or {},
+        analyst_recommendations=snapshot.get("analyst_recommendations") or {},
+        data_retrieved_utc=snapshot.get("data_retrieved_utc"),
+    )
+    # Collapse the blank lines left by skipped optional blocks.
+    lines: list[str] = []
+    for line in rendered.strip().splitlines():
+        if not line.strip() and lines and not lines[-1].strip():
+            continue
+        lines.append(line.rstrip())
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    example_snapshot = {
+        "ticker_symbol": "AAPL",
+        "data_retrieved_utc": "2025-01-01 00:00:00 UTC",
+        "sector": "Technology",
+        "industry": "Consumer Electronics",
+        "key_financial_metrics": {"current_price": 190.5, "trailing_pe": 29.8, "profit_margins": "24.30%", "beta": "N/A"},
+        "analyst_recommendations": {
+            "summary": {
+                "recommendation": "buy",
+                "mean_target_price": 210.0,
+                "high_target_price": 250.0,
+                "low_target_price": 160.0,
+                "number_of_analyst_opinions": 38,
+            },
+            "history": [],
+        },
+    }
+    print(
+        render_report(
+            ticker="AAPL",
+            company_name="Apple Inc.",
+            analysis="Example analysis.",
+            comparison="Example comparison.",
+            snapshot=example_snapshot,
+        )
+    )
@@ -1,9 +1,25 @@
 DEFAULT_MD_TEMPLATE = """
-# Full Investment Report: {{ ticker }}
+# Full Investment Report: {{ company_name or ticker }}{{ " (" ~ ticker ~ ")" if company_name and company_name != ticker else "" }}
 
+{% if sector or industry -%}
+*{{ [sector, industry] | select | join(" · ") }}* · Data retrieved {{ data_retrieved_utc or generated_at }}
+{% endif %}
+
+{% if metrics -%}
+## Key Figures
+
+| Metric | Value |
+|---|---|
+{% for name, value in metrics.items() if value != "N/A" -%}
+| {{ name | replace("_", " ") | title }} | {{ value }} |
+{% endfor %}
+{% endif %}
+
+{% if news -%}
 ## Recent News & Developments
 
 {{ news }}
+{% endif %}
 
 ## Company Analysis
 
@@ -13,9 +29,11 @@ DEFAULT_MD_TEMPLATE = """
 
 {{ comparison }}
 
+{% if thinking -%}
 ## Contextual Considerations
 
 {{ thinking }}
+{% endif %}
 
 ---
 
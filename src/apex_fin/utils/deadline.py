@@ -0,0 +1,147 @@
+"""
+Deadline budgets for report generation.
+
+A `Deadline` bounds the wall-clock time of a whole report. `SectionBudgets` splits
+what is left of it between the remaining sections by weight, and
+`run_with_deadline` runs one section under its budget. The active deadline is
+kept in a context variable, so agents built while a section runs (see
+`apex_fin.agents.base.create_model`) cap their LLM request timeouts to it.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a section does not finish within its budget."""
+
+
+class Deadline:
+    """
+    A point in time by which work must finish.
+
+    Parameters
+    ----------
+    seconds : float, optional
+        Time available from now. None means no deadline.
+    """
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None if there is no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "apex_fin_deadline", default=None
+)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Returns the deadline of the section currently running, if any."""
+    return _current_deadline.get()
+
+
+class SectionBudgets:
+    """
+    Splits a report deadline between sections, by weight.
+
+    Budgets are computed when each section starts, from the time still left
+    and the weights of the sections not yet run, so time saved by a fast
+    section is handed to the following ones.
+
+    Parameters
+    ----------
+    deadline : Deadline
+        The report-level deadline.
+    weights : dict[str, float]
+        Relative weight of every section expected to run.
+    """
+
+    def __init__(self, deadline: Deadline, weights: dict[str, float]):
+        self.deadline = deadline
+        self.pending = dict(weights)
+
+    def start(self, section: str) -> Deadline:
+        """Returns the deadline of `section` and marks it as started."""
+        deadline = self.share(section)
+        self.pending.pop(section, None)
+        return deadline
+
+    def share(self, section: str) -> Deadline:
+        """Returns the deadline `section` would get if it started now, without starting it.
+
+        Bounds work done ahead of a section for it, such as fetching its
+        inputs; the section's own budget is computed when it starts, from
+        the time then left.
+        """
+        remaining = self.deadline.remaining()
+        if remaining is None:
+            return Deadline(None)
+        weight = self.pending.get(section, 1.0)
+        total_weight = weight + sum(w for name, w in self.pending.items() if name != section)
+        return Deadline(remaining * weight / total_weight if total_weight > 0 else remaining)
+
+
+def run_with_deadline(deadline: Deadline, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs `fn` with `deadline` as the current deadline, giving up when it expires.
+
+    Without a time limit, `fn` runs inline. Otherwise it runs in a daemon
+    thread that inherits the caller's context variables. Python threads
+    cannot be killed: on expiry the caller stops waiting and the abandoned
+    call winds down on its own, as its LLM requests are created with a
+    timeout no longer than the section budget.
+
+    Parameters
+    ----------
+    deadline : Deadline
+        The deadline to enforce.
+    fn : Callable[..., T]
+        The work to run.
+    *args, **kwargs
+        Arguments for `fn`.
+
+    Returns
+    -------
+    T
+        The result of `fn`.
+
+    Raises
+    ------
+    DeadlineExceeded
+        If `fn` does not finish before the deadline.
+    """
+    context = contextvars.copy_context()
+    context.run(_current_deadline.set, deadline)
+    if deadline.remaining() is None:
+        return context.run(fn, *args, **kwargs)
+
+    outcome: dict[str, Any] = {}
+
+    def _target() -> None:
+        try:
+            outcome["value"] = context.run(fn, *args, **kwargs)
+        except BaseException as e:  # re-raised in the caller's thread
+            outcome["error"] = e
+
+    worker = threading.Thread(target=_target, daemon=True, name=f"apex-fin-{getattr(fn, '__name__', 'task')}")
+    worker.start()
+    worker.join(deadline.remaining())
+    if worker.is_alive():
+        raise DeadlineExceeded(f"'{getattr(fn, '__name__', fn)}' did not finish within {deadline.seconds:.1f}s.")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
@@ -0,0 +1,183 @@
+"""
+Compact, fixed-schema metrics cards computed from financial snapshots.
+
+A card holds the same few valuation, profitability, growth, balance sheet,
+risk and analyst figures for every company, computed deterministically from
+the output of `YFinanceFinancialAnalyzer.get_financial_snapshot_dict`, with no
+LLM call. Cards are the "map" step of the map-reduce comparison (see
+`apex_fin.agents.comparison_agent.compare_company`): a row of a Markdown table
+per company replaces a full analysis summary, so large peer sets fit in the
+comparison prompt. For very large peer sets, `peer_statistics` condenses the
+peers into their median and range, with the primary company's rank.
+"""
+
+import statistics
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class MetricsCard(BaseModel):
+    ticker: str
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    market_cap_bn: Optional[float] = None
+    trailing_pe: Optional[float] = None
+    forward_pe: Optional[float] = None
+    ev_to_ebitda: Optional[float] = None
+    fcf_yield_pct: Optional[float] = None
+    profit_margin_pct: Optional[float] = None
+    ebitda_margin_pct: Optional[float] = None
+    return_on_equity_pct: Optional[float] = None
+    revenue_growth_pct: Optional[float] = None
+    debt_to_equity: Optional[float] = None
+    beta: Optional[float] = None
+    from_52w_high_pct: Optional[float] = None  # negative: below the 52-week high
+    recommendation: Optional[str] = None
+    target_upside_pct: Optional[float] = None
+    analyst_count: Optional[int] = None
+    error: Optional[str] = None  # set when the snapshot could not be fetched
+
+
+# Card fields shown as table columns, with their headers
+CARD_COLUMNS: dict[str, str] = {
+    "market_cap_bn": "Mkt cap ($bn)",
+    "trailing_pe": "P/E (TTM)",
+    "forward_pe": "Fwd P/E",
+    "ev_to_ebitda": "EV/EBITDA",
+    "fcf_yield_pct": "FCF yield %",
+    "profit_margin_pct": "Profit margin %",
+    "ebitda_margin_pct": "EBITDA margin %",
+    "return_on_equity_pct": "ROE %",
+    "revenue_growth_pct": "Rev. growth (Q) %",
+    "debt_to_equity": "Debt/Equity",
+    "beta": "Beta",
+    "from_52w_high_pct": "vs 52w high %",
+    "recommendation": "Consensus",
+    "target_upside_pct": "Target upside %",
+    "analyst_count": "Analysts",
+}
+
+
+def _number(value: Any) -> Optional[float]:
+    """Numeric value of a snapshot field ("24.00%" -> 24.0, "N/A" -> None)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip().rstrip("%").replace(",", ""))
+        except ValueError:
+            return None
+    return None
+
+
+def _ratio_pct(numerator: Optional[float], denominator: Optional[float], offset: float = 0.0) -> Optional[float]:
+    if numerator is None or not denominator:
+        return None
+    return round((numerator / denominator - offset) * 100, 2)
+
+
+def _dict(value: Any) -> dict[str, Any]:
+    # Sections the fetcher could not fill are "N/A" rather than dicts
+    return value if isinstance(value, dict) else {}
+
+
+def metrics_card(snapshot: dict[str, Any]) -> MetricsCard:
+    """Computes the metrics card of a company from its financial snapshot.
+
+    Parameters
+    ----------
+    snapshot : dict[str, Any]
+        A snapshot from `fetch_financial_snapshot`.
+
+    Returns
+    -------
+    MetricsCard
+        The card; figures missing from the snapshot are None.
+    """
+    metrics = _dict(snapshot.get("key_financial_metrics"))
+    summary = _dict(_dict(snapshot.get("analyst_recommendations")).get("summary"))
+    value = lambda key: _number(metrics.get(key))
+    price, market_cap = value("current_price"), value("market_cap")
+    analysts = _number(summary.get("number_of_analyst_opinions"))
+    recommendation = summary.get("recommendation")
+    text = lambda field: field if isinstance(field, str) and field not in ("", "N/A") else None
+    return MetricsCard(
+        ticker=str(snapshot.get("ticker_symbol", "")).upper(),
+        sector=text(snapshot.get("sector")),
+        industry=text(snapshot.get("industry")),
+        market_cap_bn=round(market_cap / 1e9, 1) if market_cap is not None else None,
+        trailing_pe=value("trailing_pe"),
+        forward_pe=value("forward_pe"),
+        ev_to_ebitda=value("enterprise_to_ebitda"),
+        fcf_yield_pct=_ratio_pct(value("free_cashflow"), market_cap),
+        profit_margin_pct=value("profit_margins"),
+        ebitda_margin_pct=value("ebitda_margins"),
+        return_on_equity_pct=value("return_on_equity"),
+        revenue_growth_pct=value("revenue_growth_quarterly"),
+        debt_to_equity=value("debt_to_equity"),
+        beta=value("beta"),
+        from_52w_high_pct=_ratio_pct(price, value("52_week_high"), offset=1.0),
+        recommendation=text(recommendation),
+        target_upside_pct=_ratio_pct(_number(summary.get("mean_target_price")), price, offset=1.0),
+        analyst_count=int(analysts) if analysts is not None else None,
+    )
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "N/A"
+    if isinstance(value, float):
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+def cards_table(cards: list[MetricsCard]) -> str:
+    """Formats metrics cards as a Markdown table, one row per company."""
+    lines = [
+        "| Ticker | " + " | ".join(CARD_COLUMNS.values()) + " |",
+        "|---" * (len(CARD_COLUMNS) + 1) + "|",
+    ]
+    for card in cards:
+        if card.error:
+            lines.append(f"| {card.ticker} | " + " | ".join(["N/A"] * len(CARD_COLUMNS)) + " |")
+        else:
+            lines.append(
+                f"| {card.ticker} | " + " | ".join(_cell(getattr(card, field)) for field in CARD_COLUMNS) + " |"
+            )
+    return "\n".join(lines)
+
+
+def peer_statistics(primary: MetricsCard, peers: list[MetricsCard]) -> str:
+    """Markdown table of the peer median and range of each numeric metric, and the primary company's rank.
+
+    The rank orders the primary company and its peers from the highest value
+    down, among the companies with a value.
+    """
+    lines = [
+        f"| Metric | {primary.ticker} | Peer median | Peer min | Peer max | {primary.ticker} rank (highest first) |",
+        "|---|---|---|---|---|---|",
+    ]
+    for field, header in CARD_COLUMNS.items():
+        if field == "recommendation":
+            continue
+        values = [getattr(card, field) for card in peers if getattr(card, field) is not None]
+        own = getattr(primary, field)
+        if not values:
+            lines.append(f"| {header} | {_cell(own)} | N/A | N/A | N/A | N/A |")
+            continue
+        rank = f"{1 + sum(v > own for v in values)} of {len(values) + 1}" if own is not None else "N/A"
+        lines.append(
+            f"| {header} | {_cell(own)} | {_cell(float(statistics.median(values)))} "
+            f"| {_cell(float(min(values)))} | {_cell(float(max(values)))} | {rank} |"
+        )
+    consensus: dict[str, int] = {}
+    for card in peers:
+        if card.recommendation:
+            consensus[card.recommendation] = consensus.get(card.recommendation, 0) + 1
+    if consensus:
+        counts = ", ".join(f"{name}: {count}" for name, count in sorted(consensus.items(), key=lambda item: -item[1]))
+        lines.append(f"| Consensus | {_cell(primary.recommendation)} | {counts} | | | |")
+    return "\n".join(lines)
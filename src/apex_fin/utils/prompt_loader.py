@@ -2,11 +2,11 @@ from typing import Optional
 from pathlib import Path
 import logging  # Added for logging
 
+from apex_fin.utils.prompt_registry import PROJECT_ROOT, get_prompt_registry
+
 # Configure a logger for this module
 logger = logging.getLogger(__name__)
 
-# Assuming apex_fin.yaml and custom_prompts/ are at the project root, one level above 'src'
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
 SRC_APEX_FIN_PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
 
 
@@ -23,6 +23,10 @@ def load_prompt(path_str: Optional[str], fallback: str) -> str:
     by ensuring that resolved paths remain within the project root directory
     and by rejecting absolute paths.
 
+    Files are read through the process-wide `PromptRegistry`, so repeated
+    loads of the same prompt are served from memory and an edited file is
+    picked up within `prompts.reload_check_seconds`.
+
     Parameters
     ----------
     path_str : Optional[str]
@@ -35,60 +39,7 @@ def load_prompt(path_str: Optional[str], fallback: str) -> str:
     str
         The content of the prompt file or the fallback string.
     """
-    if path_str:
-        try:
-            # Treat path_str as relative to the project root
-            # Path objects from Pydantic for PromptOverrides should be string types now
-            if not isinstance(
-                path_str, (str, Path)
-            ):  # Ensure path_str is a string or Path
-                logger.warning(
-                    f"Invalid path type for prompt: {path_str}. Using fallback."
-                )
-                return fallback
-
-            # If it's already a Path object, great. If string, convert.
-            relative_path = Path(path_str)
-
-            if relative_path.is_absolute():
-                logger.warning(
-                    f"Absolute path rejected for prompt: {path_str}. Using fallback."
-                )
-                return fallback
-
-            # Resolve the path against the project root
-            # This assumes 'custom_prompts/' are at project root, and internal defaults might be elsewhere
-            # For now, let's assume all paths in config are relative to PROJECT_ROOT
-            full_path = (PROJECT_ROOT / relative_path).resolve()
-
-            # Security check: Ensure the resolved path is still within the PROJECT_ROOT
-            # This is a basic check. More robust checks might be needed if symlinks are a concern.
-            if not str(full_path).startswith(str(PROJECT_ROOT)):
-                logger.warning(
-                    f"Path traversal attempt rejected for prompt: {path_str}. Path resolved to {full_path}. Using fallback."
-                )
-                return fallback
-
-            # Additional check for default prompts location if needed, or make all paths from root
-            # For example, if internal defaults are always under src/apex_fin/prompts
-            # if "default_prompts_identifier" in path_str: # Fictional identifier
-            #    full_path = (SRC_APEX_FIN_PROMPTS_DIR / relative_path).resolve()
-            #    if not str(full_path).startswith(str(SRC_APEX_FIN_PROMPTS_DIR)):
-            #        # ... handle traversal for default prompts ...
-
-            if full_path.exists() and full_path.is_file():
-                return full_path.read_text(encoding="utf-8")
-            else:
-                logger.warning(
-                    f"Prompt file not found at resolved path: {full_path} (from input: {path_str}). Using fallback."
-                )
-        except Exception as e:
-            logger.error(
-                f"Error loading prompt from '{path_str}': {e}. Using fallback.",
-                exc_info=True,
-            )
-            # Fall through to fallback
-    return fallback
+    return get_prompt_registry().load(path_str, fallback)
 
 
 # render_template is not used, so commenting it out to remove latent SSTI risk.
@@ -0,0 +1,235 @@
+"""
+Process-wide registry of prompt files, compiled Jinja templates and pre-rendered prompts.
+
+Agents are built often (once per section, risk and peer of every report), and
+each build used to resolve, check and read its prompt file. The registry keeps:
+
+- the text of every prompt file, re-validated against its modification time
+  and size at most every `prompts.reload_check_seconds`, and re-hashed when
+  they change, so edits to custom prompts are still picked up;
+- compiled Jinja templates, keyed by the SHA-256 of their source;
+- rendered static prompts (e.g. one risk prompt per risk type), keyed by the
+  template hash and the variables used.
+
+Since derived entries are keyed by content hash, an edited file naturally
+maps to new compiled and rendered entries.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from jinja2 import Environment, Template
+
+from apex_fin.config import register_reset_hook, settings
+
+logger = logging.getLogger(__name__)
+
+# Assuming apex_fin.yaml and custom_prompts/ are at the project root, one level above 'src'
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+_default_environment = Environment(autoescape=False)
+
+
+def content_hash(text: str) -> str:
+    """Returns the SHA-256 hex digest of a prompt or template source."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def resolve_prompt_path(path_str: Any) -> Optional[Path]:
+    """Resolves a prompt path relative to the project root, rejecting unsafe paths.
+
+    Absolute paths and paths resolving outside the project root are rejected
+    to prevent path traversal.
+
+    Parameters
+    ----------
+    path_str : Any
+        The relative path of the prompt file, as a `str` or `Path`.
+
+    Returns
+    -------
+    Optional[Path]
+        The resolved path, or None if the path is invalid or rejected.
+    """
+    if not isinstance(path_str, (str, Path)):
+        logger.warning(f"Invalid path type for prompt: {path_str}. Using fallback.")
+        return None
+    relative_path = Path(path_str)
+    if relative_path.is_absolute():
+        logger.warning(f"Absolute path rejected for prompt: {path_str}. Using fallback.")
+        return None
+    full_path = (PROJECT_ROOT / relative_path).resolve()
+    if not full_path.is_relative_to(PROJECT_ROOT):
+        logger.warning(
+            f"Path traversal attempt rejected for prompt: {path_str}. Path resolved to {full_path}. Using fallback."
+        )
+        return None
+    return full_path
+
+
+@dataclass
+class _FileEntry:
+    path: Optional[Path]
+    text: Optional[str]  # None when the file is missing or rejected
+    mtime_ns: int
+    size: int
+    digest: Optional[str]
+    checked_at: float
+
+
+class PromptRegistry:
+    """
+    Thread-safe cache of prompt files, compiled templates and rendered static prompts.
+
+    Parameters
+    ----------
+    reload_check_seconds : float
+        Minimum time between two checks of a prompt file's modification time
+        and size. Within this interval, cached text is returned without any
+        file system access. Use 0 to check on every load.
+    """
+
+    def __init__(self, reload_check_seconds: float = 2.0):
+        self.reload_check_seconds = reload_check_seconds
+        self._files: dict[str, _FileEntry] = {}
+        self._templates: dict[tuple[int, str], Template] = {}
+        self._rendered: dict[tuple[str, tuple[tuple[str, Any], ...]], str] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path_str: Optional[str], fallback: str) -> str:
+        """Returns the text of a prompt file, or `fallback` if it cannot be loaded.
+
+        Parameters
+        ----------
+        path_str : Optional[str]
+            The prompt path, relative to the project root.
+        fallback : str
+            The text to return when no path is given or the file cannot be loaded.
+
+        Returns
+        -------
+        str
+            The prompt text.
+        """
+        if not path_str:
+            return fallback
+        key = str(path_str)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None and now - entry.checked_at < self.reload_check_seconds:
+                return entry.text if entry.text is not None else fallback
+        entry = self._refresh(key, path_str, entry, now)
+        return entry.text if entry.text is not None else fallback
+
+    def _refresh(self, key: str, path_str: Any, entry: Optional[_FileEntry], now: float) -> _FileEntry:
+        path = entry.path if entry is not None else resolve_prompt_path(path_str)
+        try:
+            stat = path.stat() if path is not None else None
+        except OSError:
+            stat = None
+        if stat is None or not path.is_file():
+            if path is not None and (entry is None or entry.text is not None):
+                logger.warning(f"Prompt file not found at resolved path: {path} (from input: {path_str}). Using fallback.")
+            new_entry = _FileEntry(path, None, 0, 0, None, now)
+        elif entry is not None and entry.text is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            new_entry = _FileEntry(path, entry.text, entry.mtime_ns, entry.size, entry.digest, now)
+        else:
+            try:
+                text = path.read_text(encoding="utf-8")
+            except OSError as e:
+                logger.error(f"Error loading prompt from '{path_str}': {e}. Using fallback.", exc_info=True)
+                text = None
+            digest = content_hash(text) if text is not None else None
+            if entry is not None and entry.digest is not None and digest != entry.digest:
+                logger.info(f"Prompt file '{path_str}' changed; reloading.")
+            new_entry = _FileEntry(path, text, stat.st_mtime_ns, stat.st_size, digest, now)
+        with self._lock:
+            self._files[key] = new_entry
+        return new_entry
+
+    def template(self, source: str, environment: Optional[Environment] = None) -> Template:
+        """Returns `source` compiled as a Jinja2 template, compiling it only once.
+
+        Parameters
+        ----------
+        source : str
+            The template source.
+        environment : Optional[Environment], optional
+            The Jinja2 environment to compile with. Defaults to a plain environment.
+
+        Returns
+        -------
+        Template
+            The compiled template.
+        """
+        environment = environment or _default_environment
+        key = (id(environment), content_hash(source))
+        with self._lock:
+            template = self._templates.get(key)
+        if template is None:
+            template = environment.from_string(source)
+            with self._lock:
+                self._templates[key] = template
+        return template
+
+    def render(self, source: str, **variables: Any) -> str:
+        """Renders a template whose variables are static (e.g. configuration), caching the result.
+
+        Use this for prompt parts that only depend on configuration, not on
+        per-company data. Variables must be hashable.
+
+        Parameters
+        ----------
+        source : str
+            The template source.
+        **variables : Any
+            The template variables.
+
+        Returns
+        -------
+        str
+            The rendered prompt.
+        """
+        key = (content_hash(source), tuple(sorted(variables.items())))
+        with self._lock:
+            rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self.template(source).render(**variables)
+            with self._lock:
+                self._rendered[key] = rendered
+        return rendered
+
+    def clear(self) -> None:
+        """Drops every cached file, template and rendered prompt."""
+        with self._lock:
+            self._files.clear()
+            self._templates.clear()
+            self._rendered.clear()
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Returns the process-wide prompt registry, creating it from settings on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry(reload_check_seconds=settings.prompt_reload_check_seconds)
+        return _registry
+
+
+def _reset_prompt_registry() -> None:
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+register_reset_hook(_reset_prompt_registry)
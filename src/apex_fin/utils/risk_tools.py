@@ -1,12 +1,13 @@
 from typing import Any
 from apex_fin.config import settings
-from agno.tools.duckduckgo import DuckDuckGoTools  # Corrected import
 from agno.tools.yfinance import YFinanceTools  # Corrected import
 from agno.tools.thinking import ThinkingTools  # Corrected import
+from apex_fin.utils.search_cache import CachedDuckDuckGoTools
 
-# Mapping of tool names to actual classes or factory callables
+# Mapping of tool names to actual classes or factory callables.
+# DuckDuckGo searches go through the shared search cache and the run's evidence pool.
 TOOL_REGISTRY: dict[str, Any] = {
-    "DuckDuckGoTools": DuckDuckGoTools,
+    "DuckDuckGoTools": CachedDuckDuckGoTools,
     "ThinkingTools": ThinkingTools,
     "YFinanceTools": lambda: YFinanceTools(company_info=True),
 }
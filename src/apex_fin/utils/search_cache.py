@@ -0,0 +1,284 @@
+"""
+Shared, TTL-bounded cache and per-run evidence pool for DuckDuckGo-backed agents.
+
+The news agent, the competitor agent and the risk agents frequently search for
+overlapping queries about the same company. `CachedDuckDuckGoTools` routes every
+search through two layers:
+
+- the evidence pool of the current run (see `evidence_pool`), which keeps every
+  result gathered while producing one report, so identical queries (up to case,
+  spacing and legal suffixes) hit the network at most once per report;
+- a process-wide `SearchCache` whose entries expire after `search.cache_ttl_seconds`,
+  so long-running processes reuse recent results across reports.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from agno.tools.duckduckgo import DuckDuckGoTools
+from duckduckgo_search import DDGS
+
+from apex_fin.config import register_reset_hook, settings
+
+logger = logging.getLogger(__name__)
+
+# Legal suffixes after a company name, with their punctuation ("Apple Inc." -> "apple")
+_LEGAL_SUFFIX_PATTERN = re.compile(r",?\s+(?:inc|corp|corporation|ltd|plc)\b[.,]*(?=\s|$)")
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes a search query so that queries differing only in form share a cache key.
+
+    Lowercases, collapses whitespace and strips legal suffixes, so that e.g.
+    "Apple Inc. news" and "apple  news" map to the same key. Word order and
+    every other word are kept: queries that may return different results
+    never share a key.
+
+    Parameters
+    ----------
+    query : str
+        The raw search query.
+
+    Returns
+    -------
+    str
+        The normalized query.
+    """
+    text = " ".join(query.lower().split())
+    return " ".join(_LEGAL_SUFFIX_PATTERN.sub(" ", text).split()) or text
+
+
+class SearchCache:
+    """
+    Thread-safe, size-bounded LRU cache of search results with a time-to-live.
+
+    Entries are keyed by (search kind, normalized query) and remember how many
+    results were requested, so a cached entry can also serve a later request
+    for fewer results.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[float, int, list[Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str], max_results: int) -> Optional[list[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, cached_max_results, results = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            if cached_max_results < max_results:
+                return None
+            self._entries.move_to_end(key)
+            return results[:max_results]
+
+    def set(self, key: tuple[str, str], max_results: int, results: list[Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, max_results, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class EvidencePool:
+    """
+    Search results gathered during one run (typically one report).
+
+    Besides serving repeated queries, the pool keeps the list of queries that
+    were actually sent to the network and how many were served from memory,
+    which shows how much overlap the agents of a report had.
+    """
+
+    def __init__(self):
+        self._results: dict[tuple[str, str], tuple[int, list[Any]]] = {}
+        self._key_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.network_queries: list[tuple[str, str]] = []
+        self.hits = 0
+
+    def _key_lock(self, key: tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def fetch(
+        self,
+        key: tuple[str, str],
+        max_results: int,
+        fallback: Callable[[], list[Any]],
+    ) -> list[Any]:
+        # One lock per key: concurrent agents asking the same thing wait for the first fetch.
+        with self._key_lock(key):
+            entry = self._results.get(key)
+            if entry is not None and entry[0] >= max_results:
+                self.hits += 1
+                return entry[1][:max_results]
+            results = fallback()
+            self._results[key] = (max_results, results)
+            return results
+
+    @property
+    def evidence(self) -> list[dict[str, Any]]:
+        """All results gathered in this run, de-duplicated by URL."""
+        seen: set[str] = set()
+        gathered: list[dict[str, Any]] = []
+        for _, results in self._results.values():
+            for item in results:
+                url = item.get("href") or item.get("url") if isinstance(item, dict) else None
+                if url in seen:
+                    continue
+                if url:
+                    seen.add(url)
+                gathered.append(item)
+        return gathered
+
+
+_shared_cache: Optional[SearchCache] = None
+_shared_cache_lock = threading.Lock()
+_current_pool: ContextVar[Optional[EvidencePool]] = ContextVar("apex_fin_evidence_pool", default=None)
+
+
+def get_search_cache() -> SearchCache:
+    """Returns the process-wide search cache, creating it from settings on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SearchCache(
+                ttl_seconds=settings.search_cache_ttl_seconds,
+                max_entries=settings.search_cache_max_entries,
+            )
+        return _shared_cache
+
+
+def _reset_search_cache() -> None:
+    global _shared_cache
+    with _shared_cache_lock:
+        _shared_cache = None
+
+
+register_reset_hook(_reset_search_cache)
+
+
+def current_evidence_pool() -> Optional[EvidencePool]:
+    """Returns the evidence pool of the current run, if any."""
+    return _current_pool.get()
+
+
+@contextmanager
+def evidence_pool() -> Iterator[EvidencePool]:
+    """Opens an evidence pool for the duration of one run.
+
+    Search tools built inside the `with` block share the pool, even when
+    they are later run from other threads.
+
+    Yields
+    ------
+    EvidencePool
+        The pool of the run.
+    """
+    pool = _current_pool.get()
+    if pool is not None:
+        # Nested runs (e.g. a report calling compare_company) share the outer pool.
+        yield pool
+        return
+    pool = EvidencePool()
+    token = _current_pool.set(pool)
+    try:
+        yield pool
+    finally:
+        _current_pool.reset(token)
+        logger.info(
+            f"Evidence pool closed: {len(pool.network_queries)} network search(es), {pool.hits} served from the pool."
+        )
+
+
+class CachedDuckDuckGoTools(DuckDuckGoTools):
+    """
+    DuckDuckGo toolkit whose searches go through the run's evidence pool and the shared TTL cache.
+
+    The pool is captured when the toolkit is built, so agents built inside an
+    `evidence_pool()` block keep using it from worker threads.
+    """
+
+    def __init__(self, pool: Optional[EvidencePool] = None, **kwargs):
+        self.evidence_pool: Optional[EvidencePool] = pool or current_evidence_pool()
+        super().__init__(**kwargs)
+
+    def _cached(self, kind: str, query: str, max_results: int, fetch: Callable[[], list[Any]]) -> str:
+        key = (kind, normalize_query(query))
+
+        def _from_cache_or_network() -> list[Any]:
+            if settings.search_cache_enabled:
+                cached = get_search_cache().get(key, max_results)
+                if cached is not None:
+                    logger.debug(f"Search cache hit for {kind} '{query}'.")
+                    return cached
+            results = fetch()
+            if self.evidence_pool is not None:
+                self.evidence_pool.network_queries.append((kind, query))
+            if settings.search_cache_enabled:
+                get_search_cache().set(key, max_results, results)
+            return results
+
+        if self.evidence_pool is not None:
+            results = self.evidence_pool.fetch(key, max_results, _from_cache_or_network)
+        else:
+            results = _from_cache_or_network()
+        return json.dumps(results, indent=2)
+
+    def _ddgs(self) -> DDGS:
+        return DDGS(
+            headers=self.headers, proxy=self.proxy, proxies=self.proxies, timeout=self.timeout, verify=self.verify_ssl
+        )
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        """Use this function to search DuckDuckGo for a query.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The result from DuckDuckGo.
+        """
+        actual_max_results = self.fixed_max_results or max_results
+        search_query = f"{self.modifier} {query}" if self.modifier else query
+        return self._cached(
+            "search",
+            search_query,
+            actual_max_results,
+            lambda: self._ddgs().text(keywords=search_query, max_results=actual_max_results) or [],
+        )
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        """Use this function to get the latest news from DuckDuckGo.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The latest news from DuckDuckGo.
+        """
+        actual_max_results = self.fixed_max_results or max_results
+        return self._cached(
+            "news",
+            query,
+            actual_max_results,
+            lambda: self._ddgs().news(keywords=query, max_results=actual_max_results) or [],
+        )
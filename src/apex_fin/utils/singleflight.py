@@ -0,0 +1,134 @@
+"""
+Single-flight coalescing of concurrent identical calls.
+
+When several threads (service jobs, batch workers, watch cycles) ask for the
+same thing at the same time, only the first caller runs the computation; the
+others wait for it and share its result, or its exception. Nothing is cached:
+once the computation finishes, the next call runs it again.
+
+Used for ticker resolution (`validate_and_get_ticker`), snapshot fetches
+(`fetch_financial_snapshot`) and report section generation. Coalescing can be
+turned off with `set_coalescing`, e.g. by load tests whose concurrent
+requests must each do the full work; `flight_stats` reports what was shared.
+"""
+
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_groups: "weakref.WeakSet[SingleFlight]" = weakref.WeakSet()
+_coalescing = True
+
+
+def set_coalescing(enabled: bool) -> None:
+    """Turns the coalescing of concurrent identical calls on or off, in every `SingleFlight`.
+
+    When off, every call runs its own computation; calls still count as
+    executions in `flight_stats`.
+    """
+    global _coalescing
+    _coalescing = enabled
+
+
+def flight_stats() -> dict[str, dict[str, int]]:
+    """Calls computed (`executions`) and calls served by a concurrent caller's computation (`shared`), by `SingleFlight` name."""
+    return {group.name: {"executions": group.executions, "shared": group.shared} for group in list(_groups)}
+
+
+class _Call:
+    """One in-flight computation and the callers waiting for it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time, sharing its outcome with concurrent callers.
+
+    Parameters
+    ----------
+    name : str
+        Name used in log messages.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+        _groups.add(self)
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs `fn(*args, **kwargs)`, unless a call with the same key is in flight.
+
+        Parameters
+        ----------
+        key : Hashable
+            Identifies identical calls. Calls with equal keys must produce
+            interchangeable results.
+        fn : Callable[..., T]
+            The computation.
+        *args, **kwargs
+            Arguments for `fn`.
+
+        Returns
+        -------
+        T
+            The result of `fn`, computed by this caller or by the one already in
+            flight. The same object is returned to every caller, so mutable
+            results should be copied before being modified.
+
+        Raises
+        ------
+        Exception
+            Whatever `fn` raised, re-raised in every waiting caller.
+        """
+        if not _coalescing:
+            with self._lock:
+                self.executions += 1
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            logger.debug(f"{self.name}: waiting for the in-flight call for {key!r}.")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.info(f"{self.name}: shared one call for {key!r} with {call.waiters} concurrent caller(s).")
+
+    def in_flight(self) -> int:
+        """Number of computations currently running."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,386 @@
+"""
+Structured, vectorized diff of financial snapshots, with a materiality score.
+
+Compares outputs of `YFinanceFinancialAnalyzer.get_financial_snapshot_dict`
+for the same tickers, taken at two points in time. A diff contains:
+
+- the numeric metrics that changed, with absolute and relative deltas;
+- whether the analyst consensus or coverage changed, and the new analyst
+  recommendation records;
+- the earnings dates that moved, or passed since the previous snapshot.
+
+The materiality score sums the largest metric move, measured in multiples of
+its threshold, and one point per analyst or earnings event (half a point for
+a moved earnings date). A score of 1 or more means that at least one
+threshold was crossed. Thresholds come from the `watch` settings.
+
+All tickers of a universe are diffed at once with pandas: `materiality_scores`
+only computes the scores, which is enough to skip unchanged tickers, and
+`diff_universe` also builds the detailed `SnapshotDiff` of each ticker.
+"""
+
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from apex_fin.config import WatchOverrides, settings
+
+_PRICE_METRICS = ("current_price",)
+_TARGET_METRICS = ("mean_target_price", "high_target_price", "low_target_price")
+_COVERAGE_METRIC = "number_of_analyst_opinions"
+_EARNINGS_FIELDS = ("next_earnings_estimated_date_range_start", "next_earnings_estimated_date_range_end")
+
+# Weight of a moved (not passed) earnings date in the materiality score
+_EARNINGS_MOVED_WEIGHT = 0.5
+
+
+class MetricChange(BaseModel):
+    metric: str
+    previous: float
+    current: float
+    absolute_delta: float
+    relative_delta: Optional[float] = None  # fraction of the previous value; None if it was 0
+    threshold_ratio: float = 0.0  # |relative change| in multiples of the metric's threshold
+
+
+class EarningsDateChange(BaseModel):
+    field: str
+    previous: Optional[str] = None
+    current: Optional[str] = None
+    passed: bool = False
+
+
+class SnapshotDiff(BaseModel):
+    ticker: str
+    changed_metrics: list[MetricChange] = []
+    previous_recommendation: Optional[str] = None
+    current_recommendation: Optional[str] = None
+    coverage_changed: bool = False
+    new_analyst_actions: list[dict[str, Any]] = []
+    earnings_date_changes: list[EarningsDateChange] = []
+    materiality: float = 0.0
+
+    @property
+    def recommendation_changed(self) -> bool:
+        return self.previous_recommendation != self.current_recommendation
+
+    def is_material(self, threshold: Optional[float] = None) -> bool:
+        """Whether the materiality reaches `threshold` (default `watch.materiality_threshold`)."""
+        return self.materiality >= (settings.watch.materiality_threshold if threshold is None else threshold)
+
+    def reasons(self) -> list[str]:
+        """Human-readable descriptions of the changes that crossed a threshold."""
+        reasons = [
+            f"{change.metric} changed {change.relative_delta:+.1%}"
+            for change in self.changed_metrics
+            if change.threshold_ratio >= 1 and change.relative_delta is not None
+        ]
+        if self.recommendation_changed:
+            reasons.append(
+                f"analyst consensus changed from {self.previous_recommendation} to {self.current_recommendation}"
+            )
+        elif self.coverage_changed:
+            reasons.append("number of analyst opinions changed")
+        if self.new_analyst_actions:
+            reasons.append(f"{len(self.new_analyst_actions)} new analyst recommendation record(s)")
+        for change in self.earnings_date_changes:
+            if change.passed:
+                reasons.append(f"earnings date {change.previous} passed")
+            else:
+                reasons.append(f"earnings date moved from {change.previous} to {change.current}")
+        return reasons
+
+
+def _section(snapshot: dict[str, Any], name: str) -> dict[str, Any]:
+    # Sections the fetcher could not fill are "N/A" rather than dicts
+    section = snapshot.get(name)
+    return section if isinstance(section, dict) else {}
+
+
+def _summary(snapshot: dict[str, Any]) -> dict[str, Any]:
+    summary = _section(snapshot, "analyst_recommendations").get("summary")
+    return summary if isinstance(summary, dict) else {}
+
+
+def _history(snapshot: dict[str, Any]) -> list[Any]:
+    history = _section(snapshot, "analyst_recommendations").get("history")
+    return history if isinstance(history, list) else []
+
+
+def _numeric_frame(snapshots: dict[str, dict[str, Any]], tickers: list[str]) -> pd.DataFrame:
+    """Tickers x metrics frame of the numeric values ("12.3%" -> 12.3, "N/A" -> NaN)."""
+    rows = {}
+    for ticker in tickers:
+        snapshot = snapshots[ticker]
+        summary = _summary(snapshot)
+        rows[ticker] = {
+            **_section(snapshot, "key_financial_metrics"),
+            **{metric: summary.get(metric) for metric in (*_TARGET_METRICS, _COVERAGE_METRIC)},
+        }
+    frame = pd.DataFrame.from_dict(rows, orient="index")
+    return frame.apply(
+        lambda column: pd.to_numeric(
+            column.astype(str).str.rstrip("%").str.replace(",", "", regex=False), errors="coerce"
+        )
+    )
+
+
+def _date_frame(snapshots: dict[str, dict[str, Any]], tickers: list[str]) -> pd.DataFrame:
+    """Tickers x (earnings fields, retrieval date) frame of dates (NaT when missing)."""
+    rows = {
+        ticker: {
+            **{field: _section(snapshots[ticker], "earnings_information").get(field) for field in _EARNINGS_FIELDS},
+            "retrieved": str(snapshots[ticker].get("data_retrieved_utc"))[:10],
+        }
+        for ticker in tickers
+    }
+    frame = pd.DataFrame.from_dict(rows, orient="index", columns=[*_EARNINGS_FIELDS, "retrieved"])
+    return frame.apply(lambda column: pd.to_datetime(column, format="%Y-%m-%d", errors="coerce"))
+
+
+def _new_analyst_actions(
+    previous: dict[str, dict[str, Any]], current: dict[str, dict[str, Any]], tickers: list[str]
+) -> pd.DataFrame:
+    """Recommendation records present in the current snapshot but not in the previous one (anti-join)."""
+    def _records(snapshots: dict[str, dict[str, Any]]) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                (ticker, json.dumps(record, sort_keys=True, default=str))
+                for ticker in tickers
+                for record in _history(snapshots[ticker])
+            ],
+            columns=["ticker", "record"],
+        )
+
+    merged = _records(current).merge(_records(previous), on=["ticker", "record"], how="left", indicator=True)
+    return merged.loc[merged["_merge"] == "left_only", ["ticker", "record"]]
+
+
+def _thresholds_pct(columns: pd.Index, thresholds: WatchOverrides) -> pd.Series:
+    """Per-metric relative change threshold, in percent."""
+    values = pd.Series(thresholds.metric_change_pct, index=columns, dtype=float)
+    values[values.index.isin(_PRICE_METRICS)] = thresholds.price_move_pct
+    values[values.index.isin(_TARGET_METRICS)] = thresholds.target_change_pct
+    return values
+
+
+class _UniverseDiff:
+    """The frames of a universe diff, computed once and shared by the scores and the detailed diffs."""
+
+    def __init__(
+        self,
+        previous: dict[str, dict[str, Any]],
+        current: dict[str, dict[str, Any]],
+        thresholds: WatchOverrides,
+        today: date,
+    ):
+        self.tickers = [ticker for ticker in current if ticker in previous]
+        self.previous, self.current = previous, current
+
+        before = _numeric_frame(previous, self.tickers)
+        after = _numeric_frame(current, self.tickers)
+        before, after = before.align(after, join="outer")
+        self.before, self.after = before, after
+        self.absolute = after - before
+        self.relative = self.absolute / before.abs().replace(0, np.nan)
+        self.changed = (self.absolute != 0) & self.absolute.notna()
+        scored = [column for column in before.columns if column != _COVERAGE_METRIC]
+        self.ratio = (self.relative[scored].abs() * 100).div(_thresholds_pct(pd.Index(scored), thresholds), axis=1)
+        metric_score = self.ratio.max(axis=1).fillna(0.0) if scored else pd.Series(0.0, index=self.tickers)
+
+        self.previous_recommendation = pd.Series(
+            {ticker: _summary(previous[ticker]).get("recommendation") for ticker in self.tickers}, dtype=object
+        )
+        self.current_recommendation = pd.Series(
+            {ticker: _summary(current[ticker]).get("recommendation") for ticker in self.tickers}, dtype=object
+        )
+        recommendation_changed = self.previous_recommendation.ne(self.current_recommendation)
+        if _COVERAGE_METRIC in self.changed:
+            self.coverage_changed = self.changed[_COVERAGE_METRIC].reindex(self.tickers, fill_value=False)
+        else:
+            self.coverage_changed = pd.Series(False, index=self.tickers)
+
+        self.new_actions = _new_analyst_actions(previous, current, self.tickers)
+        new_action_counts = self.new_actions.groupby("ticker").size().reindex(self.tickers, fill_value=0)
+
+        dates_before, dates_after = _date_frame(previous, self.tickers), _date_frame(current, self.tickers)
+        fields = list(_EARNINGS_FIELDS)
+        self.earnings_passed = (
+            dates_before[fields].gt(dates_before["retrieved"], axis=0)
+            & dates_before[fields].le(pd.Timestamp(today))
+        )
+        self.earnings_moved = (
+            dates_before[fields].notna() & dates_after[fields].notna() & dates_before[fields].ne(dates_after[fields])
+        ) & ~self.earnings_passed
+        self.dates_before, self.dates_after = dates_before, dates_after
+
+        analyst_events = (recommendation_changed | self.coverage_changed).astype(float) + (new_action_counts > 0)
+        earnings_events = self.earnings_passed.any(axis=1).astype(float)
+        self.scores = pd.DataFrame(
+            {
+                "materiality": metric_score
+                + (analyst_events if thresholds.recommendation_change else 0.0)
+                + (earnings_events if thresholds.earnings_passed else 0.0)
+                + self.earnings_moved.any(axis=1) * _EARNINGS_MOVED_WEIGHT,
+                "metric_score": metric_score,
+                "top_metric": self._top_metric(),
+                "recommendation_changed": recommendation_changed,
+                "coverage_changed": self.coverage_changed,
+                "new_analyst_actions": new_action_counts,
+                "earnings_passed": self.earnings_passed.any(axis=1),
+                "earnings_moved": self.earnings_moved.any(axis=1),
+            },
+            index=pd.Index(self.tickers, name="ticker"),
+        )
+
+    def _top_metric(self) -> pd.Series:
+        """The metric with the largest threshold ratio of each ticker (None when nothing is comparable)."""
+        if self.ratio.empty or self.ratio.columns.empty:
+            return pd.Series(None, index=self.tickers, dtype=object)
+        comparable = self.ratio.notna().any(axis=1)
+        return self.ratio.fillna(-1.0).idxmax(axis=1).where(comparable, None)
+
+    def detail(self, ticker: str) -> SnapshotDiff:
+        changed_columns = self.changed.columns[self.changed.loc[ticker].to_numpy(dtype=bool)]
+        changes = [
+            MetricChange(
+                metric=metric,
+                previous=float(self.before.at[ticker, metric]),
+                current=float(self.after.at[ticker, metric]),
+                absolute_delta=float(self.absolute.at[ticker, metric]),
+                relative_delta=None if pd.isna(self.relative.at[ticker, metric]) else float(self.relative.at[ticker, metric]),
+                threshold_ratio=(
+                    float(self.ratio.at[ticker, metric])
+                    if metric in self.ratio.columns and pd.notna(self.ratio.at[ticker, metric])
+                    else 0.0
+                ),
+            )
+            for metric in changed_columns
+        ]
+        changes.sort(key=lambda change: change.threshold_ratio, reverse=True)
+
+        earnings_changes = []
+        for field in _EARNINGS_FIELDS:
+            passed, moved = bool(self.earnings_passed.at[ticker, field]), bool(self.earnings_moved.at[ticker, field])
+            if passed or moved:
+                before, after = self.dates_before.at[ticker, field], self.dates_after.at[ticker, field]
+                earnings_changes.append(
+                    EarningsDateChange(
+                        field=field,
+                        previous=None if pd.isna(before) else before.strftime("%Y-%m-%d"),
+                        current=None if pd.isna(after) else after.strftime("%Y-%m-%d"),
+                        passed=passed,
+                    )
+                )
+
+        return SnapshotDiff(
+            ticker=ticker,
+            changed_metrics=changes,
+            previous_recommendation=self.previous_recommendation.get(ticker),
+            current_recommendation=self.current_recommendation.get(ticker),
+            coverage_changed=bool(self.coverage_changed.get(ticker, False)),
+            new_analyst_actions=[
+                json.loads(record) for record in self.new_actions.loc[self.new_actions["ticker"] == ticker, "record"]
+            ],
+            earnings_date_changes=earnings_changes,
+            materiality=float(self.scores.at[ticker, "materiality"]),
+        )
+
+
+def materiality_scores(
+    previous: dict[str, dict[str, Any]],
+    current: dict[str, dict[str, Any]],
+    thresholds: Optional[WatchOverrides] = None,
+    today: Optional[date] = None,
+) -> pd.DataFrame:
+    """Scores how much each ticker's snapshot changed, for a whole universe at once.
+
+    Parameters
+    ----------
+    previous, current : dict[str, dict[str, Any]]
+        Snapshots by ticker. Only tickers present in both are scored.
+    thresholds : Optional[WatchOverrides], optional
+        Thresholds and event switches. Defaults to the `watch` settings.
+    today : Optional[date], optional
+        The current date, for passed earnings dates. Defaults to today (UTC).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per ticker with the `materiality` score, the `metric_score`
+        and `top_metric` behind it, and the analyst and earnings event flags.
+    """
+    return _UniverseDiff(
+        previous, current, thresholds or settings.watch, today or datetime.now(timezone.utc).date()
+    ).scores
+
+
+def diff_universe(
+    previous: dict[str, dict[str, Any]],
+    current: dict[str, dict[str, Any]],
+    thresholds: Optional[WatchOverrides] = None,
+    today: Optional[date] = None,
+    min_materiality: float = 0.0,
+) -> dict[str, SnapshotDiff]:
+    """Diffs a whole universe of snapshots at once.
+
+    Parameters
+    ----------
+    previous, current : dict[str, dict[str, Any]]
+        Snapshots by ticker. Only tickers present in both are diffed.
+    thresholds : Optional[WatchOverrides], optional
+        Thresholds and event switches. Defaults to the `watch` settings.
+    today : Optional[date], optional
+        The current date, for passed earnings dates. Defaults to today (UTC).
+    min_materiality : float, optional
+        Only build the detailed diffs of tickers scoring at least this.
+        Defaults to 0 (every ticker).
+
+    Returns
+    -------
+    dict[str, SnapshotDiff]
+        The diff of each ticker, in the order of `current`.
+    """
+    universe = _UniverseDiff(previous, current, thresholds or settings.watch, today or datetime.now(timezone.utc).date())
+    selected = universe.scores.index[universe.scores["materiality"] >= min_materiality]
+    return {ticker: universe.detail(ticker) for ticker in selected}
+
+
+def diff_snapshots(
+    previous: dict[str, Any],
+    current: dict[str, Any],
+    thresholds: Optional[WatchOverrides] = None,
+    today: Optional[date] = None,
+) -> SnapshotDiff:
+    """Diffs two snapshots of the same ticker; see `diff_universe`."""
+    ticker = current.get("ticker_symbol") or previous.get("ticker_symbol") or "?"
+    return diff_universe({ticker: previous}, {ticker: current}, thresholds, today)[ticker]
+
+
+if __name__ == "__main__":
+    before = {
+        "ticker_symbol": "AAPL",
+        "data_retrieved_utc": "2025-05-01 12:00:00 UTC",
+        "key_financial_metrics": {"current_price": 200.0, "trailing_pe": 31.2, "profit_margins": "24.30%"},
+        "analyst_recommendations": {
+            "summary": {"recommendation": "buy", "mean_target_price": 230.0, "number_of_analyst_opinions": 38},
+            "history": [{"period": "0m", "strongBuy": 7, "buy": 21, "hold": 13}],
+        },
+        "earnings_information": {"next_earnings_estimated_date_range_start": "2025-05-02"},
+    }
+    after = {
+        **before,
+        "data_retrieved_utc": "2025-05-06 12:00:00 UTC",
+        "key_financial_metrics": {"current_price": 209.0, "trailing_pe": 32.6, "profit_margins": "24.30%"},
+        "analyst_recommendations": {
+            "summary": {"recommendation": "buy", "mean_target_price": 235.0, "number_of_analyst_opinions": 39},
+            "history": [{"period": "0m", "strongBuy": 8, "buy": 21, "hold": 12}],
+        },
+    }
+    diff = diff_snapshots(before, after, WatchOverrides(), today=date(2025, 5, 6))
+    print(diff.model_dump_json(indent=2))
+    print(diff.reasons())
@@ -0,0 +1,231 @@
+"""
+Token budget for what coordinate-mode team leaders read back from their members.
+
+In `coordinate` mode, a team leader delegates with `transfer_task_to_member`
+and receives the member's full output as the tool result, which stays in its
+conversation for every later turn. With several members writing full Markdown
+sections, the leader's prompt (and so its latency and cost) grows with each
+delegation.
+
+`LeaderContextBudget` is a tool hook (`Team(tool_hooks=[...])`) that bounds
+the member outputs fed back to the leader to `llm.team_context.max_tokens`.
+Each delegation gets a share of the remaining budget proportional to the
+member's priority among the members not heard from yet. An output over its
+share is condensed to its headings and the first sentence of each paragraph
+(`summarize`) and, if still too long, cut (`truncate`). Each turn is logged
+with the tokens returned, kept and left.
+
+Only the leader's view is bounded: member runs, their stored responses and
+the team's run response keep the full outputs.
+"""
+
+import logging
+import re
+import threading
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from apex_fin.config import settings
+from apex_fin.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Leader tools whose result is a member's output
+DELEGATION_TOOLS = ("transfer_task_to_member", "forward_task_to_member")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+@dataclass
+class ContextTurn:
+    """Token measurement of one delegation, as seen by the leader."""
+
+    member_id: str
+    returned_tokens: int
+    kept_tokens: int
+    allowance_tokens: int
+    reduction: Optional[str] = None
+
+
+def member_id(member: Any) -> str:
+    """The ID a team leader uses to address `member`, as agno derives it."""
+    from agno.utils.string import url_safe_string
+
+    return url_safe_string(member.name) if member.name else ""
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cuts `text` to about `max_tokens`, at a line break when there is one nearby."""
+    limit = max(max_tokens, 0) * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    line_break = cut.rfind("\n")
+    if line_break > limit // 2:
+        cut = cut[:line_break]
+    return cut.rstrip()
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+
+
+def _condense_block(block: str) -> str:
+    lines = [line for line in block.splitlines() if line.strip()]
+    if lines and lines[0].lstrip().startswith("|"):
+        return "\n".join(lines[:3])
+    kept: list[str] = []
+    paragraph: list[str] = []
+    for line in lines:
+        stripped = line.lstrip()
+        if stripped.startswith("#") or re.match(r"([-*+]|\d+[.)])\s", stripped):
+            if paragraph:
+                kept.append(_first_sentence(" ".join(paragraph)))
+                paragraph = []
+            kept.append(line if stripped.startswith("#") else _first_sentence(line))
+        else:
+            paragraph.append(stripped)
+    if paragraph:
+        kept.append(_first_sentence(" ".join(paragraph)))
+    return "\n".join(kept)
+
+
+def condense_markdown(text: str, max_tokens: int) -> str:
+    """Shortens a Markdown text towards `max_tokens` while keeping its structure.
+
+    Every block is first reduced to its headings and the first sentence of
+    each paragraph and list item (tables to their first data row); blocks are
+    then restored in full, in order, as long as the result fits.
+    """
+    blocks = [block for block in re.split(r"\n\s*\n", text.strip()) if block.strip()]
+    condensed = [_condense_block(block) for block in blocks]
+    tokens = estimate_tokens("\n\n".join(condensed))
+    for i, block in enumerate(blocks):
+        extra = estimate_tokens(block) - estimate_tokens(condensed[i])
+        if tokens + extra > max_tokens:
+            break
+        condensed[i], tokens = block, tokens + extra
+    return "\n\n".join(block for block in condensed if block)
+
+
+class LeaderContextBudget:
+    """
+    Tool hook bounding the member outputs a team leader reads back.
+
+    Parameters
+    ----------
+    members : Iterable[Any]
+        The team members (agents or teams), used to share the budget by priority.
+    priorities : dict[str, float], optional
+        Weight of each member, by member ID (see `member_id`); members
+        without one weigh 1. `llm.team_context.priorities` overrides them.
+    max_tokens : Optional[int], optional
+        Budget for all member outputs of a run. Defaults to
+        `llm.team_context.max_tokens`.
+    """
+
+    def __init__(
+        self,
+        members: Iterable[Any],
+        priorities: Optional[dict[str, float]] = None,
+        max_tokens: Optional[int] = None,
+    ):
+        config = settings.team_context
+        self.max_tokens = max_tokens if max_tokens is not None else config.max_tokens
+        self.min_member_tokens = config.min_member_tokens
+        self.strategy = config.strategy
+        self.priorities = {**(priorities or {}), **config.priorities}
+        self.member_ids = [member_id(member) for member in members]
+        self.turns: list[ContextTurn] = []
+        self._lock = threading.Lock()
+
+    def weight(self, member: str) -> float:
+        return max(self.priorities.get(member, 1.0), 0.0)
+
+    @property
+    def used_tokens(self) -> int:
+        return sum(turn.kept_tokens for turn in self.turns)
+
+    def reset(self) -> None:
+        """Forgets the previous turns, e.g. before running the same team again."""
+        with self._lock:
+            self.turns.clear()
+
+    def allowance(self, member: str) -> int:
+        """Tokens the next output of `member` may take in the leader's context."""
+        remaining = max(self.max_tokens - self.used_tokens, 0)
+        heard = {turn.member_id for turn in self.turns}
+        waiting = sum(self.weight(m) for m in self.member_ids if m not in heard and m != member)
+        own = self.weight(member)
+        share = remaining * own / (own + waiting) if own + waiting > 0 else remaining
+        return max(int(share), min(self.min_member_tokens, remaining))
+
+    def bound(self, member: str, output: str) -> str:
+        """Fits one member output in its allowance and records the turn."""
+        with self._lock:
+            allowance = self.allowance(member)
+            returned = estimate_tokens(output)
+            bounded, reduction = output, None
+            if returned > allowance:
+                if self.strategy == "summarize":
+                    bounded, reduction = condense_markdown(output, allowance), "summarized"
+                if estimate_tokens(bounded) > allowance:
+                    bounded, reduction = _truncate(bounded, allowance), "truncated"
+                bounded += (
+                    f"\n\n[Output {reduction} for the team leader's context budget:"
+                    f" ~{estimate_tokens(bounded)} of ~{returned} tokens kept.]"
+                )
+            turn = ContextTurn(member, returned, estimate_tokens(bounded), allowance, reduction)
+            self.turns.append(turn)
+        logger.info(
+            f"Leader context turn {len(self.turns)} ({member}): ~{turn.returned_tokens} tokens returned, "
+            f"~{turn.kept_tokens} kept{f' ({reduction})' if reduction else ''}; "
+            f"~{self.used_tokens} of {self.max_tokens} tokens used."
+        )
+        return bounded
+
+    def __call__(self, function_name: str, function_call: Callable[..., Any], arguments: dict[str, Any]) -> Any:
+        result = function_call(**arguments)
+        if function_name not in DELEGATION_TOOLS:
+            return result
+        # Delegations stream the member output; the leader only reads it once complete.
+        output = "".join(str(chunk) for chunk in result) if isinstance(result, Iterator) else str(result)
+        return self.bound(arguments.get("member_id", ""), output)
+
+
+def team_context_hooks(members: Iterable[Any], priorities: Optional[dict[str, float]] = None) -> list[Callable[..., Any]]:
+    """The `tool_hooks` of a coordinate-mode team: a `LeaderContextBudget`, unless disabled.
+
+    Parameters
+    ----------
+    members : Iterable[Any]
+        The team members.
+    priorities : Optional[dict[str, float]], optional
+        Default weight of each member, by member ID.
+
+    Returns
+    -------
+    list[Callable[..., Any]]
+        The hooks, empty when `llm.team_context.enabled` is false.
+    """
+    if not settings.team_context.enabled:
+        return []
+    return [LeaderContextBudget(members, priorities)]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from types import SimpleNamespace
+
+    report = "\n\n".join(
+        f"## Section {i}\n\nFirst sentence of section {i}. " + "Further detail follows here. " * 60
+        for i in range(1, 5)
+    )
+    budget = LeaderContextBudget(
+        [SimpleNamespace(name="Analysis Agent"), SimpleNamespace(name="News Agent")],
+        priorities={"analysis-agent": 3},
+        max_tokens=800,
+    )
+    print(budget("transfer_task_to_member", lambda **kwargs: iter([report]), {"member_id": "analysis-agent"}))
+    print(budget("transfer_task_to_member", lambda **kwargs: iter([report]), {"member_id": "news-agent"}))
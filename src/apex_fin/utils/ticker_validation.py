@@ -2,15 +2,21 @@ import yfinance as yf
 from typing import Optional
 import logging
 
+from apex_fin.utils.singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
+# Concurrent lookups of the same input share one Yahoo Finance search
+_resolution_flights = SingleFlight("ticker resolution")
+
 def validate_and_get_ticker(user_input: str) -> Optional[tuple[str, str]]:
     """
     Validates user input to find a corresponding Yahoo Finance ticker.
 
     This function takes a user-provided string, which could be a company
     name or a ticker symbol, and uses the yfinance search feature to
-    find the most likely ticker.
+    find the most likely ticker. Concurrent calls for the same input
+    (ignoring case and surrounding spaces) share a single search.
 
     Args:
         user_input: The company name or ticker symbol to validate.
@@ -24,6 +30,11 @@ def validate_and_get_ticker(user_input: str) -> Optional[tuple[str, str]]:
         logger.error("Validation Error: Input must be a non-empty string")
         return None
 
+    return _resolution_flights.do(user_input.strip().lower(), _search_ticker, user_input)
+
+
+def _search_ticker(user_input: str) -> Optional[tuple[str, str]]:
+    """Runs the Yahoo Finance search behind `validate_and_get_ticker`."""
     try:
         # Perform search with expanded results
         search_results = yf.Search(user_input.strip(), max_results=5).quotes
@@ -0,0 +1,48 @@
+from typing import Any
+
+
+def response_token_usage(response: Any) -> tuple[int, int]:
+    """Extracts input and output token counts from an agent or team run response.
+
+    Agno aggregates per-message metrics into lists (one entry per model call
+    made during the run), so the counts are summed. Responses without
+    metrics count as zero tokens.
+
+    Parameters
+    ----------
+    response : Any
+        A `RunResponse` or `TeamRunResponse`, or any object with a `metrics` dict.
+
+    Returns
+    -------
+    tuple[int, int]
+        The total input tokens and output tokens used by the run.
+    """
+    metrics = getattr(response, "metrics", None) or {}
+
+    def _total(key: str) -> int:
+        value = metrics.get(key, 0)
+        if isinstance(value, (list, tuple)):
+            return int(sum(v for v in value if isinstance(v, (int, float))))
+        return int(value) if isinstance(value, (int, float)) else 0
+
+    return _total("input_tokens"), _total("output_tokens")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens in a text without calling a tokenizer.
+
+    Uses the common ~4 characters per token approximation, which is good
+    enough for budgeting decisions and avoids loading model tokenizers.
+
+    Parameters
+    ----------
+    text : str
+        The text to measure.
+
+    Returns
+    -------
+    int
+        The estimated token count.
+    """
+    return (len(text) + 3) // 4 if text else 0
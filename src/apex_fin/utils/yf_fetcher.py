@@ -471,6 +471,7 @@
 #         print("-" * 50)
 
 
+import copy
 import json
 import logging
 import yfinance as yf
@@ -478,10 +479,13 @@ import pandas as pd
 import numpy as np
 import datetime as dt
 
+from apex_fin.utils.singleflight import SingleFlight
 from apex_fin.utils.ticker_validation import validate_and_get_ticker
 
 logger = logging.getLogger(__name__)
 
+_snapshot_flights = SingleFlight("snapshot fetch")
+
 class YFinanceFinancialAnalyzer:
     """
     A streamlined analyzer to fetch only the core data points required for quick
@@ -650,6 +654,36 @@ class YFinanceFinancialAnalyzer:
         return json.dumps(self.get_financial_snapshot_dict(), indent=2)
 
 
+def fetch_financial_snapshot(symbol: str) -> dict:
+    """
+    Fetches the financial snapshot of `symbol`, sharing concurrent identical fetches.
+
+    Equivalent to `YFinanceFinancialAnalyzer(symbol).get_financial_snapshot_dict()`,
+    except that callers asking for the same symbol at the same time wait for a
+    single fetch instead of each querying Yahoo Finance.
+
+    Parameters
+    ----------
+    symbol : str
+        The ticker symbol or company name.
+
+    Returns
+    -------
+    dict
+        The snapshot. Each caller gets its own copy.
+
+    Raises
+    ------
+    ValueError, RuntimeError
+        As raised by `YFinanceFinancialAnalyzer`, in every waiting caller.
+    """
+    key = symbol.strip().upper() if isinstance(symbol, str) else symbol
+    snapshot = _snapshot_flights.do(
+        key, lambda: YFinanceFinancialAnalyzer(symbol).get_financial_snapshot_dict()
+    )
+    return copy.deepcopy(snapshot)
+
+
 # Example usage (for testing):
 if __name__ == "__main__":
     # analyzer = YFinanceFinancialAnalyzer("Applied Digital Corporation")